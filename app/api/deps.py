@@ -0,0 +1,36 @@
+from fastapi import Depends, Request
+from app.services.container import ServiceContainer
+from app.services.font_manager import FontManager
+from app.services.image_processor import ImageProcessor
+from app.services.batch_processor import BatchProcessor
+from app.services.template_store import TemplateStore
+from app.services.job_queue import JobQueue
+
+def get_services(request: Request) -> ServiceContainer:
+    """Return the application-scoped service container"""
+    return request.app.state.services
+
+def get_image_processor(
+    services: ServiceContainer = Depends(get_services)
+) -> ImageProcessor:
+    return services.image_processor
+
+def get_font_manager(
+    services: ServiceContainer = Depends(get_services)
+) -> FontManager:
+    return services.font_manager
+
+def get_batch_processor(
+    services: ServiceContainer = Depends(get_services)
+) -> BatchProcessor:
+    return services.batch_processor
+
+def get_template_store(
+    services: ServiceContainer = Depends(get_services)
+) -> TemplateStore:
+    return services.template_store
+
+def get_job_queue(
+    services: ServiceContainer = Depends(get_services)
+) -> JobQueue:
+    return services.job_queue
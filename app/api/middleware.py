@@ -0,0 +1,114 @@
+import json
+from app.core.config import settings
+from app.api.responses import RENDER_CACHE_HEADER
+
+_CACHE_HIT = (RENDER_CACHE_HEADER.lower().encode(), b"hit")
+
+def _reject(status: int, detail: str, headers: list[tuple[bytes, bytes]]):
+    body = json.dumps({"detail": detail}).encode()
+    start = {
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            *headers,
+        ],
+    }
+    return start, {"type": "http.response.body", "body": body}
+
+class AdmissionMiddleware:
+    """
+    Rate limiting and adaptive concurrency limiting for the API.
+
+    A pure ASGI middleware, so admitted requests pay for a dict lookup and a
+    few comparisons rather than a BaseHTTPMiddleware task. Requests under
+    API_V1_STR, apart from RATE_LIMIT_EXEMPT_PATHS, take a token from their
+    client's bucket or get 429. Render
+    requests (POSTs to generate and templates, except batches, which bound
+    their own concurrency) must also fit under the adaptive concurrency
+    limit or get 503. Any 503 from the render queue cuts that limit; the
+    latency of successful renders feeds it, but not that of render cache
+    hits or errors, which finish fast however loaded the server is.
+    The limiters are the ones on the service container, so they are shared
+    with /admin/status.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.api_prefix = settings.API_V1_STR + "/"
+        self.exempt_paths = frozenset(settings.API_V1_STR + path for path in settings.RATE_LIMIT_EXEMPT_PATHS)
+        self.render_prefixes = (
+            f"{settings.API_V1_STR}/generate",
+            f"{settings.API_V1_STR}/templates",
+        )
+        self.batch_path = f"{settings.API_V1_STR}/generate/batch"
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "")
+        if scope["type"] != "http" or not path.startswith(self.api_prefix):
+            await self.app(scope, receive, send)
+            return
+        services = getattr(scope["app"].state, "services", None)
+        if services is None:
+            await self.app(scope, receive, send)
+            return
+
+        rate_limiter = services.rate_limiter
+        if rate_limiter.enabled and path.rstrip("/") not in self.exempt_paths:
+            client = scope["client"][0] if scope.get("client") else "unknown"
+            remaining, retry_after = rate_limiter.acquire(client)
+            if retry_after:
+                for message in _reject(429, "Rate limit exceeded", [
+                    (b"retry-after", str(max(1, round(retry_after))).encode()),
+                    (b"x-ratelimit-limit", str(rate_limiter.per_minute).encode()),
+                    (b"x-ratelimit-remaining", b"0"),
+                ]):
+                    await send(message)
+                return
+            limit_headers = [
+                (b"x-ratelimit-limit", str(rate_limiter.per_minute).encode()),
+                (b"x-ratelimit-remaining", str(int(remaining)).encode()),
+            ]
+
+            async def send_with_limits(message):
+                if message["type"] == "http.response.start":
+                    message["headers"] = [*message.get("headers", []), *limit_headers]
+                await send(message)
+        else:
+            send_with_limits = send
+
+        concurrency = services.concurrency_limit
+        if (
+            concurrency is None
+            or scope["method"] != "POST"
+            or not path.startswith(self.render_prefixes)
+            or path.startswith(self.batch_path)
+        ):
+            await self.app(scope, receive, send_with_limits)
+            return
+
+        started = concurrency.try_acquire()
+        if started is None:
+            for message in _reject(503, "Server is busy, please retry shortly", [(b"retry-after", b"1")]):
+                await send_with_limits(message)
+            return
+
+        status = 500
+        cache_hit = False
+
+        async def send_tracking_status(message):
+            nonlocal status, cache_hit
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                cache_hit = _CACHE_HIT in message.get("headers", [])
+            await send_with_limits(message)
+
+        try:
+            await self.app(scope, receive, send_tracking_status)
+        finally:
+            concurrency.release(
+                started,
+                overloaded=status == 503,
+                sample=200 <= status < 400 and not cache_hit
+            )
@@ -0,0 +1,58 @@
+import uuid
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse, Response
+from app.core.config import settings
+from app.models.request import RenderSpec
+from app.services.image_processor import RenderResult
+
+# Tells clients, and the admission middleware, whether the render cache answered
+RENDER_CACHE_HEADER = "X-Render-Cache"
+
+def check_outputs(request: RenderSpec):
+    """Reject requests with more outputs than MAX_OUTPUTS_PER_REQUEST with a 400"""
+    if request.outputs and len(request.outputs) > settings.MAX_OUTPUTS_PER_REQUEST:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many outputs, at most {settings.MAX_OUTPUTS_PER_REQUEST} are allowed"
+        )
+
+def render_response(result: RenderResult, delivery: str, output_format: str) -> Response:
+    """Build the HTTP response for a render result"""
+    cache_status = "hit" if result.cached else "miss"
+    if delivery == "inline":
+        if result.variants:
+            response = multipart_response(result.variants)
+            response.headers[RENDER_CACHE_HEADER] = cache_status
+            return response
+        return Response(
+            content=result.content,
+            media_type=result.media_type,
+            headers={
+                "Content-Disposition": f'inline; filename="image.{output_format}"',
+                RENDER_CACHE_HEADER: cache_status
+            }
+        )
+
+    return JSONResponse(
+        {"status": "success", **result.describe()},
+        headers={RENDER_CACHE_HEADER: cache_status}
+    )
+
+def multipart_response(variants: list[RenderResult]) -> Response:
+    """All outputs of a render in one multipart/mixed body, in request order"""
+    boundary = uuid.uuid4().hex
+    body = bytearray()
+    for index, variant in enumerate(variants):
+        extension = variant.media_type.split("/")[-1]
+        body += (
+            f"--{boundary}\r\n"
+            f"Content-Type: {variant.media_type}\r\n"
+            f'Content-Disposition: inline; filename="image-{index}.{extension}"\r\n'
+            f"Content-Length: {len(variant.content)}\r\n"
+            f"X-Image-Size: {variant.size[0]}x{variant.size[1]}\r\n"
+            "\r\n"
+        ).encode("ascii")
+        body += variant.content
+        body += b"\r\n"
+    body += f"--{boundary}--\r\n".encode("ascii")
+    return Response(content=bytes(body), media_type=f"multipart/mixed; boundary={boundary}")
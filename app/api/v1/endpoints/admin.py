@@ -1,6 +1,11 @@
 from fastapi import APIRouter, HTTPException, Depends
 from app.core.config import settings
+from app.api.deps import get_services
+from app.services.container import ServiceContainer
+from app.services.font_catalog import FONT_EXTENSIONS
+import asyncio
 import logging
+import os
 import shutil
 from pathlib import Path
 
@@ -8,34 +13,44 @@ router = APIRouter()
 logger = logging.getLogger(__name__)
 
 @router.get("/status")
-async def get_status():
-    """Get system status and statistics"""
+async def get_status(services: ServiceContainer = Depends(get_services)):
+    """Get system status and statistics; reads counters only, never the disk"""
     try:
-        # Get directory sizes
-        output_size = sum(f.stat().st_size for f in settings.OUTPUT_DIR.glob("**/*") if f.is_file())
-        cache_size = sum(f.stat().st_size for f in settings.CACHE_DIR.glob("**/*") if f.is_file())
-        fonts_size = sum(f.stat().st_size for f in settings.FONTS_DIR.glob("**/*") if f.is_file())
-        
-        # Count files
-        output_files = len(list(settings.OUTPUT_DIR.glob("**/*")))
-        cache_files = len(list(settings.CACHE_DIR.glob("**/*")))
-        font_files = len(list(settings.FONTS_DIR.glob("**/*")))
-        
+        caches = {
+            "fonts": services.font_manager.cache_stats(),
+            "source_images": services.image_cache.stats(),
+            "decoded_images": services.image_processor.decoded_cache.stats(),
+            "renders": services.render_cache.stats(),
+            "text_layouts": services.image_processor.layout_cache.stats(),
+            "text_sprites": services.image_processor.sprite_cache.stats(),
+            "svg_rasters": services.svg_processor.stats(),
+            "templates": services.template_store.stats()
+        }
+        render_pool = services.render_executor.stats()
+        concurrency = services.concurrency_limit
+
         return {
             "status": "running",
-            "directories": {
-                "output": {
-                    "size": output_size,
-                    "files": output_files
+            "directories": services.storage_usage.usage(),
+            "reconciliation": services.storage_usage.reconciliation(),
+            "caches": caches,
+            "hit_ratios": {name: stats["hit_ratio"] for name, stats in caches.items()},
+            "in_flight": {
+                "requests": concurrency.in_flight if concurrency else None,
+                "renders": render_pool["in_flight"],
+                "render_lanes": {
+                    name: {"running": lane["running"], "queued": lane["queue_depth"]}
+                    for name, lane in render_pool["lanes"].items()
                 },
-                "cache": {
-                    "size": cache_size,
-                    "files": cache_files
-                },
-                "fonts": {
-                    "size": fonts_size,
-                    "files": font_files
-                }
+                "jobs": services.job_queue.running
+            },
+            "http_client": services.http_client.stats(),
+            "render_pool": render_pool,
+            "outputs": services.output_store.stats(),
+            "jobs": services.job_queue.stats(),
+            "admission": {
+                "rate_limit": services.rate_limiter.stats(),
+                "concurrency": concurrency.stats() if concurrency else None
             }
         }
     except Exception as e:
@@ -43,66 +58,77 @@ async def get_status():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/cleanup")
-async def cleanup_system():
-    """Clean up temporary files and cache"""
+async def cleanup_system(services: ServiceContainer = Depends(get_services)):
+    """Delete expired outputs and clear the caches"""
     try:
-        # Clean output directory
-        for file in settings.OUTPUT_DIR.glob("*"):
-            if file.is_file():
-                file.unlink()
-        
-        # Clean cache directory
-        for file in settings.CACHE_DIR.glob("*"):
-            if file.is_file():
-                file.unlink()
-        
-        # Clean fonts directory (except .ttf files)
-        for file in settings.FONTS_DIR.glob("*"):
-            if file.is_file() and not file.suffix.lower() == '.ttf':
-                file.unlink()
-        
-        return {"status": "success", "message": "System cleaned up successfully"}
+        # Outputs whose download URLs are still valid are kept
+        outputs_deleted = await services.output_store.collect()
+        outputs_deleted += await services.output_store.remove_orphans()
+
+        # Drop cached source images; the filesystem work runs off the event loop
+        await asyncio.to_thread(services.image_cache.clear)
+        await asyncio.to_thread(_clean_directories)
+        await _refresh_fonts(services)
+
+        return {
+            "status": "success",
+            "message": "System cleaned up successfully",
+            "outputs_deleted": outputs_deleted
+        }
     except Exception as e:
         logger.error(f"Error cleaning up system: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/reset")
-async def reset_system():
+async def reset_system(services: ServiceContainer = Depends(get_services)):
     """Reset the system (delete all generated files and cache)"""
     try:
-        # Remove and recreate output directory
-        if settings.OUTPUT_DIR.exists():
-            shutil.rmtree(settings.OUTPUT_DIR)
-        settings.OUTPUT_DIR.mkdir(parents=True)
-        
-        # Remove and recreate cache directory
-        if settings.CACHE_DIR.exists():
-            shutil.rmtree(settings.CACHE_DIR)
-        settings.CACHE_DIR.mkdir(parents=True)
-        
-        # For fonts directory, remove everything except .ttf files
-        if settings.FONTS_DIR.exists():
-            # First, move all .ttf files to a temporary directory
-            temp_dir = settings.FONTS_DIR.parent / "temp_fonts"
-            temp_dir.mkdir(exist_ok=True)
-            
-            for file in settings.FONTS_DIR.glob("*.ttf"):
-                shutil.move(str(file), str(temp_dir / file.name))
-            
-            # Remove the entire fonts directory
-            shutil.rmtree(settings.FONTS_DIR)
-            
-            # Recreate fonts directory
-            settings.FONTS_DIR.mkdir(parents=True)
-            
-            # Move .ttf files back
-            for file in temp_dir.glob("*.ttf"):
-                shutil.move(str(file), str(settings.FONTS_DIR / file.name))
-            
-            # Remove temporary directory
-            shutil.rmtree(temp_dir)
-        
+        await services.output_store.clear()
+        await asyncio.to_thread(services.image_cache.clear)
+        await asyncio.to_thread(_reset_directories)
+        await _refresh_fonts(services)
+
         return {"status": "success", "message": "System reset successfully"}
     except Exception as e:
         logger.error(f"Error resetting system: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def _refresh_fonts(services: ServiceContainer):
+    """Bring the font catalog up to date and drop fonts loaded from removed files"""
+    font_manager = services.font_manager
+    await asyncio.to_thread(font_manager.catalog.refresh, [font_manager.catalog.user_dir])
+    font_manager.clear_cache()
+
+def _is_font(path: Path) -> bool:
+    return path.name.lower().endswith(FONT_EXTENSIONS)
+
+def _clean_directories():
+    # Clean cache directory
+    for file in settings.CACHE_DIR.glob("*"):
+        if file.is_file():
+            file.unlink()
+
+    # Clean fonts directory (except font files)
+    for file in settings.FONTS_DIR.glob("*"):
+        if file.is_file() and not _is_font(file):
+            file.unlink()
+
+def _reset_directories():
+    # Remove and recreate cache directory
+    if settings.CACHE_DIR.exists():
+        shutil.rmtree(settings.CACHE_DIR)
+    settings.CACHE_DIR.mkdir(parents=True)
+
+    # For fonts directory, remove everything except font files, in place so
+    # fonts stay available to renders running meanwhile
+    settings.FONTS_DIR.mkdir(parents=True, exist_ok=True)
+    for dir_path, dir_names, file_names in os.walk(settings.FONTS_DIR, topdown=False):
+        directory = Path(dir_path)
+        for name in file_names:
+            if not _is_font(directory / name):
+                (directory / name).unlink()
+        # Directories left without fonts go as well
+        for name in dir_names:
+            subdir = directory / name
+            if not subdir.is_symlink() and not any(subdir.iterdir()):
+                subdir.rmdir()
@@ -1,6 +1,9 @@
 from fastapi import APIRouter, HTTPException, Depends, File, UploadFile, Form
 from app.services.font_manager import FontManager
+from app.services.font_catalog import FONT_EXTENSIONS
+from app.api.deps import get_font_manager
 from app.core.config import settings
+import asyncio
 import logging
 from pathlib import Path
 import os
@@ -9,11 +12,21 @@ router = APIRouter()
 logger = logging.getLogger(__name__)
 
 @router.get("/list")
-async def list_fonts():
-    """List all available fonts"""
+async def list_fonts(
+    include_system: bool = False,
+    font_manager: FontManager = Depends(get_font_manager)
+):
+    """List available fonts from the font catalog"""
     try:
-        font_files = [f.stem for f in settings.FONTS_DIR.glob("*.ttf")]
-        return {"fonts": font_files}
+        # Only stats the fonts directory; it is rescanned if its mtime changed.
+        # A rescan reads every new font file, so it runs off the event loop
+        await asyncio.to_thread(font_manager.catalog.refresh, [settings.FONTS_DIR])
+        entries = font_manager.catalog.list_fonts(include_system=include_system)
+        font_names = sorted({entry.stem for entry in entries})
+        return {
+            "fonts": font_names,
+            "details": [entry.to_dict() for entry in entries]
+        }
     except Exception as e:
         logger.error(f"Error listing fonts: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -22,21 +35,21 @@ async def list_fonts():
 async def upload_font(
     font_file: UploadFile = File(...),
     font_name: str = Form(...),
-    font_manager: FontManager = Depends()
+    font_manager: FontManager = Depends(get_font_manager)
 ):
     """Upload a new font file"""
     try:
         # Validate font name
-        if not font_name.endswith(".ttf"):
+        if not font_name.lower().endswith(FONT_EXTENSIONS):
             font_name += ".ttf"
         
         # Save the font file
         font_path = settings.FONTS_DIR / font_name
-        with open(font_path, "wb") as f:
-            content = await font_file.read()
-            f.write(content)
+        content = await font_file.read()
+        await asyncio.to_thread(font_path.write_bytes, content)
         
-        # Clear font cache to ensure new font is loaded
+        # Index the new font and clear font cache to ensure it is loaded
+        await asyncio.to_thread(font_manager.catalog.add_file, font_path)
         font_manager.clear_cache()
         
         return {"status": "success", "message": f"Font {font_name} uploaded successfully"}
@@ -47,18 +60,19 @@ async def upload_font(
 @router.delete("/{font_name}")
 async def delete_font(
     font_name: str,
-    font_manager: FontManager = Depends()
+    font_manager: FontManager = Depends(get_font_manager)
 ):
     """Delete a font file"""
     try:
-        if not font_name.endswith(".ttf"):
+        if not font_name.lower().endswith(FONT_EXTENSIONS):
             font_name += ".ttf"
         
         font_path = settings.FONTS_DIR / font_name
         if not font_path.exists():
             raise HTTPException(status_code=404, detail="Font not found")
         
-        os.remove(font_path)
+        await asyncio.to_thread(os.remove, font_path)
+        await asyncio.to_thread(font_manager.catalog.remove_file, font_path)
         font_manager.clear_cache()
         
         return {"status": "success", "message": f"Font {font_name} deleted successfully"}
@@ -1,8 +1,22 @@
-from fastapi import APIRouter, HTTPException, Depends
-from app.models.request import GenerateRequest
+from fastapi import APIRouter, HTTPException, Depends, File, UploadFile, Form
+from fastapi.responses import StreamingResponse
+from app.models.request import GenerateRequest, BatchGenerateRequest, RenderSpec
 from app.services.image_processor import ImageProcessor
+from app.services.batch_processor import BatchProcessor, BatchItemResult
+from app.services.render_executor import RenderQueueFull
+from app.services.image_cache import ImageTooLarge, SourceImage, DOWNLOAD_CHUNK_SIZE
+from app.api.deps import get_image_processor, get_batch_processor
+from app.api.responses import check_outputs, render_response
 from app.core.config import settings
+from contextlib import aclosing
+from PIL import UnidentifiedImageError
+from pydantic import ValidationError
+import asyncio
+import hashlib
+import json
 import logging
+import zipfile
+from typing import AsyncIterator
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -10,7 +24,7 @@ logger = logging.getLogger(__name__)
 @router.post("/", response_model=dict)
 async def generate_image(
     request: GenerateRequest,
-    image_processor: ImageProcessor = Depends()
+    image_processor: ImageProcessor = Depends(get_image_processor)
 ):
     try:
         # Validate image URL
@@ -21,20 +35,181 @@ async def generate_image(
                 detail="Invalid image URL. Must start with http:// or https://"
             )
 
+        check_outputs(request)
+
         # Process the image
         result = await image_processor.process_image(request)
-        
-        return {
-            "status": "success",
-            "download_url": f"{settings.API_V1_STR}/files/{result}"
-        }
+        return render_response(result, request.delivery, request.output_format)
 
     except HTTPException as e:
         logger.error(f"HTTP error in generate_image: {str(e)}")
         raise e
+    except ImageTooLarge as e:
+        logger.warning(f"Rejected generate_image: {str(e)}")
+        raise HTTPException(status_code=413, detail=str(e))
+    except RenderQueueFull as e:
+        logger.warning(f"Rejected generate_image: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": "1"}
+        )
     except Exception as e:
         logger.error(f"Error in generate_image: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Internal server error: {str(e)}"
-        ) 
\ No newline at end of file
+        ) 
+
+@router.post("/upload")
+async def generate_from_upload(
+    image: UploadFile = File(...),
+    spec: str = Form(...),
+    image_processor: ImageProcessor = Depends(get_image_processor)
+):
+    """Render onto an uploaded image; spec is a JSON generate request without image_url"""
+    try:
+        request = RenderSpec.model_validate_json(spec)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=json.loads(e.json(include_url=False)))
+
+    check_outputs(request)
+    try:
+        data = await _read_upload(image)
+        source = SourceImage(data, hashlib.sha256(data).hexdigest())
+        result = await image_processor.process_image(request, source=source)
+        return render_response(result, request.delivery, request.output_format)
+
+    except ImageTooLarge as e:
+        logger.warning(f"Rejected generate_from_upload: {str(e)}")
+        raise HTTPException(status_code=413, detail=str(e))
+    except UnidentifiedImageError:
+        raise HTTPException(status_code=400, detail="Uploaded file is not a supported image")
+    except RenderQueueFull as e:
+        logger.warning(f"Rejected generate_from_upload: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": "1"}
+        )
+    except Exception as e:
+        logger.error(f"Error in generate_from_upload: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+async def _read_upload(upload: UploadFile) -> bytes:
+    """Read an uploaded file, stopping as soon as it exceeds MAX_IMAGE_SIZE"""
+    limit = settings.MAX_IMAGE_SIZE
+    if upload.size is not None:
+        if upload.size > limit:
+            raise ImageTooLarge(f"Uploaded image is {upload.size} bytes, the limit is {limit}")
+        # Size is known, read it in one allocation
+        return await upload.read()
+    data = bytearray()
+    while chunk := await upload.read(DOWNLOAD_CHUNK_SIZE):
+        data += chunk
+        if len(data) > limit:
+            raise ImageTooLarge(f"Uploaded image exceeds the {limit} byte limit")
+    return bytes(data)
+
+@router.post("/batch")
+async def generate_batch(
+    batch: BatchGenerateRequest,
+    batch_processor: BatchProcessor = Depends(get_batch_processor)
+):
+    """Render many images in one call, sharing downloads and fonts"""
+    if len(batch.requests) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large, at most {settings.BATCH_MAX_ITEMS} requests are allowed"
+        )
+    if any(r.outputs and len(r.outputs) > settings.MAX_OUTPUTS_PER_REQUEST for r in batch.requests):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many outputs, at most {settings.MAX_OUTPUTS_PER_REQUEST} are allowed per request"
+        )
+
+    try:
+        # Archives carry the image bytes, JSON results carry download URLs
+        delivery = "inline" if batch.response_format == "zip" else "url"
+        requests = [r.model_copy(update={"delivery": delivery}) for r in batch.requests]
+
+        if batch.response_format == "zip":
+            # Each image is sent as soon as it is rendered and then dropped
+            return StreamingResponse(
+                _stream_archive(batch_processor, requests, batch.concurrency),
+                media_type="application/zip",
+                headers={"Content-Disposition": 'attachment; filename="batch.zip"'}
+            )
+
+        results = await batch_processor.run(requests, concurrency=batch.concurrency)
+        return {
+            "status": "success",
+            "results": [_batch_item_response(item) for item in results]
+        }
+
+    except Exception as e:
+        logger.error(f"Error in generate_batch: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+def _batch_item_response(item: BatchItemResult) -> dict:
+    if item.error is not None:
+        return {"index": item.index, "status": "error", "detail": item.error}
+    return {
+        "index": item.index,
+        "status": "success",
+        **item.result.describe()
+    }
+
+class _ArchiveStream:
+    """Write-only file for ZipFile that hands out what was written so far"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+async def _stream_archive(
+    batch_processor: BatchProcessor,
+    requests: list[GenerateRequest],
+    concurrency: int | None
+) -> AsyncIterator[bytes]:
+    """Zip the rendered images as they finish; failures are listed in errors.json"""
+    stream = _ArchiveStream()
+    errors = []
+    # Images are already compressed, so store them as-is
+    with zipfile.ZipFile(stream, "w", compression=zipfile.ZIP_STORED) as archive:
+        async with aclosing(batch_processor.stream(requests, concurrency)) as items:
+            async for item in items:
+                if item.error is not None:
+                    errors.append({"index": item.index, "detail": item.error})
+                    continue
+                await asyncio.to_thread(_write_entries, archive, requests[item.index], item)
+                yield stream.take()
+        if errors:
+            errors.sort(key=lambda error: error["index"])
+            archive.writestr("errors.json", json.dumps(errors))
+    yield stream.take()
+
+def _write_entries(archive: zipfile.ZipFile, request: GenerateRequest, item: BatchItemResult):
+    if item.result.variants:
+        for number, variant in enumerate(item.result.variants):
+            output_format = request.outputs[number].format
+            archive.writestr(f"{item.index:05d}-{number}.{output_format}", variant.content)
+        return
+    archive.writestr(f"{item.index:05d}.{request.output_format}", item.result.content)
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, HTTPException, Depends
+from app.models.request import JobCreateRequest
+from app.services.job_queue import JobQueue, JobQueueFull, JobNotFound
+from app.api.deps import get_job_queue
+from app.api.responses import check_outputs
+from app.core.config import settings
+import logging
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+@router.post("/", status_code=202)
+async def create_job(
+    request: JobCreateRequest,
+    job_queue: JobQueue = Depends(get_job_queue)
+):
+    """Queue a render; the result is always delivered by URL"""
+    check_outputs(request)
+    try:
+        job = await job_queue.submit(request)
+        return {
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": f"{settings.API_V1_STR}/jobs/{job.id}"
+        }
+    except JobQueueFull as e:
+        logger.warning(f"Rejected create_job: {str(e)}")
+        raise HTTPException(
+            status_code=429,
+            detail="Too many queued jobs, please retry later",
+            headers={"Retry-After": str(settings.JOB_RETRY_AFTER)}
+        )
+    except Exception as e:
+        logger.error(f"Error in create_job: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+@router.get("/{job_id}")
+async def get_job(
+    job_id: str,
+    job_queue: JobQueue = Depends(get_job_queue)
+):
+    """Status of a job, with its download URL once it has succeeded"""
+    try:
+        job = await job_queue.get(job_id)
+        return job.describe()
+    except JobNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
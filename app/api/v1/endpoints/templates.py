@@ -0,0 +1,91 @@
+from fastapi import APIRouter, HTTPException, Depends
+from app.models.request import GenerateRequest, TemplateRenderRequest
+from app.services.template_store import TemplateStore, TemplateNotFound, TemplateValueError
+from app.services.render_executor import RenderQueueFull
+from app.services.image_cache import ImageTooLarge
+from app.api.deps import get_template_store
+from app.api.responses import check_outputs, render_response
+import logging
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+@router.post("/")
+async def create_template(
+    request: GenerateRequest,
+    template_store: TemplateStore = Depends(get_template_store)
+):
+    """Register a render template; text may contain {name} placeholders"""
+    check_outputs(request)
+    try:
+        template = await template_store.create(request)
+        return {"status": "success", **template.describe()}
+    except ImageTooLarge as e:
+        logger.warning(f"Rejected create_template: {str(e)}")
+        raise HTTPException(status_code=413, detail=str(e))
+    except RenderQueueFull as e:
+        logger.warning(f"Rejected create_template: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": "1"}
+        )
+    except Exception as e:
+        logger.error(f"Error in create_template: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+@router.get("/{template_id}")
+async def get_template(
+    template_id: str,
+    template_store: TemplateStore = Depends(get_template_store)
+):
+    """Describe a registered template"""
+    try:
+        return template_store.get(template_id).describe()
+    except TemplateNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.delete("/{template_id}")
+async def delete_template(
+    template_id: str,
+    template_store: TemplateStore = Depends(get_template_store)
+):
+    """Remove a template"""
+    try:
+        template_store.delete(template_id)
+        return {"message": f"Template {template_id} deleted successfully"}
+    except TemplateNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.post("/{template_id}/render")
+async def render_template(
+    template_id: str,
+    request: TemplateRenderRequest,
+    template_store: TemplateStore = Depends(get_template_store)
+):
+    """Render a template with the given placeholder values"""
+    try:
+        result = await template_store.render(template_id, request)
+        output_format = result.media_type.split("/")[-1]
+        return render_response(result, request.delivery, output_format)
+
+    except TemplateNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except TemplateValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RenderQueueFull as e:
+        logger.warning(f"Rejected render_template: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": "1"}
+        )
+    except Exception as e:
+        logger.error(f"Error in render_template: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import generate, fonts, admin
+from app.api.v1.endpoints import generate, fonts, admin, templates, jobs
 
 api_router = APIRouter()
 
@@ -9,6 +9,18 @@ api_router.include_router(
     tags=["generate"]
 )
 
+api_router.include_router(
+    templates.router,
+    prefix="/templates",
+    tags=["templates"]
+)
+
+api_router.include_router(
+    jobs.router,
+    prefix="/jobs",
+    tags=["jobs"]
+)
+
 api_router.include_router(
     fonts.router,
     prefix="/fonts",
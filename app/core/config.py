@@ -1,7 +1,8 @@
 from pydantic_settings import BaseSettings
 from pydantic import ConfigDict
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Literal
+import os
 
 class Settings(BaseSettings):
     # API Settings
@@ -19,22 +20,107 @@ class Settings(BaseSettings):
     OUTPUT_DIR: Path = BASE_DIR / "output"
     CACHE_DIR: Path = BASE_DIR / "cache"
     LOGS_DIR: Path = BASE_DIR / "logs"
+    DATA_DIR: Path = BASE_DIR / "data"
     
     # Database Settings
-    DB_FILE: str = "fonts.db"
+    DB_FILE: str = "fonts.db"  # Font catalog, stored in DATA_DIR
     
     # Security
     SECRET_KEY: str = "your-secret-key-here"  # Change in production
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
     # Rate Limiting
-    RATE_LIMIT_PER_MINUTE: int = 60
+    RATE_LIMIT_PER_MINUTE: int = 60  # per client IP, 0 disables
+    RATE_LIMIT_MAX_CLIENTS: int = 100_000  # token buckets kept in memory
+    # Paths under API_V1_STR that are never rate limited, such as health checks
+    RATE_LIMIT_EXEMPT_PATHS: list[str] = ["/admin/status"]
+
+    # Adaptive concurrency limit on render requests
+    CONCURRENCY_LIMIT_ENABLED: bool = True
+    CONCURRENCY_LIMIT_INITIAL: int = 32
+    CONCURRENCY_LIMIT_MIN: int = 4
+    CONCURRENCY_LIMIT_MAX: int = 512
+    # Requests slower than this multiple of the latency baseline shrink the limit
+    CONCURRENCY_LATENCY_TOLERANCE: float = 2.0
     
     # Image Processing
-    MAX_IMAGE_SIZE: int = 10 * 1024 * 1024  # 10MB
+    MAX_IMAGE_SIZE: int = 10 * 1024 * 1024  # 10MB, enforced while downloading
+    # Resample in steps no smaller than this factor when shrinking to target_size
+    DECODE_REDUCING_GAP: float = 2.0
     ALLOWED_IMAGE_FORMATS: list = ["png", "jpg", "jpeg", "webp"]
     ALLOWED_OUTPUT_FORMATS: list = ["png", "jpg", "jpeg", "webp", "pdf"]
-    
+    # Encoder preset used when a request has no encoder.profile
+    DEFAULT_ENCODER_PROFILE: Literal["fast", "balanced", "smallest"] = "balanced"
+
+    # HTTP Client (source image downloads)
+    HTTP_POOL_LIMIT: int = 100
+    HTTP_POOL_LIMIT_PER_HOST: int = 20
+    HTTP_KEEPALIVE_TIMEOUT: float = 30.0  # seconds
+    HTTP_DNS_CACHE_TTL: int = 300  # seconds
+    HTTP_CONNECT_TIMEOUT: float = 5.0  # seconds
+    HTTP_READ_TIMEOUT: float = 30.0  # seconds
+
+    # Source Image Cache
+    SOURCE_CACHE_MAX_BYTES: int = 1024 * 1024 * 1024  # 1GB
+    SOURCE_CACHE_DEFAULT_TTL: int = 300  # seconds, used when responses carry no max-age
+
+    # Decoded Image Cache
+    DECODED_IMAGE_CACHE_MAX_BYTES: int = 512 * 1024 * 1024  # 512MB of RGBA pixels
+
+    # Rendered Files (OUTPUT_DIR)
+    OUTPUT_TTL: int = 24 * 3600  # seconds a download URL stays valid after it was handed out
+    OUTPUT_MAX_BYTES: int = 5 * 1024 * 1024 * 1024  # 5GB, least recently handed out files go first
+    OUTPUT_JANITOR_INTERVAL: float = 60.0  # seconds between expiry sweeps
+    OUTPUT_JANITOR_BATCH: int = 100  # files deleted per step off the event loop
+
+    # Render Pool
+    RENDER_EXECUTOR: Literal["thread", "process"] = "thread"
+    RENDER_WORKERS: int = os.cpu_count() or 4
+    RENDER_QUEUE_SIZE: int = 64  # renders admitted beyond the busy workers
+    # Renders estimated at RENDER_HEAVY_COST_MS or more run in a separate lane
+    RENDER_HEAVY_COST_MS: float = 250.0
+    RENDER_HEAVY_WORKERS: int = max(1, (os.cpu_count() or 4) // 2)
+    RENDER_HEAVY_QUEUE_SIZE: int = 64
+    # Variants of a multi-output render are resized and encoded in parallel
+    MAX_OUTPUTS_PER_REQUEST: int = 8
+    OUTPUT_ENCODE_WORKERS: int = min(8, os.cpu_count() or 4)
+
+    # Batch Generation
+    BATCH_MAX_ITEMS: int = 1000
+    BATCH_MAX_CONCURRENCY: int = 8
+
+    # Background Jobs
+    JOB_WORKERS: int = 2
+    JOB_QUEUE_MAX_DEPTH: int = 1000  # queued jobs beyond this are rejected with 429
+    JOB_RETRY_AFTER: int = 5  # seconds, sent with 429 and waited when the render pool is full
+    JOB_DB_FILE: str = "jobs.db"  # Job store, in DATA_DIR
+    JOB_RETENTION: int = 24 * 3600  # seconds a finished job is kept after it finished
+    JOB_PRUNE_INTERVAL: float = 300.0  # seconds between deletions of expired jobs
+
+    # SVG rendering; "auto" tries simple shapes, then cairosvg, then svglib
+    SVG_RASTERIZER: Literal["auto", "simple", "cairosvg", "svglib"] = "auto"
+    SVG_CACHE_MAX_ENTRIES: int = 256
+    SVG_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # 64MB
+
+    # Text Layout Cache
+    TEXT_LAYOUT_CACHE_MAX_ENTRIES: int = 4096
+    TEXT_SPRITE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # 64MB of glyph masks
+
+    # Render Templates (held in memory)
+    TEMPLATE_MAX_COUNT: int = 100
+    TEMPLATE_CACHE_MAX_BYTES: int = 1024 * 1024 * 1024  # 1GB of decoded pixels
+
+    # Render Result Cache
+    RENDER_CACHE_MAX_BYTES: int = 256 * 1024 * 1024  # 256MB of encoded images
+    RENDER_CACHE_TTL: int = 3600  # seconds, 0 disables the cache
+
+    # Font Cache
+    FONT_CACHE_MAX_ENTRIES: int = 256
+    FONT_CACHE_MAX_BYTES: int = 256 * 1024 * 1024  # 256MB
+
+    # Admin Status
+    STATUS_RECONCILE_INTERVAL: float = 0.0  # seconds between directory walks checking the counters, 0 disables
+
     # Logging
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -3,6 +3,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from app.core.config import settings
 from app.api.v1.router import api_router
+from app.api.middleware import AdmissionMiddleware
+from app.services.container import ServiceContainer
 import logging
 import os
 from pathlib import Path
@@ -25,11 +27,16 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting up TextSnap API...")
     # Create required directories
-    for directory in [settings.FONTS_DIR, settings.OUTPUT_DIR, settings.CACHE_DIR]:
+    for directory in [settings.FONTS_DIR, settings.OUTPUT_DIR, settings.CACHE_DIR, settings.DATA_DIR]:
         os.makedirs(directory, exist_ok=True)
+    # Long-lived services shared by all requests
+    services = ServiceContainer()
+    await services.startup()
+    app.state.services = services
     yield
     # Shutdown
     logger.info("Shutting down TextSnap API...")
+    await services.shutdown()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -37,6 +44,9 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Rate and concurrency limits; added first so CORS headers still wrap rejections
+app.add_middleware(AdmissionMiddleware)
+
 # Set up CORS
 app.add_middleware(
     CORSMiddleware,
@@ -49,7 +59,8 @@ app.add_middleware(
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
-# Mount static files
+# Mount static files (generated images are served from /files)
+os.makedirs(settings.OUTPUT_DIR, exist_ok=True)
 app.mount("/files", StaticFiles(directory=settings.OUTPUT_DIR), name="files")
 
 if __name__ == "__main__":
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, HttpUrl
-from typing import List, Optional, Literal
+from pydantic import BaseModel, HttpUrl, Field, PositiveInt
+from typing import List, Optional, Literal, Dict
 
 class TextItem(BaseModel):
     text: str
@@ -15,14 +15,70 @@ class TextItem(BaseModel):
 class SVGItem(BaseModel):
     svg_data: str
     position: tuple[int, int]
-    width: Optional[int] = None
-    height: Optional[int] = None
+    # Rendered size; bounded because the rasterizers allocate it several times over
+    width: Optional[int] = Field(default=None, ge=1, le=4096)
+    height: Optional[int] = Field(default=None, ge=1, le=4096)
 
-class GenerateRequest(BaseModel):
-    image_url: HttpUrl
+class EncoderOptions(BaseModel):
+    # Preset trading encode time for size; explicit fields below override it
+    profile: Optional[Literal["fast", "balanced", "smallest"]] = None
+    # JPEG and WebP quality
+    quality: Optional[int] = Field(default=None, ge=1, le=100)
+    # PNG zlib level
+    compress_level: Optional[int] = Field(default=None, ge=0, le=9)
+    # PNG and JPEG extra encoder pass
+    optimize: Optional[bool] = None
+    progressive: Optional[bool] = None
+    # WebP effort, 0 (fast) to 6 (small)
+    webp_method: Optional[int] = Field(default=None, ge=0, le=6)
+    lossless: Optional[bool] = None
+
+class OutputSpec(BaseModel):
+    format: Literal["png", "jpg", "jpeg", "webp", "pdf"]
+    # Downscale to fit within these bounds, keeping the aspect ratio
+    max_width: Optional[int] = Field(default=None, ge=1)
+    max_height: Optional[int] = Field(default=None, ge=1)
+    encoder: Optional[EncoderOptions] = None
+
+class RenderSpec(BaseModel):
+    """Everything about a render except where the base image comes from"""
     output_format: Literal["png", "jpg", "jpeg", "webp", "pdf"]
     items: List[TextItem]
     font_family: str
+    # Shrink the source to fit (width, height) while decoding; item positions
+    # are in the coordinates of the shrunk image
+    target_size: Optional[tuple[PositiveInt, PositiveInt]] = None
     remove_background: bool = False
+    background_color: str = "#FFFFFF"
+    background_tolerance: int = Field(default=54, ge=0, le=255)
+    background_mode: Literal["global", "connected"] = "global"
     remove_watermark: bool = False
-    svg: Optional[List[SVGItem]] = None 
\ No newline at end of file
+    svg: Optional[List[SVGItem]] = None
+    # "url" saves the image and returns a download URL, "inline" returns the image bytes
+    delivery: Literal["url", "inline"] = "url"
+    # Encoder profile and options; defaults to DEFAULT_ENCODER_PROFILE
+    encoder: Optional[EncoderOptions] = None
+    # Several sizes/formats of the same composition; replaces output_format
+    outputs: Optional[List[OutputSpec]] = Field(default=None, min_length=1)
+
+class GenerateRequest(RenderSpec):
+    image_url: HttpUrl
+
+class JobCreateRequest(GenerateRequest):
+    # Receives the finished job as a JSON POST
+    webhook_url: Optional[HttpUrl] = None
+
+class BatchGenerateRequest(BaseModel):
+    requests: List[GenerateRequest] = Field(min_length=1)
+    # Maximum renders in flight for this batch, capped by BATCH_MAX_CONCURRENCY
+    concurrency: Optional[int] = Field(default=None, ge=1)
+    # "json" returns per-item results, "zip" streams an archive of the images
+    response_format: Literal["json", "zip"] = "json"
+
+
+class TemplateRenderRequest(BaseModel):
+    # Values for the {name} placeholders in the template's text items
+    values: Dict[str, str] = {}
+    # Overrides the template's output format
+    output_format: Optional[Literal["png", "jpg", "jpeg", "webp", "pdf"]] = None
+    delivery: Literal["url", "inline"] = "url"
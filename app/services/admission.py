@@ -0,0 +1,197 @@
+import math
+import time
+from collections import deque
+from app.core.config import settings
+
+class RateLimiter:
+    """
+    Per-client token buckets.
+
+    Each client may burst up to ``per_minute`` requests and then gets one
+    more every ``60 / per_minute`` seconds. Buckets are created on first use;
+    once more than ``max_clients`` exist, buckets that have refilled (idle
+    clients, indistinguishable from new ones) are dropped.
+    """
+
+    def __init__(self, per_minute: int | None = None, max_clients: int | None = None):
+        self.per_minute = settings.RATE_LIMIT_PER_MINUTE if per_minute is None else per_minute
+        self.max_clients = settings.RATE_LIMIT_MAX_CLIENTS if max_clients is None else max_clients
+        self.capacity = float(self.per_minute)
+        self.rate = self.per_minute / 60.0
+        # client -> [tokens, updated_at]
+        self._buckets: dict[str, list[float]] = {}
+        self.allowed = 0
+        self.rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.per_minute > 0
+
+    def acquire(self, client: str) -> tuple[float, float]:
+        """
+        Take a token for client.
+
+        Returns (remaining tokens, 0.0) when allowed, or (0.0, seconds until
+        the next token) when the client is over its limit.
+        """
+        now = time.monotonic()
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            if len(self._buckets) >= self.max_clients:
+                self._prune(now)
+            bucket = self._buckets[client] = [self.capacity, now]
+        else:
+            bucket[0] = min(self.capacity, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+
+        if bucket[0] >= 1.0:
+            bucket[0] -= 1.0
+            self.allowed += 1
+            return bucket[0], 0.0
+        self.rejected += 1
+        return 0.0, (1.0 - bucket[0]) / self.rate
+
+    def _prune(self, now: float):
+        refill = self.capacity / self.rate
+        self._buckets = {
+            client: bucket for client, bucket in self._buckets.items()
+            if now - bucket[1] < refill
+        }
+        if len(self._buckets) >= self.max_clients:
+            # Every client is active; forget the older half
+            items = list(self._buckets.items())
+            self._buckets = dict(items[len(items) // 2:])
+
+    def stats(self) -> dict:
+        return {
+            "per_minute": self.per_minute,
+            "clients": len(self._buckets),
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+        }
+
+class AdaptiveConcurrencyLimit:
+    """
+    Gradient limit on concurrent requests, driven by observed latency.
+
+    Latency is smoothed into a short moving average over about
+    ``short_window`` requests; the baseline is the lowest that average has
+    been over the last ``long_window`` requests. While the average stays
+    within ``tolerance`` times the baseline, the limit moves towards
+    limit + sqrt(limit) as long as it is actually in use. Once queueing
+    pushes the average past that, it moves towards limit * tolerance *
+    baseline / average, never below half the limit. Each step covers
+    ``smoothing`` of the distance. Because both sides are averages, a steady
+    mix of fast and slow renders is its own baseline rather than a stream of
+    outliers measured against the fastest one, and a baseline that is too
+    low ages out of the window. A request the server shed as overloaded cuts
+    the limit by ``backoff``, once per burst.
+
+    Callers only pass latency samples that reflect render load: cache hits
+    and client errors finish fast however busy the server is.
+    """
+
+    def __init__(
+        self,
+        initial: int | None = None,
+        min_limit: int | None = None,
+        max_limit: int | None = None,
+        tolerance: float | None = None,
+        backoff: float = 0.9,
+        smoothing: float = 0.2,
+        short_window: int = 50,
+        long_window: int = 1000
+    ):
+        self.min_limit = settings.CONCURRENCY_LIMIT_MIN if min_limit is None else min_limit
+        self.max_limit = settings.CONCURRENCY_LIMIT_MAX if max_limit is None else max_limit
+        self.limit = float(settings.CONCURRENCY_LIMIT_INITIAL if initial is None else initial)
+        self.tolerance = settings.CONCURRENCY_LATENCY_TOLERANCE if tolerance is None else tolerance
+        self.backoff = backoff
+        self.smoothing = smoothing
+        self.short_window = short_window
+        self._short_alpha = 2.0 / (short_window + 1)
+        self.short_latency: float | None = None
+        # Minimum of the short average in each of the last buckets of short_window samples
+        self._minima: deque[float] = deque(maxlen=max(1, long_window // short_window))
+        self._bucket_min = math.inf
+        self._bucket_samples = 0
+        self.samples = 0
+        self.in_flight = 0
+        self.rejected = 0
+        self.decreases = 0
+        self._last_decrease = 0.0
+
+    def try_acquire(self) -> float | None:
+        """Admit a request; returns its start time, or None to shed it"""
+        if self.in_flight >= int(self.limit):
+            self.rejected += 1
+            return None
+        self.in_flight += 1
+        return time.monotonic()
+
+    def release(self, started: float, overloaded: bool = False, sample: bool = True):
+        """
+        Record a finished request admitted at started; sample=False leaves
+        its latency out of the averages
+        """
+        now = time.monotonic()
+        self.in_flight -= 1
+        if overloaded:
+            if started >= self._last_decrease:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._last_decrease = now
+                self.decreases += 1
+            return
+        if not sample:
+            return
+
+        latency = now - started
+        self.samples += 1
+        if self.short_latency is None:
+            self.short_latency = latency
+        else:
+            self.short_latency += (latency - self.short_latency) * self._short_alpha
+        if self.samples <= self.short_window:
+            # The average still leans on its first samples
+            return
+        self._bucket_min = min(self._bucket_min, self.short_latency)
+        self._bucket_samples += 1
+        if self._bucket_samples == self.short_window:
+            self._minima.append(self._bucket_min)
+            self._bucket_min = math.inf
+            self._bucket_samples = 0
+        if not self._minima:
+            return
+
+        gradient = max(0.5, min(1.0, self.tolerance * self.baseline / self.short_latency))
+        if gradient < 1.0:
+            target = self.limit * gradient
+            self.decreases += 1
+        elif self.in_flight * 2 >= self.limit:
+            target = self.limit + math.sqrt(self.limit)
+        else:
+            return
+        limit = self.limit + (target - self.limit) * self.smoothing
+        self.limit = max(self.min_limit, min(self.max_limit, limit))
+
+    @property
+    def baseline(self) -> float | None:
+        """Lowest short average latency over the last long_window samples"""
+        if not self._minima:
+            return None
+        return min(min(self._minima), self._bucket_min)
+
+    def stats(self) -> dict:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "latency_ms": {
+                "short": round(self.short_latency * 1000, 3) if self.short_latency is not None else None,
+                "baseline": round(self.baseline * 1000, 3) if self.baseline is not None else None,
+            },
+            "samples": self.samples,
+            "rejected": self.rejected,
+            "decreases": self.decreases,
+        }
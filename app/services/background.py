@@ -0,0 +1,95 @@
+import numpy as np
+from PIL import Image, ImageChops
+
+# Pixels whose channels are all within this distance of the key color are
+# cleared; 54 matches the historical "every channel > 200" rule for white.
+DEFAULT_TOLERANCE = 54
+
+def remove_background(
+    image: Image.Image,
+    key_color: tuple[int, int, int] = (255, 255, 255),
+    tolerance: int = DEFAULT_TOLERANCE,
+    mode: str = "global"
+) -> Image.Image:
+    """
+    Make pixels close to key_color transparent.
+
+    In "global" mode every matching pixel is cleared. In "connected" mode
+    only matching regions that touch the image border are cleared, so
+    light areas inside the subject are kept. RGBA images are modified in
+    place.
+    """
+    if image.mode != "RGBA":
+        image = image.convert("RGBA")
+    mask = key_color_mask(image, key_color, tolerance)
+    if mode == "connected":
+        connected = border_connected(np.asarray(mask) > 0)
+        mask = Image.fromarray(connected.astype(np.uint8) * 255, "L")
+    elif mode != "global":
+        raise ValueError(f"Unknown background removal mode: {mode}")
+
+    image.paste((*key_color, 0), mask=mask)
+    return image
+
+def key_color_mask(image: Image.Image, key_color: tuple[int, int, int], tolerance: int) -> Image.Image:
+    """
+    Mask ("L", 0 or 255) of pixels whose RGB channels all lie within
+    tolerance of key_color, computed with per-band lookup tables.
+    """
+    mask = None
+    for band, key in zip(image.split()[:3], key_color):
+        lut = [255 if abs(value - key) <= tolerance else 0 for value in range(256)]
+        band_mask = band.point(lut)
+        mask = band_mask if mask is None else ImageChops.darker(mask, band_mask)
+    return mask
+
+def border_connected(mask: np.ndarray) -> np.ndarray:
+    """
+    Keep only the parts of mask that are 4-connected to the image border.
+
+    Connected-component labelling over horizontal runs: runs in adjacent
+    rows that overlap are joined, and so are runs touching the border and a
+    virtual run 0. The joins are resolved with a union-find done in whole
+    array operations (hook the larger root onto the smaller, then compress
+    paths), which needs O(log runs) rounds whatever the shape of the mask.
+    """
+    mask = np.ascontiguousarray(mask, dtype=bool)
+    starts = mask.copy()
+    starts[:, 1:] &= ~mask[:, :-1]
+    # Label runs 1..n in row-major order; 0 marks pixels outside the mask
+    run_ids = (np.cumsum(starts.ravel(), dtype=np.int64) * mask.ravel()).reshape(mask.shape)
+    run_count = int(starts.sum())
+    if run_count == 0:
+        return np.zeros_like(mask)
+
+    # One join per stretch where a run overlaps a run in the next row
+    overlap = mask[:-1] & mask[1:]
+    first = overlap.copy()
+    first[:, 1:] &= ~overlap[:, :-1]
+    border = np.zeros_like(mask)
+    border[[0, -1], :] = mask[[0, -1], :]
+    border[:, [0, -1]] |= mask[:, [0, -1]]
+    seeds = np.unique(run_ids[border])
+    left = np.concatenate([run_ids[:-1][first], seeds])
+    right = np.concatenate([run_ids[1:][first], np.zeros_like(seeds)])
+
+    roots = np.arange(run_count + 1)
+    while True:
+        left_root, right_root = roots[left], roots[right]
+        pending = left_root != right_root
+        if not pending.any():
+            break
+        # Joined runs stay joined, so only pending joins are kept
+        left, right = left[pending], right[pending]
+        left_root, right_root = left_root[pending], right_root[pending]
+        np.minimum.at(roots, np.maximum(left_root, right_root), np.minimum(left_root, right_root))
+        while True:
+            compressed = roots[roots]
+            if np.array_equal(compressed, roots):
+                break
+            roots = compressed
+
+    # Run 0 is the smallest label, so it is the root of everything it reached
+    reached = roots == 0
+    reached[0] = False
+    return reached[run_ids]
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator
+from app.core.config import settings
+from app.models.request import GenerateRequest
+from app.services.image_cache import SourceImage
+from app.services.image_processor import ImageProcessor, RenderResult
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class BatchItemResult:
+    index: int
+    result: RenderResult | None = None
+    error: str | None = None
+
+class BatchProcessor:
+    """
+    Renders many GenerateRequests with shared setup.
+
+    Every distinct font is loaded once before rendering starts. Requests
+    are rendered grouped by image_url with bounded parallelism: a source is
+    downloaded when its group starts and released after the group's last
+    render, so only the sources of the groups in progress are held at once.
+    """
+
+    def __init__(self, image_processor: ImageProcessor):
+        self.image_processor = image_processor
+
+    async def run(
+        self,
+        requests: list[GenerateRequest],
+        concurrency: int | None = None
+    ) -> list[BatchItemResult]:
+        """Render every request and return the results in request order"""
+        results = [item async for item in self.stream(requests, concurrency)]
+        return sorted(results, key=lambda item: item.index)
+
+    async def stream(
+        self,
+        requests: list[GenerateRequest],
+        concurrency: int | None = None
+    ) -> AsyncIterator[BatchItemResult]:
+        """Render every request, yielding results as they finish"""
+        limit = min(concurrency or settings.BATCH_MAX_CONCURRENCY, settings.BATCH_MAX_CONCURRENCY)
+        await self._load_fonts(requests)
+
+        groups: dict[str, list[int]] = {}
+        for index, request in enumerate(requests):
+            groups.setdefault(str(request.image_url), []).append(index)
+        pending = deque((url, index) for url, indices in groups.items() for index in indices)
+        remaining = {url: len(indices) for url, indices in groups.items()}
+        sources: dict[str, asyncio.Task] = {}
+        # Workers wait while the consumer catches up, so finished images do not pile up
+        finished: asyncio.Queue[BatchItemResult] = asyncio.Queue(maxsize=limit)
+
+        async def render(url: str, index: int) -> BatchItemResult:
+            if url not in sources:
+                sources[url] = asyncio.ensure_future(self._fetch(url))
+            try:
+                source = await sources[url]
+            except Exception as e:
+                return BatchItemResult(index, error=str(e))
+            try:
+                result = await self.image_processor.process_image(requests[index], source=source)
+                return BatchItemResult(index, result=result)
+            except Exception as e:
+                return BatchItemResult(index, error=str(e))
+
+        async def worker():
+            while pending:
+                url, index = pending.popleft()
+                try:
+                    item = await render(url, index)
+                finally:
+                    remaining[url] -= 1
+                    if remaining[url] == 0:
+                        # The group's last render is done; let the source go
+                        del sources[url]
+                await finished.put(item)
+
+        workers = [asyncio.create_task(worker()) for _ in range(min(limit, len(requests)))]
+        try:
+            for _ in range(len(requests)):
+                yield await finished.get()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _fetch(self, url: str) -> SourceImage:
+        try:
+            return await self.image_processor.image_cache.fetch(url)
+        except Exception as e:
+            logger.error(f"Error downloading {url} for batch: {str(e)}")
+            raise
+
+    async def _load_fonts(self, requests: list[GenerateRequest]):
+        faces = {
+            (request.font_family, item.font_weight, item.font_style, item.variant, item.font_size)
+            for request in requests
+            for item in request.items
+        }
+        for face in faces:
+            await self.image_processor.font_manager.get_font(*face)
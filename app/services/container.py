@@ -0,0 +1,78 @@
+import asyncio
+import logging
+from app.services.font_manager import FontManager
+from app.services.svg_processor import SVGProcessor
+from app.services.image_processor import ImageProcessor
+from app.services.http_client import HTTPClient
+from app.services.image_cache import SourceImageCache
+from app.services.render_executor import RenderExecutor
+from app.services.render_cache import RenderCache
+from app.services.output_store import OutputStore
+from app.services.batch_processor import BatchProcessor
+from app.services.template_store import TemplateStore
+from app.services.job_queue import JobQueue
+from app.services.admission import RateLimiter, AdaptiveConcurrencyLimit
+from app.services.storage_usage import StorageUsage
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class ServiceContainer:
+    """
+    Application-scoped service instances.
+
+    Created once in the application lifespan and shared by every request so
+    that caches held by the services survive across requests.
+    """
+
+    def __init__(self):
+        self.font_manager = FontManager()
+        self.svg_processor = SVGProcessor()
+        self.http_client = HTTPClient()
+        self.image_cache = SourceImageCache(self.http_client)
+        self.render_executor = RenderExecutor()
+        self.render_cache = RenderCache()
+        self.output_store = OutputStore()
+        # Uploading or deleting a font invalidates cached renders
+        self.font_manager.add_invalidation_listener(self.render_cache.clear)
+        self.image_processor = ImageProcessor(
+            font_manager=self.font_manager,
+            svg_processor=self.svg_processor,
+            http_client=self.http_client,
+            image_cache=self.image_cache,
+            render_executor=self.render_executor,
+            render_cache=self.render_cache,
+            output_store=self.output_store
+        )
+        self.font_manager.add_invalidation_listener(self.image_processor.layout_cache.clear)
+        self.font_manager.add_invalidation_listener(self.image_processor.sprite_cache.clear)
+        self.batch_processor = BatchProcessor(self.image_processor)
+        self.template_store = TemplateStore(self.image_processor)
+        self.job_queue = JobQueue(self.image_processor, self.http_client, output_store=self.output_store)
+        self.storage_usage = StorageUsage(self.output_store, self.image_cache, self.font_manager.catalog)
+        # Consulted by AdmissionMiddleware on every API request
+        self.rate_limiter = RateLimiter()
+        self.concurrency_limit = AdaptiveConcurrencyLimit() if settings.CONCURRENCY_LIMIT_ENABLED else None
+
+    async def startup(self):
+        """Initialize long-lived resources"""
+        # Scanning font directories touches the filesystem, keep it off the loop
+        await asyncio.to_thread(self.font_manager.catalog.build)
+        await asyncio.to_thread(self.image_cache.load)
+        await asyncio.to_thread(self.output_store.load)
+        await self.output_store.start()
+        await self.storage_usage.start()
+        await self.http_client.start()
+        await self.job_queue.start()
+        logger.info("Services initialized")
+
+    async def shutdown(self):
+        """Release long-lived resources"""
+        await self.job_queue.stop()
+        await self.output_store.stop()
+        await self.storage_usage.stop()
+        await self.http_client.close()
+        await asyncio.to_thread(self.render_executor.shutdown)
+        await asyncio.to_thread(self.image_processor.shutdown)
+        self.font_manager.clear_cache()
+        logger.info("Services shut down")
@@ -0,0 +1,60 @@
+from PIL import Image
+from app.core.config import settings
+from app.models.request import EncoderOptions
+
+# Pillow save() options per profile and format. "balanced" is Pillow's
+# defaults; "fast" trades size for encode time, "smallest" the reverse.
+ENCODER_PROFILES: dict[str, dict[str, dict]] = {
+    "fast": {
+        "png": {"compress_level": 1},
+        "jpeg": {"quality": 85, "optimize": False, "progressive": False},
+        "webp": {"quality": 80, "method": 0},
+        "pdf": {},
+    },
+    "balanced": {
+        "png": {"compress_level": 6},
+        "jpeg": {"quality": 75},
+        "webp": {"quality": 80, "method": 4},
+        "pdf": {},
+    },
+    "smallest": {
+        "png": {"optimize": True},
+        "jpeg": {"quality": 75, "optimize": True, "progressive": True},
+        "webp": {"quality": 75, "method": 6},
+        "pdf": {},
+    },
+}
+
+# Explicit EncoderOptions fields and the save() option each maps to per format
+OPTION_PARAMS: dict[str, dict[str, str]] = {
+    "png": {"compress_level": "compress_level", "optimize": "optimize"},
+    "jpeg": {"quality": "quality", "optimize": "optimize", "progressive": "progressive"},
+    "webp": {"quality": "quality", "webp_method": "method", "lossless": "lossless"},
+    "pdf": {},
+}
+
+def pillow_format(output_format: str) -> str:
+    output_format = output_format.lower()
+    return "jpeg" if output_format == "jpg" else output_format
+
+def encoder_params(output_format: str, options: EncoderOptions | None = None) -> dict:
+    """Resolve save() options: the profile's presets, then explicit overrides"""
+    fmt = pillow_format(output_format)
+    profile = (options.profile if options and options.profile else None) or settings.DEFAULT_ENCODER_PROFILE
+    params = dict(ENCODER_PROFILES[profile].get(fmt, {}))
+    if options is not None:
+        for field, param in OPTION_PARAMS.get(fmt, {}).items():
+            value = getattr(options, field)
+            if value is not None:
+                params[param] = value
+    # PNG optimize ignores compress_level; an explicit level wins over the preset
+    if fmt == "png" and options is not None and options.compress_level is not None and options.optimize is None:
+        params.pop("optimize", None)
+    return params
+
+def encode(image: Image.Image, output_format: str, fp, options: EncoderOptions | None = None):
+    """Encode image to a path or file object"""
+    fmt = pillow_format(output_format)
+    if fmt in ("jpeg", "pdf"):
+        image = image.convert("RGB")
+    image.save(fp, format=fmt.upper(), **encoder_params(fmt, options))
@@ -0,0 +1,388 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from PIL import ImageFont
+
+logger = logging.getLogger(__name__)
+
+FONT_EXTENSIONS = (".ttf", ".otf", ".ttc")
+
+# Upper bound on faces read from a single font collection
+MAX_COLLECTION_FACES = 64
+
+# Canonical weight names, ordered from lightest to heaviest
+WEIGHTS = ["thin", "extralight", "light", "normal", "medium", "semibold", "bold", "extrabold", "black"]
+
+_WEIGHT_ALIASES = [
+    ("extralight", "extralight"), ("ultralight", "extralight"),
+    ("semibold", "semibold"), ("demibold", "semibold"),
+    ("extrabold", "extrabold"), ("ultrabold", "extrabold"),
+    ("black", "black"), ("heavy", "black"),
+    ("thin", "thin"), ("hairline", "thin"),
+    ("light", "light"),
+    ("medium", "medium"),
+    ("bold", "bold"),
+]
+
+def normalize_weight(value: str) -> str:
+    """Map a CSS-like weight ("bold", "700", "SemiBold") to a canonical weight name"""
+    value = str(value).strip().lower().replace(" ", "").replace("-", "").replace("_", "")
+    if value.isdigit():
+        index = min(max(int(value) // 100, 1), 9) - 1
+        return WEIGHTS[index]
+    for alias, weight in _WEIGHT_ALIASES:
+        if alias in value:
+            return weight
+    return "normal"
+
+def normalize_style(value: str) -> str:
+    """Map a style name to either "italic" or "normal" """
+    value = str(value).lower()
+    return "italic" if "italic" in value or "oblique" in value else "normal"
+
+@dataclass
+class FontEntry:
+    path: str
+    face_index: int
+    family: str
+    weight: str
+    style: str
+    style_name: str
+    stem: str
+    size: int
+    mtime_ns: int
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+@dataclass
+class _DirState:
+    mtime_ns: int
+    subdirs: list
+    fonts: dict  # file name -> list[FontEntry]
+
+class FontCatalog:
+    """
+    Index of the font files available to the renderer.
+
+    The catalog is built from the user fonts directory and the system font
+    directories, refreshed incrementally using directory mtimes and
+    optionally persisted to SQLite so warm restarts skip the scan.
+    Lookups by family/weight/style or file stem are plain dict hits.
+    """
+
+    def __init__(self, user_dir: Path, system_dirs: list[Path], db_path: Path | None = None):
+        self.user_dir = Path(user_dir)
+        self.system_dirs = [Path(d) for d in system_dirs]
+        self.db_path = Path(db_path) if db_path else None
+        self._dirs: dict[str, _DirState] = {}
+        # Directories changed or removed since the catalog was last persisted
+        self._dirty: set[str] = set()
+        self._lock = threading.RLock()
+        self._by_style: dict[tuple, FontEntry] = {}
+        self._by_family: dict[str, list[FontEntry]] = {}
+        self._by_stem: dict[str, FontEntry] = {}
+        self._built = False
+        # Font files under user_dir, kept current by every index rebuild
+        self.user_files = 0
+        self.user_bytes = 0
+
+    @property
+    def roots(self) -> list[Path]:
+        return [*self.system_dirs, self.user_dir]
+
+    def build(self):
+        """Load the persisted catalog, then bring it up to date with the filesystem"""
+        with self._lock:
+            if self.db_path:
+                self._load()
+            self.refresh()
+            self._built = True
+
+    def ensure_built(self):
+        if not self._built:
+            self.build()
+
+    def refresh(self, roots: list[Path] | None = None) -> bool:
+        """
+        Rescan directories whose mtime changed since the last scan.
+
+        Unchanged directories cost a single stat() call.
+        Returns True if the catalog changed.
+        """
+        with self._lock:
+            changed = False
+            for root in roots or self.roots:
+                changed |= self._scan_root(Path(root))
+            if changed:
+                self._rebuild_index()
+                self._save()
+            return changed
+
+    def add_file(self, path: Path):
+        """Register (or re-read) a single font file, e.g. after an upload"""
+        path = Path(path)
+        with self._lock:
+            state = self._dirs.get(str(path.parent))
+            if state is None:
+                self.refresh([path.parent])
+                return
+            state.fonts[path.name] = self._read_font(path)
+            self._dirty.add(str(path.parent))
+            self._rebuild_index()
+            self._save()
+
+    def remove_file(self, path: Path):
+        """Forget a single font file, e.g. after a delete"""
+        path = Path(path)
+        with self._lock:
+            state = self._dirs.get(str(path.parent))
+            if state is None or state.fonts.pop(path.name, None) is None:
+                return
+            self._dirty.add(str(path.parent))
+            self._rebuild_index()
+            self._save()
+
+    def lookup(
+        self,
+        family: str,
+        weight: str = "normal",
+        style: str = "normal"
+    ) -> FontEntry | None:
+        """
+        Find the best matching face.
+
+        Tries an exact family/weight/style match, then a file-name match,
+        then the closest weight of the family in the requested style.
+        """
+        self.ensure_built()
+        key = family.lower()
+        weight = normalize_weight(weight)
+        style = normalize_style(style)
+
+        entry = self._by_style.get((key, weight, style))
+        if entry is not None:
+            return entry
+
+        entry = self._by_stem.get(key)
+        if entry is not None:
+            return entry
+
+        candidates = self._by_family.get(key)
+        if not candidates:
+            return None
+        same_style = [c for c in candidates if c.style == style] or candidates
+        target = WEIGHTS.index(weight)
+        return min(same_style, key=lambda c: abs(WEIGHTS.index(c.weight) - target))
+
+    def list_fonts(self, include_system: bool = False) -> list[FontEntry]:
+        """Return catalog entries, user fonts only unless include_system is set"""
+        with self._lock:
+            user_root = str(self.user_dir)
+            entries = []
+            for dir_path, state in self._dirs.items():
+                is_user = dir_path == user_root or dir_path.startswith(user_root + os.sep)
+                if not include_system and not is_user:
+                    continue
+                for faces in state.fonts.values():
+                    entries.extend(faces)
+            return sorted(entries, key=lambda e: (e.family.lower(), e.path, e.face_index))
+
+    def _scan_root(self, root: Path) -> bool:
+        root_str = str(root)
+        changed = False
+        seen = set()
+        stack = [root_str]
+        while stack:
+            dir_path = stack.pop()
+            mtime_ns = self._mtime_ns(Path(dir_path))
+            if mtime_ns is None:
+                continue
+            seen.add(dir_path)
+            state = self._dirs.get(dir_path)
+            if state is not None and state.mtime_ns == mtime_ns:
+                stack.extend(state.subdirs)
+                continue
+
+            changed = True
+            state = self._scan_dir(dir_path, mtime_ns, state)
+            self._dirs[dir_path] = state
+            self._dirty.add(dir_path)
+            stack.extend(state.subdirs)
+
+        # Drop directories that disappeared below this root
+        for dir_path in list(self._dirs):
+            under_root = dir_path == root_str or dir_path.startswith(root_str + os.sep)
+            if under_root and dir_path not in seen:
+                del self._dirs[dir_path]
+                self._dirty.add(dir_path)
+                changed = True
+        return changed
+
+    def _scan_dir(self, dir_path: str, mtime_ns: int, previous: _DirState | None) -> _DirState:
+        subdirs = []
+        fonts = {}
+        try:
+            with os.scandir(dir_path) as it:
+                for item in it:
+                    if item.is_dir(follow_symlinks=False):
+                        subdirs.append(item.path)
+                    elif item.name.lower().endswith(FONT_EXTENSIONS):
+                        known = previous.fonts.get(item.name) if previous else None
+                        stat = item.stat()
+                        if known and known[0].size == stat.st_size and known[0].mtime_ns == stat.st_mtime_ns:
+                            fonts[item.name] = known
+                        else:
+                            fonts[item.name] = self._read_font(Path(item.path))
+        except OSError as e:
+            logger.warning(f"Error scanning font directory {dir_path}: {str(e)}")
+        return _DirState(mtime_ns=mtime_ns, subdirs=subdirs, fonts=fonts)
+
+    def _read_font(self, path: Path) -> list[FontEntry]:
+        """Read family/style metadata of every face in a font file"""
+        stat = path.stat()
+        entries = []
+        face_count = MAX_COLLECTION_FACES if path.suffix.lower() == ".ttc" else 1
+        for index in range(face_count):
+            try:
+                family, style_name = ImageFont.truetype(str(path), 12, index=index).getname()
+            except Exception:
+                break
+            entries.append(FontEntry(
+                path=str(path),
+                face_index=index,
+                family=family or path.stem,
+                weight=normalize_weight(style_name or ""),
+                style=normalize_style(style_name or ""),
+                style_name=style_name or "",
+                stem=path.stem,
+                size=stat.st_size,
+                mtime_ns=stat.st_mtime_ns
+            ))
+
+        if not entries:
+            # Keep unreadable files listed under their file name
+            suffix = path.stem.rsplit("-", 1)[-1] if "-" in path.stem else ""
+            entries.append(FontEntry(
+                path=str(path),
+                face_index=0,
+                family=path.stem,
+                weight=normalize_weight(suffix),
+                style=normalize_style(suffix),
+                style_name=suffix,
+                stem=path.stem,
+                size=stat.st_size,
+                mtime_ns=stat.st_mtime_ns
+            ))
+        return entries
+
+    def _rebuild_index(self):
+        by_style = {}
+        by_family = {}
+        by_stem = {}
+        user_files = user_bytes = 0
+        user_root = str(self.user_dir)
+        # User fonts are indexed last so they take precedence over system fonts
+        ordered = sorted(self._dirs.items(), key=lambda item: item[0] == user_root or item[0].startswith(user_root + os.sep))
+        for dir_path, state in ordered:
+            is_user = dir_path == user_root or dir_path.startswith(user_root + os.sep)
+            for faces in state.fonts.values():
+                if is_user and faces:
+                    user_files += 1
+                    user_bytes += faces[0].size
+                for entry in faces:
+                    family = entry.family.lower()
+                    by_style[(family, entry.weight, entry.style)] = entry
+                    by_family.setdefault(family, []).append(entry)
+                    if entry.face_index == 0:
+                        by_stem[entry.stem.lower()] = entry
+        self._by_style = by_style
+        self._by_family = by_family
+        self._by_stem = by_stem
+        self.user_files = user_files
+        self.user_bytes = user_bytes
+
+    @staticmethod
+    def _mtime_ns(path: Path) -> int | None:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _connect(self) -> sqlite3.Connection:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS font_dirs ("
+            "path TEXT PRIMARY KEY, mtime_ns INTEGER, subdirs TEXT)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS font_faces ("
+            "path TEXT, face_index INTEGER, dir TEXT, family TEXT, weight TEXT, "
+            "style TEXT, style_name TEXT, stem TEXT, size INTEGER, mtime_ns INTEGER, "
+            "PRIMARY KEY (path, face_index))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS font_faces_dir ON font_faces (dir)")
+        return conn
+
+    def _load(self):
+        try:
+            conn = self._connect()
+            try:
+                dirs = {
+                    path: _DirState(mtime_ns=mtime_ns, subdirs=json.loads(subdirs), fonts={})
+                    for path, mtime_ns, subdirs in conn.execute("SELECT path, mtime_ns, subdirs FROM font_dirs")
+                }
+                rows = conn.execute(
+                    "SELECT path, face_index, dir, family, weight, style, style_name, stem, size, mtime_ns "
+                    "FROM font_faces ORDER BY path, face_index"
+                )
+                for path, face_index, dir_path, family, weight, style, style_name, stem, size, mtime_ns in rows:
+                    state = dirs.get(dir_path)
+                    if state is None:
+                        continue
+                    state.fonts.setdefault(Path(path).name, []).append(FontEntry(
+                        path, face_index, family, weight, style, style_name, stem, size, mtime_ns
+                    ))
+            finally:
+                conn.close()
+            self._dirs = dirs
+            self._rebuild_index()
+            logger.info(f"Loaded font catalog with {len(self._by_family)} families from {self.db_path}")
+        except sqlite3.Error as e:
+            logger.warning(f"Could not load font catalog from {self.db_path}: {str(e)}")
+
+    def _save(self):
+        """Persist the directories changed since the last save; the rest of the rows stay as they are"""
+        if not self.db_path or not self._dirty:
+            return
+        dirty = [(path, self._dirs.get(path)) for path in sorted(self._dirty)]
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.executemany("DELETE FROM font_dirs WHERE path = ?", [(path,) for path, _ in dirty])
+                    conn.executemany("DELETE FROM font_faces WHERE dir = ?", [(path,) for path, _ in dirty])
+                    conn.executemany(
+                        "INSERT INTO font_dirs VALUES (?, ?, ?)",
+                        [(path, state.mtime_ns, json.dumps(state.subdirs)) for path, state in dirty if state is not None]
+                    )
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO font_faces VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        [
+                            (e.path, e.face_index, dir_path, e.family, e.weight, e.style,
+                             e.style_name, e.stem, e.size, e.mtime_ns)
+                            for dir_path, state in dirty if state is not None
+                            for faces in state.fonts.values()
+                            for e in faces
+                        ]
+                    )
+            finally:
+                conn.close()
+            self._dirty.clear()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not persist font catalog to {self.db_path}: {str(e)}")
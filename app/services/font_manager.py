@@ -3,15 +3,32 @@ from pathlib import Path
 from PIL import ImageFont
 import logging
 from app.core.config import settings
+from app.services.lru_cache import LRUCache
+from app.services.font_catalog import FontCatalog, FontEntry, normalize_weight, normalize_style
 import platform
 
 logger = logging.getLogger(__name__)
 
+# Rough per-instance overhead of a FreeTypeFont on top of the font file itself
+FONT_OVERHEAD_BYTES = 64 * 1024
+
 class FontManager:
     def __init__(self):
-        self.font_cache = {}
+        self.font_cache = LRUCache(
+            max_entries=settings.FONT_CACHE_MAX_ENTRIES,
+            max_bytes=settings.FONT_CACHE_MAX_BYTES
+        )
+        # Callbacks run whenever the available fonts change
+        self._invalidation_listeners = []
+        # Incremented on every invalidation, lets holders of fonts detect changes
+        self.generation = 0
         self._ensure_fonts_directory()
         self._init_system_fonts()
+        self.catalog = FontCatalog(
+            settings.FONTS_DIR,
+            self.system_fonts_dirs,
+            db_path=settings.DATA_DIR / settings.DB_FILE
+        )
 
     def _ensure_fonts_directory(self):
         """Ensure the fonts directory exists"""
@@ -36,23 +53,14 @@ class FontManager:
         else:
             self.system_fonts_dirs = [self.system_fonts_dir]
 
-    def _find_font_in_dirs(self, font_name: str, dirs: list[Path]) -> Path | None:
-        """Search for a font in the given directories"""
-        for dir_path in dirs:
-            if not dir_path.exists():
-                continue
-                
-            # Try exact match first
-            font_path = dir_path / f"{font_name}.ttf"
-            if font_path.exists():
-                return font_path
-                
-            # Try case-insensitive search
-            for file in dir_path.glob("*.ttf"):
-                if file.stem.lower() == font_name.lower():
-                    return file
-                    
-        return None
+    def resolve(
+        self,
+        font_family: str,
+        font_weight: str = "normal",
+        font_style: str = "normal"
+    ) -> FontEntry | None:
+        """Return the catalog entry that best matches the requested face"""
+        return self.catalog.lookup(font_family, font_weight, font_style)
 
     async def get_font(
         self,
@@ -66,26 +74,32 @@ class FontManager:
         Get a font with the specified properties.
         If the font is not found, falls back to a default system font.
         """
-        cache_key = f"{font_family}_{font_weight}_{font_style}_{variant}_{font_size}"
+        cache_key = (
+            font_family.lower(),
+            normalize_weight(font_weight),
+            normalize_style(font_style),
+            variant,
+            font_size
+        )
         
-        if cache_key in self.font_cache:
-            return self.font_cache[cache_key]
+        font = self.font_cache.get(cache_key)
+        if font is not None:
+            return font
 
         try:
-            # Try to load the font from the fonts directory
-            font_path = settings.FONTS_DIR / f"{font_family}.ttf"
-            if not font_path.exists():
-                # Try system fonts
-                font_path = self._find_font_in_dirs(font_family, self.system_fonts_dirs)
+            # Fonts directory entries take precedence over system fonts
+            entry = self.resolve(font_family, font_weight, font_style)
             
-            if font_path and font_path.exists():
-                font = ImageFont.truetype(str(font_path), font_size)
+            if entry is not None:
+                font = ImageFont.truetype(entry.path, font_size, index=entry.face_index)
+                font_bytes = entry.size
             else:
                 # Fall back to default system font
                 font = ImageFont.load_default()
+                font_bytes = 0
                 logger.warning(f"Font {font_family} not found, using default font")
 
-            self.font_cache[cache_key] = font
+            self.font_cache.put(cache_key, font, size=font_bytes + FONT_OVERHEAD_BYTES)
             return font
 
         except Exception as e:
@@ -93,6 +107,18 @@ class FontManager:
             # Fall back to default font on error
             return ImageFont.load_default()
 
+    def add_invalidation_listener(self, callback):
+        """Register a callback to run when fonts are added or removed"""
+        self._invalidation_listeners.append(callback)
+
     def clear_cache(self):
-        """Clear the font cache"""
-        self.font_cache.clear() 
\ No newline at end of file
+        """Clear the font cache and every cache derived from fonts"""
+        self.font_cache.clear()
+        self.generation += 1
+        for callback in self._invalidation_listeners:
+            callback()
+
+    def cache_stats(self) -> dict:
+        """Return font cache occupancy and hit/miss/eviction counters"""
+        return self.font_cache.stats()
+ 
\ No newline at end of file
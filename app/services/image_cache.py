@@ -0,0 +1,305 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from app.core.config import settings
+from app.services.http_client import HTTPClient
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from the network per iteration while streaming a download
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+class ImageTooLarge(ValueError):
+    """Raised when a source image exceeds MAX_IMAGE_SIZE"""
+
+@dataclass
+class SourceImage:
+    data: bytes
+    content_hash: str
+
+@dataclass
+class CacheEntry:
+    url: str
+    content_hash: str
+    size: int
+    etag: str | None
+    last_modified: str | None
+    expires_at: float
+    last_access: float
+
+def parse_cache_control(header: str | None) -> dict:
+    """Parse a Cache-Control header into a dict of lower-cased directives"""
+    directives = {}
+    if not header:
+        return directives
+    for part in header.split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"') if value else True
+    return directives
+
+class SourceImageCache:
+    """
+    Disk cache of downloaded source images.
+
+    Blobs are stored content-addressed under CACHE_DIR and indexed in memory
+    by URL together with their HTTP validators. Fresh entries are served
+    without touching the network, stale ones are revalidated with a
+    conditional GET. Total blob size is kept under a byte quota by evicting
+    the least recently used URLs.
+    """
+
+    def __init__(
+        self,
+        http_client: HTTPClient,
+        cache_dir: Path | None = None,
+        max_bytes: int | None = None,
+        max_image_size: int | None = None
+    ):
+        self.http_client = http_client
+        self.cache_dir = Path(cache_dir or settings.CACHE_DIR / "images")
+        self.max_bytes = settings.SOURCE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.max_image_size = settings.MAX_IMAGE_SIZE if max_image_size is None else max_image_size
+        self._index: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._blob_refs: dict[str, int] = {}
+        # Downloads in progress, shared by concurrent requests for the same URL
+        self._inflight: dict[str, asyncio.Task] = {}
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+
+    @property
+    def blobs_dir(self) -> Path:
+        return self.cache_dir / "blobs"
+
+    @property
+    def index_dir(self) -> Path:
+        return self.cache_dir / "index"
+
+    def load(self):
+        """Rebuild the in-memory index from the entries persisted on disk"""
+        self.blobs_dir.mkdir(parents=True, exist_ok=True)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        entries = []
+        for index_file in self.index_dir.glob("*.json"):
+            try:
+                entry = CacheEntry(**json.loads(index_file.read_text()))
+            except (OSError, ValueError, TypeError):
+                index_file.unlink(missing_ok=True)
+                continue
+            if (self.blobs_dir / entry.content_hash).exists():
+                entries.append(entry)
+            else:
+                index_file.unlink(missing_ok=True)
+
+        for entry in sorted(entries, key=lambda e: e.last_access):
+            self._add(entry)
+        self._unlink(self._evict())
+        logger.info(f"Loaded {len(self._index)} cached source images ({self.current_bytes} bytes)")
+
+    async def fetch(self, url: str) -> SourceImage:
+        """Return the image at url, from the cache when possible"""
+        task = self._inflight.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(url))
+            self._inflight[url] = task
+            task.add_done_callback(lambda _: self._inflight.pop(url, None))
+        # Shielded so that one cancelled caller does not abort the others
+        return await asyncio.shield(task)
+
+    async def _fetch(self, url: str) -> SourceImage:
+        entry = self._index.get(url)
+        now = time.time()
+
+        if entry is not None and now < entry.expires_at:
+            data = await self._read_blob(entry)
+            if data is not None:
+                self.hits += 1
+                self._touch(entry, now)
+                return SourceImage(data, entry.content_hash)
+            entry = None
+
+        if entry is not None:
+            headers = {}
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+            async with self.http_client.get(url, headers=headers) as response:
+                if response.status != 304:
+                    return await self._download(url, response, now)
+                data = await self._read_blob(entry)
+                if data is not None:
+                    self.revalidations += 1
+                    entry.expires_at = self._expires_at(response.headers, now)
+                    entry.etag = response.headers.get("ETag", entry.etag)
+                    entry.last_modified = response.headers.get("Last-Modified", entry.last_modified)
+                    self._touch(entry, now)
+                    await asyncio.to_thread(self._write_index, entry)
+                    return SourceImage(data, entry.content_hash)
+            # The blob vanished after the request was sent; _read_blob has
+            # dropped the entry, so fetch the image again without validators
+
+        async with self.http_client.get(url) as response:
+            return await self._download(url, response, now)
+
+    async def _download(self, url: str, response, now: float) -> SourceImage:
+        if response.status != 200:
+            raise ValueError(f"Failed to download image: {response.status}")
+
+        data = await self._read_limited(url, response)
+        self.misses += 1
+        content_hash = hashlib.sha256(data).hexdigest()
+        if "no-store" not in parse_cache_control(response.headers.get("Cache-Control")):
+            await self._store(url, data, content_hash, response.headers, now)
+        return SourceImage(data, content_hash)
+
+    async def _read_limited(self, url: str, response) -> bytes:
+        """Stream the body, aborting as soon as it exceeds MAX_IMAGE_SIZE"""
+        limit = self.max_image_size
+        if response.content_length is not None and response.content_length > limit:
+            raise ImageTooLarge(
+                f"Image at {url} is {response.content_length} bytes, the limit is {limit}"
+            )
+        data = bytearray()
+        async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+            data += chunk
+            if len(data) > limit:
+                raise ImageTooLarge(f"Image at {url} exceeds the {limit} byte limit")
+        return bytes(data)
+
+    def clear(self):
+        """Drop every cached image from memory and disk"""
+        self._index.clear()
+        self._blob_refs.clear()
+        self.current_bytes = 0
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.revalidations + self.misses
+        return {
+            "entries": len(self._index),
+            "blobs": len(self._blob_refs),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "revalidations": self.revalidations,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": (self.hits + self.revalidations) / lookups if lookups else 0.0,
+        }
+
+    def _expires_at(self, headers, now: float) -> float:
+        directives = parse_cache_control(headers.get("Cache-Control"))
+        if "no-cache" in directives:
+            return now
+        for name in ("s-maxage", "max-age"):
+            value = directives.get(name)
+            if isinstance(value, str) and value.isdigit():
+                return now + int(value)
+        return now + settings.SOURCE_CACHE_DEFAULT_TTL
+
+    async def _store(self, url: str, data: bytes, content_hash: str, headers, now: float):
+        if len(data) > self.max_bytes:
+            return
+        # Deleted before writing, as the new blob may have the same hash
+        await self._delete(self._remove(url))
+        entry = CacheEntry(
+            url=url,
+            content_hash=content_hash,
+            size=len(data),
+            etag=headers.get("ETag"),
+            last_modified=headers.get("Last-Modified"),
+            expires_at=self._expires_at(headers, now),
+            last_access=now
+        )
+        try:
+            await asyncio.to_thread(self._write_entry, entry, data)
+        except OSError as e:
+            logger.warning(f"Could not cache source image {url}: {str(e)}")
+            return
+        self._add(entry)
+        await self._delete(self._evict())
+
+    async def _read_blob(self, entry: CacheEntry) -> bytes | None:
+        try:
+            return await asyncio.to_thread((self.blobs_dir / entry.content_hash).read_bytes)
+        except OSError:
+            # The blob was removed behind our back; forget the entry
+            await self._delete(self._remove(entry.url))
+            return None
+
+    def _touch(self, entry: CacheEntry, now: float):
+        entry.last_access = now
+        if self._index.get(entry.url) is entry:
+            self._index.move_to_end(entry.url)
+
+    def _add(self, entry: CacheEntry):
+        self._index[entry.url] = entry
+        refs = self._blob_refs.get(entry.content_hash, 0)
+        if refs == 0:
+            self.current_bytes += entry.size
+        self._blob_refs[entry.content_hash] = refs + 1
+
+    def _remove(self, url: str) -> list[Path]:
+        """Forget the entry for url and return the files that should be deleted"""
+        entry = self._index.pop(url, None)
+        if entry is None:
+            return []
+        paths = [self.index_dir / self._url_key(url)]
+        refs = self._blob_refs.get(entry.content_hash, 1) - 1
+        if refs <= 0:
+            self._blob_refs.pop(entry.content_hash, None)
+            self.current_bytes -= entry.size
+            paths.append(self.blobs_dir / entry.content_hash)
+        else:
+            self._blob_refs[entry.content_hash] = refs
+        return paths
+
+    def _evict(self) -> list[Path]:
+        paths = []
+        while self._index and self.current_bytes > self.max_bytes:
+            url = next(iter(self._index))
+            paths += self._remove(url)
+            self.evictions += 1
+        return paths
+
+    async def _delete(self, paths: list[Path]):
+        """Unlink files in one worker thread, off the event loop"""
+        if paths:
+            await asyncio.to_thread(self._unlink, paths)
+
+    def _unlink(self, paths: list[Path]):
+        for path in paths:
+            # Skip blobs that were cached again while waiting for the thread
+            if path.parent == self.blobs_dir and path.name in self._blob_refs:
+                continue
+            path.unlink(missing_ok=True)
+
+    def _write_entry(self, entry: CacheEntry, data: bytes):
+        blob_path = self.blobs_dir / entry.content_hash
+        if not blob_path.exists():
+            self.blobs_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.blobs_dir / f"{entry.content_hash}.{uuid.uuid4().hex}.tmp"
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, blob_path)
+        self._write_index(entry)
+
+    def _write_index(self, entry: CacheEntry):
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        (self.index_dir / self._url_key(entry.url)).write_text(json.dumps(asdict(entry)))
+
+    @staticmethod
+    def _url_key(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json"
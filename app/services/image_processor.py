@@ -1,142 +1,426 @@
-from app.models.request import GenerateRequest
+from app.models.request import RenderSpec, TextItem, EncoderOptions, OutputSpec
 from app.services.font_manager import FontManager
 from app.services.svg_processor import SVGProcessor
+from app.services.http_client import HTTPClient
+from app.services.image_cache import SourceImageCache, SourceImage
+from app.services.lru_cache import LRUCache
+from app.services.render_executor import RenderExecutor
+from app.services.background import remove_background
+from app.services.text_layout import TextLayoutCache, TextSpriteCache
+from app.services.render_cache import RenderCache, CachedRender
+from app.services.render_cost import estimate_cost, fit_within, source_size
+from app.services.output_store import OutputStore
+from app.services.encoder import encode
+from app.services.font_catalog import FontEntry
 from app.core.config import settings
-import aiohttp
+import asyncio
 import uuid
 import os
-from PIL import Image, ImageDraw
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from PIL import Image, ImageFont, ImageColor
 from io import BytesIO
 import logging
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+MEDIA_TYPES = {
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "webp": "image/webp",
+    "pdf": "application/pdf",
+}
+
+@dataclass
+class RenderResult:
+    """Encoded image bytes, plus the OUTPUT_DIR file name when delivered by URL"""
+    media_type: str
+    content: bytes
+    filename: str | None = None
+    size: tuple[int, int] | None = None
+    # Every output of a multi-output render; the fields above mirror the first
+    variants: list["RenderResult"] = field(default_factory=list)
+    # Served from the render cache rather than rendered
+    cached: bool = False
+
+    def describe(self) -> dict:
+        """Download URL of a saved render, plus every output of a multi-output render"""
+        description = {"download_url": f"/files/{self.filename}"}
+        if self.variants:
+            description["outputs"] = [
+                {
+                    "download_url": f"/files/{variant.filename}",
+                    "media_type": variant.media_type,
+                    "width": variant.size[0],
+                    "height": variant.size[1]
+                }
+                for variant in self.variants
+            ]
+        return description
+
 class ImageProcessor:
-    def __init__(self):
-        self.font_manager = FontManager()
-        self.svg_processor = SVGProcessor()
+    def __init__(
+        self,
+        font_manager: FontManager | None = None,
+        svg_processor: SVGProcessor | None = None,
+        http_client: HTTPClient | None = None,
+        image_cache: SourceImageCache | None = None,
+        render_executor: RenderExecutor | None = None,
+        render_cache: RenderCache | None = None,
+        output_store: OutputStore | None = None
+    ):
+        self.font_manager = font_manager or FontManager()
+        self.svg_processor = svg_processor or SVGProcessor()
+        self.http_client = http_client or HTTPClient()
+        self.image_cache = image_cache or SourceImageCache(self.http_client)
+        self.render_executor = render_executor or RenderExecutor()
+        self.render_cache = render_cache or RenderCache()
+        self.output_store = output_store or OutputStore()
+        # Decoded RGBA base images keyed by source content hash
+        self.decoded_cache = LRUCache(max_bytes=settings.DECODED_IMAGE_CACHE_MAX_BYTES)
+        # Wrapped lines and offsets per (font, text, max_width)
+        self.layout_cache = TextLayoutCache()
+        # Rasterized glyph masks of repeated labels
+        self.sprite_cache = TextSpriteCache()
+        # Resizes and encodes the variants of multi-output renders
+        self._encode_pool: ThreadPoolExecutor | None = None
         # Ensure output directory exists
         settings.OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
-    async def process_image(self, request: GenerateRequest) -> str:
-        try:
-            # Download and process the base image
-            async with aiohttp.ClientSession() as session:
-                async with session.get(str(request.image_url)) as response:
-                    if response.status != 200:
-                        raise ValueError(f"Failed to download image: {response.status}")
-                    
-                    image_data = await response.read()
-                    base_img = Image.open(BytesIO(image_data)).convert("RGBA")
-
-            # Process background removal if requested
-            if request.remove_background:
-                base_img = self._remove_background(base_img)
-
-            # Process text items
-            draw = ImageDraw.Draw(base_img)
-            for item in request.items:
-                await self._process_text_item(draw, item, request.font_family)
-
-            # Process SVG items
-            if request.svg:
-                for svg_item in request.svg:
-                    await self._process_svg_item(base_img, svg_item)
-
-            # Process watermark removal if requested
-            if request.remove_watermark:
-                base_img = self._remove_watermark(base_img)
+    @property
+    def encode_pool(self) -> ThreadPoolExecutor:
+        if self._encode_pool is None:
+            self._encode_pool = ThreadPoolExecutor(
+                max_workers=settings.OUTPUT_ENCODE_WORKERS,
+                thread_name_prefix="encode"
+            )
+        return self._encode_pool
 
-            # Save the processed image
-            filename = f"{uuid.uuid4().hex}.{request.output_format}"
-            output_path = settings.OUTPUT_DIR / filename
+    def shutdown(self):
+        """Stop the encode pool"""
+        if self._encode_pool is not None:
+            self._encode_pool.shutdown(wait=True)
+            self._encode_pool = None
 
-            # Ensure output directory exists
-            output_path.parent.mkdir(parents=True, exist_ok=True)
+    async def process_image(
+        self,
+        request: RenderSpec,
+        source: SourceImage | None = None
+    ) -> RenderResult:
+        """Render request; a plain RenderSpec needs the source image passed in"""
+        try:
+            # Download (or load from cache) the base image unless the caller has it
+            if source is None:
+                source = await self.image_cache.fetch(str(request.image_url))
 
-            if request.output_format.lower() in ["jpg", "jpeg"]:
-                base_img.convert("RGB").save(output_path, format="JPEG")
-            elif request.output_format.lower() == "pdf":
-                base_img.convert("RGB").save(output_path, format="PDF")
-            else:
-                base_img.save(output_path, format=request.output_format.upper())
+            # Identical requests over the same source and fonts reuse the result
+            font_entries = [
+                self.font_manager.resolve(request.font_family, item.font_weight, item.font_style)
+                for item in request.items
+            ]
+            cache_key = RenderCache.make_key(
+                request,
+                source.content_hash,
+                [self._font_version(entry) for entry in font_entries]
+            )
+            # Multi-output renders are not cached; the cache holds one artifact per key
+            cached = None if request.outputs else self.render_cache.get(cache_key)
+            if cached is not None:
+                return await self._from_cache(cached, request)
 
-            return filename
+            # Decode, draw and encode on the render pool
+            with self.output_store.writing():
+                result = await self._run_render(source, request, font_entries)
+                if request.delivery == "url":
+                    self.output_store.add_result(result)
+            if not request.outputs:
+                self.render_cache.put(cache_key, result.content, result.media_type, result.filename)
+            return result
 
         except Exception as e:
             logger.error(f"Error in process_image: {str(e)}")
             raise
 
-    def _remove_background(self, image: Image.Image) -> Image.Image:
-        data = image.getdata()
-        new_data = []
-        for item in data:
-            if item[0] > 200 and item[1] > 200 and item[2] > 200:
-                new_data.append((255, 255, 255, 0))
-            else:
-                new_data.append(item)
-        image.putdata(new_data)
-        return image
+    async def _run_render(self, source: SourceImage, request: RenderSpec, font_entries: list):
+        # Expensive renders are queued in the heavy lane
+        cost = estimate_cost(request, source_size(source))
+        if self.render_executor.uses_processes:
+            # Workers load fonts from their catalog paths instead of unpickling them;
+            # the file mtime makes a replaced font a different spec
+            font_specs = [
+                (entry.path, entry.face_index, item.font_size, entry.mtime_ns) if entry is not None else None
+                for entry, item in zip(font_entries, request.items)
+            ]
+            return await self.render_executor.run(
+                _render_in_worker, source, request, font_specs, self.font_manager.generation, cost=cost
+            )
+
+        # Resolve fonts on the loop; the font cache is shared by all requests
+        fonts = await self.resolve_fonts(request)
+        return await self.render_executor.run(self._render, source, request, fonts, cost=cost)
+
+    async def _from_cache(self, cached: CachedRender, request: RenderSpec) -> RenderResult:
+        if request.delivery == "inline":
+            return RenderResult(media_type=cached.media_type, content=cached.content, cached=True)
+
+        # Reuse the existing artifact until the output store expires it
+        if cached.filename is None or not self.output_store.touch(cached.filename):
+            cached.filename = f"{uuid.uuid4().hex}.{request.output_format}"
+            with self.output_store.writing():
+                await asyncio.to_thread(self._write_output, cached.filename, cached.content)
+                self.output_store.add(cached.filename, len(cached.content))
+        return RenderResult(
+            media_type=cached.media_type, filename=cached.filename, content=cached.content, cached=True
+        )
+
+    @staticmethod
+    def _font_version(entry: FontEntry | None) -> list | None:
+        if entry is None:
+            return None
+        return [entry.path, entry.face_index, entry.size, entry.mtime_ns]
+
+    async def resolve_fonts(self, request: RenderSpec) -> list[ImageFont.FreeTypeFont]:
+        """Load the font of every text item"""
+        return [
+            await self.font_manager.get_font(
+                request.font_family,
+                item.font_weight,
+                item.font_style,
+                item.variant,
+                item.font_size
+            )
+            for item in request.items
+        ]
+
+    def _render(self, source: SourceImage, request: RenderSpec, fonts: list) -> RenderResult:
+        """Compose and save the image; CPU-bound, runs on the render pool"""
+        base_img = self._load_base_image(source, request.target_size)
+
+        # Process background removal if requested
+        if request.remove_background:
+            base_img = self._remove_background(base_img, request)
+
+        # Process text items
+        for item, font in zip(request.items, fonts):
+            self._draw_text_item(base_img, item, font)
+
+        # Process SVG items
+        if request.svg:
+            for svg_item in request.svg:
+                self.svg_processor.overlay_svg(base_img, svg_item)
+
+        # Process watermark removal if requested
+        if request.remove_watermark:
+            base_img = self._remove_watermark(base_img)
+
+        if request.outputs:
+            return self._finish_outputs(base_img, request.outputs, request.delivery)
+        return self._finish(base_img, request.output_format, request.delivery, request.encoder)
+
+    def prepare_template(self, source: SourceImage, request: RenderSpec) -> tuple[Image.Image, list]:
+        """
+        Decode the base image, remove its background and rasterize the SVG
+        overlays, the parts of a render that do not depend on the text.
+        Returns the base and a list of (sprite, position) overlays.
+        """
+        base = self._load_base_image(source, request.target_size)
+        if request.remove_background:
+            base = self._remove_background(base, request)
+        svg_sprites = [
+            (self.svg_processor.rasterize(svg_item), svg_item.position)
+            for svg_item in request.svg or []
+        ]
+        return base, svg_sprites
+
+    def draw_template(
+        self,
+        base: Image.Image,
+        svg_sprites: list,
+        request: RenderSpec,
+        items: list[TextItem],
+        fonts: list,
+        output_format: str,
+        delivery: str
+    ) -> RenderResult:
+        """Draw items over a copy of a prepared base, add its overlays and encode it"""
+        image = base.copy()
+
+        for item, font in zip(items, fonts):
+            self._draw_text_item(image, item, font)
+
+        for sprite, position in svg_sprites:
+            self.svg_processor.composite(image, sprite, position)
+
+        if request.remove_watermark:
+            image = self._remove_watermark(image)
+
+        if request.outputs:
+            return self._finish_outputs(image, request.outputs, delivery)
+        return self._finish(image, output_format, delivery, request.encoder)
+
+    def _finish(
+        self,
+        image: Image.Image,
+        output_format: str,
+        delivery: str,
+        encoder: EncoderOptions | None = None
+    ) -> RenderResult:
+        """Encode the final image and, for URL delivery, save it to OUTPUT_DIR"""
+        # Encode into memory; inline delivery never touches the disk
+        buffer = BytesIO()
+        self._encode(image, output_format, buffer, encoder)
+        result = RenderResult(
+            media_type=MEDIA_TYPES[output_format.lower()],
+            content=buffer.getvalue(),
+            size=image.size
+        )
+
+        if delivery == "url":
+            # Save the processed image
+            result.filename = f"{uuid.uuid4().hex}.{output_format}"
+            self._write_output(result.filename, result.content)
+
+        return result
+
+    def _finish_outputs(self, image: Image.Image, outputs: list[OutputSpec], delivery: str) -> RenderResult:
+        """Resize and encode every requested output of one composition in parallel"""
+        # Make sure the pixels are loaded before threads read the image concurrently
+        image.load()
+        futures = [
+            self.encode_pool.submit(self._finish_output, image, output, delivery)
+            for output in outputs
+        ]
+        variants = [future.result() for future in futures]
+        first = variants[0]
+        return RenderResult(
+            media_type=first.media_type,
+            content=first.content,
+            filename=first.filename,
+            size=first.size,
+            variants=variants
+        )
+
+    def _finish_output(self, image: Image.Image, output: OutputSpec, delivery: str) -> RenderResult:
+        size = fit_within(image.size, output.max_width, output.max_height)
+        if size != image.size:
+            image = image.resize(size, Image.Resampling.LANCZOS)
+        return self._finish(image, output.format, delivery, output.encoder)
+
+    def _write_output(self, filename: str, content: bytes):
+        output_path = settings.OUTPUT_DIR / filename
+        # Ensure output directory exists
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_bytes(content)
+
+    def _encode(self, image: Image.Image, output_format: str, fp, encoder: EncoderOptions | None = None):
+        """Encode image to a path or file object"""
+        encode(image, output_format, fp, encoder)
+
+    def _load_base_image(
+        self,
+        source: SourceImage,
+        target_size: tuple[int, int] | None = None
+    ) -> Image.Image:
+        """
+        Return a private RGBA copy of the decoded source image.
+
+        With a target size, JPEGs are decoded at a reduced scale (draft mode)
+        and the result is shrunk to fit with reducing_gap resampling, so
+        oversized sources are never held in memory at full resolution as RGBA.
+        Decoded images are cached by content hash and target size; callers
+        always get a copy so the cached master is never drawn on.
+        """
+        key = source.content_hash
+        if target_size is not None:
+            key = f"{key}@{target_size[0]}x{target_size[1]}"
+        master = self.decoded_cache.get(key)
+        if master is None:
+            master = Image.open(BytesIO(source.data))
+            if target_size is not None:
+                # Let the JPEG decoder scale down by up to 8x while staying
+                # at least target_size, then resample the rest of the way
+                master.draft("RGB", target_size)
+                master.thumbnail(
+                    target_size,
+                    Image.Resampling.LANCZOS,
+                    reducing_gap=settings.DECODE_REDUCING_GAP
+                )
+            master = master.convert("RGBA")
+            self.decoded_cache.put(
+                key,
+                master,
+                size=master.width * master.height * 4
+            )
+        return master.copy()
+
+    def _remove_background(self, image: Image.Image, request: RenderSpec) -> Image.Image:
+        return remove_background(
+            image,
+            key_color=ImageColor.getrgb(request.background_color)[:3],
+            tolerance=request.background_tolerance,
+            mode=request.background_mode
+        )
 
     def _remove_watermark(self, image: Image.Image) -> Image.Image:
         # Implement watermark removal logic
         return image
 
-    async def _process_text_item(
+    def _draw_text_item(
         self,
-        draw: ImageDraw.Draw,
-        item: dict,
-        font_family: str
+        image: Image.Image,
+        item: TextItem,
+        font: ImageFont.FreeTypeFont
     ):
-        font = await self.font_manager.get_font(
-            font_family,
-            item.font_weight,
-            item.font_style,
-            item.variant,
-            item.font_size
-        )
-        
-        if item.max_width:
-            lines = self._wrap_text(item.text, font, item.max_width)
-            y_position = item.position[1]
-            bbox = font.getbbox("A")
-            line_height = bbox[3] - bbox[1]
-            
-            for line in lines:
-                bbox = font.getbbox(line)
-                text_width = bbox[2] - bbox[0]
-                x_position = item.position[0] - (text_width // 2)
-                draw.text((x_position, y_position), line, font=font, fill=item.color)
-                y_position += line_height + 5
-        else:
-            bbox = font.getbbox(item.text)
-            text_width = bbox[2] - bbox[0]
-            text_height = bbox[3] - bbox[1]
-            x_position = item.position[0] - (text_width // 2)
-            y_position = item.position[1] - (text_height // 2)
-            draw.text((x_position, y_position), item.text, font=font, fill=item.color)
-
-    async def _process_svg_item(self, base_img: Image.Image, svg_item: dict):
-        await self.svg_processor.process_svg(base_img, svg_item)
-
-    def _wrap_text(self, text: str, font, max_width: int) -> list:
-        words = text.split()
-        lines = []
-        current_line = []
-        
-        for word in words:
-            test_line = ' '.join(current_line + [word])
-            width = font.getlength(test_line)
-            
-            if width <= max_width:
-                current_line.append(word)
-            else:
-                if current_line:
-                    lines.append(' '.join(current_line))
-                current_line = [word]
-        
-        if current_line:
-            lines.append(' '.join(current_line))
-        
-        return lines 
\ No newline at end of file
+        layout = self.layout_cache.get(font, item.text, item.max_width)
+        x, y = item.position
+        for line, (dx, dy) in layout.lines:
+            self.sprite_cache.draw_text(image, (x + dx, y + dy), line, font, item.color)
+
+# Process-local processor used when rendering on a process pool
+_worker_processor: ImageProcessor | None = None
+# Font generation of the server the worker's text caches were filled under
+_worker_font_generation: int | None = None
+
+@lru_cache(maxsize=256)
+def _open_worker_font(path: str, index: int, size: int, mtime_ns: int) -> ImageFont.FreeTypeFont:
+    return ImageFont.truetype(path, size, index=index)
+
+@lru_cache(maxsize=1)
+def _default_worker_font() -> ImageFont.FreeTypeFont:
+    # One instance, so text drawn with it keeps hitting the layout and sprite caches
+    return ImageFont.load_default()
+
+def _load_worker_font(spec: tuple | None) -> ImageFont.FreeTypeFont:
+    if spec is not None:
+        try:
+            return _open_worker_font(*spec)
+        except OSError as e:
+            # The spec is not cached, so the file is tried again on the next render
+            logger.error(f"Error loading font: {str(e)}")
+    return _default_worker_font()
+
+def _get_worker_processor() -> ImageProcessor:
+    global _worker_processor
+    if _worker_processor is None:
+        _worker_processor = ImageProcessor(render_executor=RenderExecutor(kind="thread", workers=1))
+    return _worker_processor
+
+def _render_in_worker(
+    source: SourceImage,
+    request: RenderSpec,
+    font_specs: list,
+    font_generation: int
+) -> RenderResult:
+    """Entry point for renders running in a process pool worker"""
+    global _worker_font_generation
+    processor = _get_worker_processor()
+    if font_generation != _worker_font_generation:
+        # Fonts changed on the server; layouts and sprites are keyed by font path
+        processor.layout_cache.clear()
+        processor.sprite_cache.clear()
+        _worker_font_generation = font_generation
+    fonts = [_load_worker_font(spec) for spec in font_specs]
+    return processor._render(source, request, fonts)
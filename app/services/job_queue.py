@@ -0,0 +1,329 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from app.core.config import settings
+from app.models.request import JobCreateRequest
+from app.services.http_client import HTTPClient
+from app.services.image_processor import ImageProcessor
+from app.services.output_store import OutputStore
+from app.services.render_executor import RenderQueueFull
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+# Reported, never stored: succeeded, but its files have since been deleted
+EXPIRED = "expired"
+
+class JobQueueFull(Exception):
+    """Raised when JOB_QUEUE_MAX_DEPTH jobs are already waiting"""
+
+class JobNotFound(KeyError):
+    def __str__(self):
+        return f"Job {self.args[0]} not found"
+
+@dataclass
+class Job:
+    id: str
+    status: str
+    request: str  # GenerateRequest JSON
+    webhook_url: str | None = None
+    result: dict | None = None
+    error: str | None = None
+    created_at: float = 0.0
+    started_at: float | None = None
+    finished_at: float | None = None
+
+    def describe(self) -> dict:
+        description = {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.result is not None:
+            description["result"] = self.result
+        if self.error is not None:
+            description["error"] = self.error
+        return description
+
+    def filenames(self) -> list[str]:
+        """Names in OUTPUT_DIR of the files a succeeded job produced"""
+        if not self.result:
+            return []
+        urls = [self.result["download_url"]]
+        urls += [output["download_url"] for output in self.result.get("outputs", [])]
+        return [url.rsplit("/", 1)[-1] for url in urls]
+
+class JobStore:
+    """
+    SQLite table of jobs, so queued work survives a restart.
+
+    Every method is blocking; the queue calls them through asyncio.to_thread.
+    """
+
+    def __init__(self, db_path: Path | None = None):
+        self.db_path = db_path or settings.DATA_DIR / settings.JOB_DB_FILE
+        self._lock = threading.RLock()
+
+    def _connect(self) -> sqlite3.Connection:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT, request TEXT, webhook_url TEXT, "
+            "result TEXT, error TEXT, created_at REAL, started_at REAL, finished_at REAL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished_at)")
+        return conn
+
+    def save(self, job: Job):
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            job.id, job.status, job.request, job.webhook_url,
+                            json.dumps(job.result) if job.result is not None else None,
+                            job.error, job.created_at, job.started_at, job.finished_at
+                        )
+                    )
+            finally:
+                conn.close()
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            conn = self._connect()
+            try:
+                row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            finally:
+                conn.close()
+        return self._to_job(row) if row else None
+
+    def pending(self) -> list[Job]:
+        """Jobs that were queued or running when the store was last used, oldest first"""
+        with self._lock:
+            conn = self._connect()
+            try:
+                rows = conn.execute(
+                    "SELECT * FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                    (QUEUED, RUNNING)
+                ).fetchall()
+            finally:
+                conn.close()
+        return [self._to_job(row) for row in rows]
+
+    def prune(self, finished_before: float) -> int:
+        """Delete jobs that finished before finished_before; returns how many"""
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    cursor = conn.execute(
+                        "DELETE FROM jobs WHERE finished_at < ? AND status IN (?, ?)",
+                        (finished_before, SUCCEEDED, FAILED)
+                    )
+            finally:
+                conn.close()
+        return cursor.rowcount
+
+    @staticmethod
+    def _to_job(row) -> Job:
+        job_id, status, request, webhook_url, result, error, created_at, started_at, finished_at = row
+        return Job(
+            job_id, status, request, webhook_url,
+            json.loads(result) if result is not None else None,
+            error, created_at, started_at, finished_at
+        )
+
+class JobQueue:
+    """
+    Renders GenerateRequests in the background.
+
+    Submitted jobs are written to the JobStore and their ids queued for a
+    fixed pool of worker tasks. At most JOB_QUEUE_MAX_DEPTH jobs wait at any
+    time; beyond that submit() raises JobQueueFull so callers can push back.
+    Jobs left queued or running by a previous process are queued again on
+    start(). Results are always delivered by URL.
+
+    Finished jobs are deleted JOB_RETENTION seconds after they finish. A
+    succeeded job whose files the output store has already deleted is
+    reported as expired rather than with download URLs that would 404.
+    """
+
+    def __init__(
+        self,
+        image_processor: ImageProcessor,
+        http_client: HTTPClient,
+        store: JobStore | None = None,
+        workers: int | None = None,
+        max_depth: int | None = None,
+        output_store: OutputStore | None = None,
+        retention: int | None = None
+    ):
+        self.image_processor = image_processor
+        self.http_client = http_client
+        self.store = store or JobStore()
+        self.workers = workers or settings.JOB_WORKERS
+        self.max_depth = settings.JOB_QUEUE_MAX_DEPTH if max_depth is None else max_depth
+        self.output_store = output_store
+        self.retention = settings.JOB_RETENTION if retention is None else retention
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._tasks: list[asyncio.Task] = []
+        self.running = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.webhook_failures = 0
+        self.pruned = 0
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    async def start(self):
+        """Requeue unfinished jobs from the store and start the workers"""
+        for job in await asyncio.to_thread(self.store.pending):
+            if job.status == RUNNING:
+                # Interrupted mid-render; run it again from the start
+                job.status = QUEUED
+                job.started_at = None
+                await asyncio.to_thread(self.store.save, job)
+            self._queue.put_nowait(job.id)
+        if self.depth:
+            logger.info(f"Requeued {self.depth} unfinished jobs")
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._run_pruner()))
+
+    async def stop(self):
+        """Cancel the workers; jobs they were running stay pending in the store"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, request: JobCreateRequest) -> Job:
+        if self.depth >= self.max_depth:
+            self.rejected += 1
+            raise JobQueueFull(f"Job queue is full ({self.max_depth} jobs waiting)")
+        webhook_url = str(request.webhook_url) if request.webhook_url else None
+        # Jobs are picked up later, so the image is always saved for download
+        spec = request.model_copy(update={"delivery": "url"})
+        job = Job(
+            id=uuid.uuid4().hex,
+            status=QUEUED,
+            request=spec.model_dump_json(exclude={"webhook_url"}),
+            webhook_url=webhook_url,
+            created_at=time.time()
+        )
+        await asyncio.to_thread(self.store.save, job)
+        self._queue.put_nowait(job.id)
+        self.submitted += 1
+        return job
+
+    async def get(self, job_id: str) -> Job:
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if job is None:
+            raise JobNotFound(job_id)
+        if job.status == SUCCEEDED and self.output_store is not None:
+            if not all(filename in self.output_store for filename in job.filenames()):
+                job.status = EXPIRED
+                job.result = None
+                job.error = "The result has been deleted; submit the job again"
+        return job
+
+    async def prune(self) -> int:
+        """Delete jobs that finished more than JOB_RETENTION seconds ago"""
+        pruned = await asyncio.to_thread(self.store.prune, time.time() - self.retention)
+        self.pruned += pruned
+        return pruned
+
+    async def _run_pruner(self):
+        while True:
+            try:
+                await self.prune()
+            except Exception as e:
+                logger.error(f"Error pruning finished jobs: {str(e)}")
+            await asyncio.sleep(settings.JOB_PRUNE_INTERVAL)
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = await asyncio.to_thread(self.store.get, job_id)
+                if job is not None and job.status == QUEUED:
+                    self.running += 1
+                    try:
+                        await self._run(job)
+                    finally:
+                        self.running -= 1
+            except Exception as e:
+                logger.error(f"Error running job {job_id}: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job):
+        job.status = RUNNING
+        job.started_at = time.time()
+        await asyncio.to_thread(self.store.save, job)
+
+        try:
+            request = JobCreateRequest.model_validate_json(job.request)
+            while True:
+                try:
+                    result = await self.image_processor.process_image(request)
+                    break
+                except RenderQueueFull:
+                    # The render pool is saturated by interactive traffic; wait our turn
+                    await asyncio.sleep(settings.JOB_RETRY_AFTER)
+            job.status = SUCCEEDED
+            job.result = result.describe()
+            self.succeeded += 1
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {str(e)}")
+            job.status = FAILED
+            job.error = str(e)
+            self.failed += 1
+
+        job.finished_at = time.time()
+        await asyncio.to_thread(self.store.save, job)
+        if job.webhook_url:
+            await self._notify(job)
+
+    async def _notify(self, job: Job):
+        """POST the finished job to its webhook; failures are logged, not retried"""
+        try:
+            async with self.http_client.post(job.webhook_url, json=job.describe()) as response:
+                if response.status >= 400:
+                    raise RuntimeError(f"webhook returned HTTP {response.status}")
+        except Exception as e:
+            self.webhook_failures += 1
+            logger.warning(f"Webhook for job {job.id} failed: {str(e)}")
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "depth": self.depth,
+            "running": self.running,
+            "max_depth": self.max_depth,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "webhook_failures": self.webhook_failures,
+            "retention": self.retention,
+            "pruned": self.pruned,
+        }
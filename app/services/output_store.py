@@ -0,0 +1,247 @@
+import asyncio
+import itertools
+import logging
+import shutil
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from app.services.image_processor import RenderResult
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class OutputEntry:
+    filename: str
+    size: int
+    expires_at: float
+
+class OutputStore:
+    """
+    Index of the rendered files served from OUTPUT_DIR.
+
+    Every file handed out by URL is recorded in memory with its size and
+    expiry; the directory is scanned once, in load(), and never again. A
+    file lives for OUTPUT_TTL seconds after it was last handed out, and the
+    least recently handed out files are evicted once the total exceeds
+    OUTPUT_MAX_BYTES. Expired and evicted files leave the index at once and
+    are unlinked by a background janitor in batches of OUTPUT_JANITOR_BATCH,
+    so deletion never runs on the event loop. Because expiry restarts
+    whenever a URL is handed out again, a file is never deleted sooner than
+    OUTPUT_TTL after a client received its URL unless the quota forces it.
+
+    Renders wrap their work in writing(), so remove_orphans() can tell a
+    stray file from one that is written but not yet recorded.
+    """
+
+    def __init__(
+        self,
+        output_dir: Path | None = None,
+        ttl: int | None = None,
+        max_bytes: int | None = None,
+        batch_size: int | None = None,
+        interval: float | None = None
+    ):
+        self.output_dir = Path(output_dir or settings.OUTPUT_DIR)
+        self.ttl = settings.OUTPUT_TTL if ttl is None else ttl
+        self.max_bytes = settings.OUTPUT_MAX_BYTES if max_bytes is None else max_bytes
+        self.batch_size = batch_size or settings.OUTPUT_JANITOR_BATCH
+        self.interval = settings.OUTPUT_JANITOR_INTERVAL if interval is None else interval
+        # Ordered by last hand-out, so by expiry as well
+        self._index: OrderedDict[str, OutputEntry] = OrderedDict()
+        # Files removed from the index but not yet from disk
+        self._pending: list[str] = []
+        self._wakeup = asyncio.Event()
+        self._janitor: asyncio.Task | None = None
+        # Start times of renders that may write files not yet recorded
+        self._writers: dict[int, float] = {}
+        self._writer_ids = itertools.count()
+        self.current_bytes = 0
+        self.expired = 0
+        self.evictions = 0
+        self.deleted = 0
+        self.orphans = 0
+
+    def load(self):
+        """Index the files already in OUTPUT_DIR; they expire OUTPUT_TTL after their mtime"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        entries = []
+        for path in self.output_dir.iterdir():
+            try:
+                if path.is_file():
+                    stat = path.stat()
+                    entries.append(OutputEntry(path.name, stat.st_size, stat.st_mtime + self.ttl))
+            except OSError:
+                continue
+        for entry in sorted(entries, key=lambda e: e.expires_at):
+            self._add(entry)
+        self._collect(time.time())
+        logger.info(f"Indexed {len(self._index)} output files ({self.current_bytes} bytes)")
+
+    async def start(self):
+        """Start the janitor task"""
+        if self._janitor is None:
+            self._janitor = asyncio.create_task(self._run_janitor())
+
+    async def stop(self):
+        if self._janitor is not None:
+            self._janitor.cancel()
+            await asyncio.gather(self._janitor, return_exceptions=True)
+            self._janitor = None
+
+    def add(self, filename: str, size: int):
+        """Record a file just written to OUTPUT_DIR"""
+        self._remove(filename)
+        self._add(OutputEntry(filename, size, time.time() + self.ttl))
+        if self.current_bytes > self.max_bytes:
+            self._collect(time.time())
+
+    def add_result(self, result: "RenderResult"):
+        """Record every file of a render delivered by URL"""
+        for variant in result.variants or [result]:
+            if variant.filename is not None:
+                self.add(variant.filename, len(variant.content))
+
+    @contextmanager
+    def writing(self):
+        """Mark a render that may write to OUTPUT_DIR until it has recorded its files"""
+        writer = next(self._writer_ids)
+        self._writers[writer] = time.time()
+        try:
+            yield
+        finally:
+            del self._writers[writer]
+
+    def __contains__(self, filename: str) -> bool:
+        """Whether filename is recorded, without restarting its expiry"""
+        return filename in self._index
+
+    def touch(self, filename: str) -> bool:
+        """Restart the expiry of a file being handed out again; False if it is gone"""
+        entry = self._index.get(filename)
+        if entry is None:
+            return False
+        entry.expires_at = time.time() + self.ttl
+        self._index.move_to_end(filename)
+        return True
+
+    async def collect(self) -> int:
+        """Delete expired and over-quota files now; returns how many were deleted"""
+        self._collect(time.time())
+        return await self._delete_pending()
+
+    async def remove_orphans(self) -> int:
+        """
+        Delete files in OUTPUT_DIR that are not recorded, such as leftovers of
+        a crash; this is the only operation that lists the directory.
+        """
+        files = await asyncio.to_thread(self._scan)
+        # Files newer than the oldest running render may still be recorded by it;
+        # one second of slack covers coarse filesystem timestamps
+        cutoff = min(self._writers.values(), default=None)
+        pending = set(self._pending)
+        orphans = [
+            filename for filename, mtime in files
+            if filename not in self._index and filename not in pending
+            and (cutoff is None or mtime < cutoff - 1.0)
+        ]
+        self.orphans += len(orphans)
+        self._pending.extend(orphans)
+        return await self._delete_pending()
+
+    async def clear(self):
+        """Forget and delete every output file"""
+        self._index.clear()
+        self._pending.clear()
+        self.current_bytes = 0
+        await asyncio.to_thread(self._wipe)
+
+    def stats(self) -> dict:
+        return {
+            "files": len(self._index),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "pending_deletes": len(self._pending),
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "orphans": self.orphans,
+            "deleted": self.deleted,
+        }
+
+    def _add(self, entry: OutputEntry):
+        self._index[entry.filename] = entry
+        self.current_bytes += entry.size
+
+    def _remove(self, filename: str) -> OutputEntry | None:
+        entry = self._index.pop(filename, None)
+        if entry is not None:
+            self.current_bytes -= entry.size
+        return entry
+
+    def _collect(self, now: float):
+        """Move expired files, then the oldest files over quota, to the deletion list"""
+        before = len(self._pending)
+        while self._index:
+            filename, entry = next(iter(self._index.items()))
+            if entry.expires_at <= now:
+                self.expired += 1
+            elif self.current_bytes > self.max_bytes:
+                self.evictions += 1
+            else:
+                break
+            self._remove(filename)
+            self._pending.append(filename)
+        if len(self._pending) > before:
+            self._wakeup.set()
+
+    async def _delete_pending(self) -> int:
+        deleted = 0
+        while self._pending:
+            batch = self._pending[:self.batch_size]
+            del self._pending[:self.batch_size]
+            count = await asyncio.to_thread(self._unlink, batch)
+            self.deleted += count
+            deleted += count
+        return deleted
+
+    async def _run_janitor(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.collect()
+            except Exception as e:
+                logger.error(f"Error cleaning output files: {str(e)}")
+
+    def _unlink(self, filenames: list[str]) -> int:
+        deleted = 0
+        for filename in filenames:
+            try:
+                (self.output_dir / filename).unlink(missing_ok=True)
+                deleted += 1
+            except OSError as e:
+                logger.warning(f"Could not delete output {filename}: {str(e)}")
+        return deleted
+
+    def _scan(self) -> list[tuple[str, float]]:
+        files = []
+        for path in self.output_dir.iterdir():
+            try:
+                if path.is_file():
+                    files.append((path.name, path.stat().st_mtime))
+            except OSError:
+                continue
+        return files
+
+    def _wipe(self):
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,68 @@
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from app.core.config import settings
+from app.models.request import RenderSpec
+from app.services.lru_cache import LRUCache
+
+# Fields that change how a result is delivered but not what is rendered
+DELIVERY_FIELDS = {"image_url", "delivery"}
+
+@dataclass
+class CachedRender:
+    content: bytes
+    media_type: str
+    filename: str | None
+    created_at: float
+
+class RenderCache:
+    """
+    Cache of encoded render results.
+
+    Keys are a canonical hash of the request, the source image content hash
+    and the versions of the font files used, so identical requests skip
+    rendering. Entries expire after a TTL and total size is bounded by an
+    LRU byte quota.
+    """
+
+    def __init__(self, max_bytes: int | None = None, ttl: int | None = None):
+        self.ttl = settings.RENDER_CACHE_TTL if ttl is None else ttl
+        self._cache = LRUCache(
+            max_bytes=settings.RENDER_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        )
+        self.expired = 0
+
+    @staticmethod
+    def make_key(request: RenderSpec, source_hash: str, font_versions: list) -> str:
+        """Canonical hash of everything that determines the rendered bytes"""
+        payload = {
+            "request": request.model_dump(mode="json", exclude=DELIVERY_FIELDS),
+            "source": source_hash,
+            "fonts": font_versions,
+        }
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> CachedRender | None:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry.created_at > self.ttl:
+            self._cache.pop(key)
+            self.expired += 1
+            return None
+        return entry
+
+    def put(self, key: str, content: bytes, media_type: str, filename: str | None = None):
+        if self.ttl <= 0:
+            return
+        entry = CachedRender(content, media_type, filename, time.time())
+        self._cache.put(key, entry, size=len(content))
+
+    def clear(self):
+        """Drop every cached render, e.g. after fonts changed"""
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return {**self._cache.stats(), "ttl": self.ttl, "expired": self.expired}
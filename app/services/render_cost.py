@@ -0,0 +1,75 @@
+import logging
+from io import BytesIO
+from PIL import Image
+from app.models.request import RenderSpec
+from app.services.image_cache import SourceImage
+from app.services.encoder import pillow_format
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Rough CPU milliseconds per megapixel, measured with Pillow on one core;
+# estimates are compared with RENDER_HEAVY_COST_MS to pick a render lane
+DECODE_MS_PER_MP = 30.0
+ENCODE_MS_PER_MP = {"png": 150.0, "jpeg": 10.0, "webp": 150.0, "pdf": 15.0}
+BACKGROUND_MS_PER_MP = {"global": 35.0, "connected": 700.0}
+# Encode effort of each profile relative to "balanced"
+PROFILE_FACTOR = {"fast": 0.3, "balanced": 1.0, "smallest": 3.0}
+TEXT_ITEM_MS = 1.0
+SVG_ITEM_MS = 5.0
+BASE_MS = 2.0
+
+# Assumed when the source header cannot be read
+DEFAULT_SOURCE_SIZE = (1000, 1000)
+
+def source_size(source: SourceImage) -> tuple[int, int]:
+    """Pixel size of a source image from its header, without decoding it"""
+    try:
+        with Image.open(BytesIO(source.data)) as image:
+            return image.size
+    except Exception as e:
+        logger.debug(f"Could not read source size: {str(e)}")
+        return DEFAULT_SOURCE_SIZE
+
+def fit_within(size: tuple[int, int], max_width: int | None, max_height: int | None) -> tuple[int, int]:
+    """Largest size within the bounds that keeps the aspect ratio; never upscales"""
+    width, height = size
+    scale = min(
+        1.0,
+        max_width / width if max_width else 1.0,
+        max_height / height if max_height else 1.0
+    )
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+def estimate_cost(request: RenderSpec, size: tuple[int, int], prepared: bool = False) -> float:
+    """
+    Estimated CPU milliseconds to render request onto a source of the given size.
+
+    Counts decoding, background removal, text and SVG items and encoding of
+    every output. With prepared=True the base image is already decoded and
+    composed (as for templates), so only text and encoding are counted.
+    """
+    base_size = size
+    if request.target_size is not None and not prepared:
+        base_size = fit_within(size, *request.target_size)
+    base_mp = base_size[0] * base_size[1] / 1e6
+
+    cost = BASE_MS + TEXT_ITEM_MS * len(request.items)
+    if not prepared:
+        cost += DECODE_MS_PER_MP * size[0] * size[1] / 1e6
+        if request.remove_background:
+            cost += BACKGROUND_MS_PER_MP[request.background_mode] * base_mp
+        cost += SVG_ITEM_MS * len(request.svg or [])
+
+    outputs = request.outputs or []
+    if outputs:
+        for output in outputs:
+            width, height = fit_within(base_size, output.max_width, output.max_height)
+            cost += _encode_cost(output.format, output.encoder, width * height / 1e6)
+    else:
+        cost += _encode_cost(request.output_format, request.encoder, base_mp)
+    return cost
+
+def _encode_cost(output_format: str, encoder, mp: float) -> float:
+    profile = (encoder.profile if encoder is not None else None) or settings.DEFAULT_ENCODER_PROFILE
+    return ENCODE_MS_PER_MP[pillow_format(output_format)] * PROFILE_FACTOR[profile] * mp
@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Recent queue waits kept per lane for the latency metrics
+WAIT_SAMPLES = 1024
+
+class RenderQueueFull(Exception):
+    """Raised when the render queue is at capacity"""
+
+class RenderLane:
+    """
+    A render pool with its own concurrency limit and admission queue.
+
+    At most ``workers`` renders run at once; up to ``queue_size`` more wait
+    for a slot in FIFO order and further submissions fail fast with
+    RenderQueueFull. Work only reaches the pool once it holds a slot, so the
+    time spent waiting for one is the lane's whole queueing delay.
+    """
+
+    def __init__(self, name: str, kind: str, workers: int, queue_size: int):
+        self.name = name
+        self.kind = kind
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor: Executor | None = None
+        self._thread_executor: Executor | None = None
+        self._slots = asyncio.Semaphore(workers)
+        self._waits: deque[float] = deque(maxlen=WAIT_SAMPLES)
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self.waiting + self.running
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_size
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                # Spawned workers do not inherit the server's threads and locks
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix=f"render-{self.name}"
+                )
+        return self._executor
+
+    @property
+    def thread_executor(self) -> Executor:
+        """Threads for work whose arguments are too large to send to a process"""
+        if self.kind != "process":
+            return self.executor
+        if self._thread_executor is None:
+            self._thread_executor = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix=f"render-{self.name}"
+            )
+        return self._thread_executor
+
+    async def run(self, fn: Callable, *args: Any, threaded: bool = False) -> Any:
+        if self.in_flight >= self.capacity:
+            self.rejected += 1
+            raise RenderQueueFull(
+                f"Render queue '{self.name}' is full ({self.in_flight} renders in flight)"
+            )
+
+        queued_at = time.monotonic()
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        self._waits.append(time.monotonic() - queued_at)
+
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            executor = self.thread_executor if threaded else self.executor
+            result = await loop.run_in_executor(executor, partial(fn, *args))
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.running -= 1
+            self._slots.release()
+
+    def shutdown(self):
+        for executor in (self._executor, self._thread_executor):
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+        self._executor = self._thread_executor = None
+
+    def stats(self) -> dict:
+        waits = sorted(self._waits)
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "running": self.running,
+            "queue_depth": self.waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "wait_ms_avg": round(sum(waits) / len(waits) * 1000, 3) if waits else 0.0,
+            "wait_ms_p99": round(waits[int(len(waits) * 0.99)] * 1000, 3) if waits else 0.0,
+            "wait_ms_max": round(waits[-1] * 1000, 3) if waits else 0.0,
+        }
+
+class RenderExecutor:
+    """
+    Runs CPU-bound render work off the event loop.
+
+    Work is executed on a thread pool (Pillow releases the GIL for most
+    pixel operations) or on a process pool for the pure-Python parts.
+    Renders are split by estimated cost into two lanes with separate pools
+    and limits: renders costing at least RENDER_HEAVY_COST_MS go to the heavy
+    lane, so background removal on large sources cannot hold up the workers
+    that serve small labels. Each lane admits ``workers + queue_size``
+    renders; further submissions fail fast with RenderQueueFull. Work
+    submitted with threaded=True runs on threads of its lane even on a
+    process pool, within the same limits.
+    """
+
+    def __init__(
+        self,
+        kind: str | None = None,
+        workers: int | None = None,
+        queue_size: int | None = None,
+        heavy_workers: int | None = None,
+        heavy_queue_size: int | None = None,
+        heavy_cost: float | None = None
+    ):
+        self.kind = kind or settings.RENDER_EXECUTOR
+        if self.kind not in ("thread", "process"):
+            raise ValueError(f"Unknown render executor: {self.kind}")
+        self.heavy_cost = settings.RENDER_HEAVY_COST_MS if heavy_cost is None else heavy_cost
+        self.light = RenderLane(
+            "light",
+            self.kind,
+            workers or settings.RENDER_WORKERS,
+            settings.RENDER_QUEUE_SIZE if queue_size is None else queue_size
+        )
+        self.heavy = RenderLane(
+            "heavy",
+            self.kind,
+            heavy_workers or settings.RENDER_HEAVY_WORKERS,
+            settings.RENDER_HEAVY_QUEUE_SIZE if heavy_queue_size is None else heavy_queue_size
+        )
+
+    @property
+    def uses_processes(self) -> bool:
+        return self.kind == "process"
+
+    @property
+    def lanes(self) -> tuple[RenderLane, RenderLane]:
+        return (self.light, self.heavy)
+
+    def lane_for(self, cost: float) -> RenderLane:
+        return self.heavy if cost >= self.heavy_cost else self.light
+
+    async def run(self, fn: Callable, *args: Any, cost: float = 0.0, threaded: bool = False) -> Any:
+        """Run fn(*args) on the lane matching its estimated cost and return its result"""
+        return await self.lane_for(cost).run(fn, *args, threaded=threaded)
+
+    def shutdown(self):
+        """Wait for running renders and release the pools"""
+        for lane in self.lanes:
+            lane.shutdown()
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "heavy_cost_ms": self.heavy_cost,
+            "in_flight": sum(lane.in_flight for lane in self.lanes),
+            "completed": sum(lane.completed for lane in self.lanes),
+            "failed": sum(lane.failed for lane in self.lanes),
+            "rejected": sum(lane.rejected for lane in self.lanes),
+            "lanes": {lane.name: lane.stats() for lane in self.lanes},
+        }
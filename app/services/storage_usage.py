@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import os
+import time
+from pathlib import Path
+from app.core.config import settings
+from app.services.font_catalog import FontCatalog
+from app.services.image_cache import SourceImageCache
+from app.services.output_store import OutputStore
+
+logger = logging.getLogger(__name__)
+
+def directory_usage(path: Path) -> dict:
+    """Walk path and total the files below it; blocking"""
+    files = size = 0
+    stack = [str(path)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            files += 1
+                            size += entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return {"size": size, "files": files}
+
+class StorageUsage:
+    """
+    Size and file count of the output, cache and fonts directories.
+
+    The numbers come from counters the writers keep current: the output
+    store's index, the source image cache's blob accounting and the font
+    catalog, so reading them never touches the disk. Files those writers do
+    not know about (left by a crash, copied in by hand) are not counted; an
+    optional background pass every STATUS_RECONCILE_INTERVAL seconds walks
+    the directories off the event loop and reports what is actually there.
+    """
+
+    def __init__(
+        self,
+        output_store: OutputStore,
+        image_cache: SourceImageCache,
+        font_catalog: FontCatalog,
+        interval: float | None = None
+    ):
+        self.output_store = output_store
+        self.image_cache = image_cache
+        self.font_catalog = font_catalog
+        self.interval = settings.STATUS_RECONCILE_INTERVAL if interval is None else interval
+        self.directories = {
+            "output": output_store.output_dir,
+            "cache": settings.CACHE_DIR,
+            "fonts": font_catalog.user_dir,
+        }
+        self._task: asyncio.Task | None = None
+        self.on_disk: dict[str, dict] | None = None
+        self.reconciled_at: float | None = None
+
+    def usage(self) -> dict:
+        outputs = self.output_store.stats()
+        sources = self.image_cache.stats()
+        return {
+            "output": {"size": outputs["bytes"], "files": outputs["files"]},
+            "cache": {"size": sources["bytes"], "files": sources["blobs"]},
+            "fonts": {"size": self.font_catalog.user_bytes, "files": self.font_catalog.user_files},
+        }
+
+    async def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def reconcile(self) -> dict:
+        """Walk the directories and record what is on disk"""
+        on_disk = {}
+        for name, path in self.directories.items():
+            on_disk[name] = await asyncio.to_thread(directory_usage, path)
+        self.on_disk = on_disk
+        self.reconciled_at = time.time()
+        return on_disk
+
+    def reconciliation(self) -> dict | None:
+        """Last walk of the directories, with the bytes and files the counters miss"""
+        if self.on_disk is None:
+            return None
+        usage = self.usage()
+        return {
+            "reconciled_at": self.reconciled_at,
+            "directories": {
+                name: {
+                    **disk,
+                    "untracked_size": disk["size"] - usage[name]["size"],
+                    "untracked_files": disk["files"] - usage[name]["files"],
+                }
+                for name, disk in self.on_disk.items()
+            },
+        }
+
+    async def _run(self):
+        while True:
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.error(f"Error reconciling storage usage: {str(e)}")
+            await asyncio.sleep(self.interval)
@@ -1,15 +1,28 @@
+import hashlib
 import logging
 from PIL import Image
-import io
-from svglib.svglib import svg2rlg
-from reportlab.graphics import renderPM
+from app.core.config import settings
 from app.models.request import SVGItem
+from app.services.lru_cache import LRUCache
+from app.services.svg_rasterizers import SVGRasterizer, UnsupportedSVG, build_rasterizers
 
 logger = logging.getLogger(__name__)
 
 class SVGProcessor:
-    def __init__(self):
-        pass
+    def __init__(
+        self,
+        rasterizer: str | None = None,
+        max_entries: int | None = None,
+        max_bytes: int | None = None
+    ):
+        # Backends are tried in order until one supports the SVG
+        self.rasterizers: list[SVGRasterizer] = build_rasterizers(rasterizer or settings.SVG_RASTERIZER)
+        # Rasterized SVGs keyed by (svg_data hash, width, height); callers
+        # only read from the cached images, never draw on them
+        self.raster_cache = LRUCache(
+            max_entries=settings.SVG_CACHE_MAX_ENTRIES if max_entries is None else max_entries,
+            max_bytes=settings.SVG_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        )
 
     async def process_svg(self, base_img: Image.Image, svg_item: SVGItem) -> None:
         """
@@ -19,36 +32,45 @@ class SVGProcessor:
             base_img: The base PIL Image to overlay the SVG onto
             svg_item: The SVGItem containing SVG data and positioning information
         """
+        self.overlay_svg(base_img, svg_item)
+
+    def overlay_svg(self, base_img: Image.Image, svg_item: SVGItem) -> None:
+        """Synchronous counterpart of process_svg, for use on the render pool"""
         try:
-            # Convert SVG to PNG using svglib
-            drawing = svg2rlg(io.BytesIO(svg_item.svg_data.encode('utf-8')))
-            
-            # Set output dimensions if specified
-            if svg_item.width and svg_item.height:
-                drawing.width = svg_item.width
-                drawing.height = svg_item.height
-            
-            # Render to PNG
-            png_data = io.BytesIO()
-            renderPM.drawToFile(drawing, png_data, fmt="PNG")
-            png_data.seek(0)
-            
-            # Convert PNG data to PIL Image
-            svg_img = Image.open(png_data)
-            
-            # Convert to RGBA if not already
-            if svg_img.mode != 'RGBA':
-                svg_img = svg_img.convert('RGBA')
-            
-            # Create a transparent layer the size of the base image
-            overlay = Image.new('RGBA', base_img.size, (0, 0, 0, 0))
-            
-            # Paste the SVG image at the specified position
-            overlay.paste(svg_img, svg_item.position, svg_img)
-            
-            # Composite the overlay onto the base image
-            base_img.alpha_composite(overlay)
-            
+            svg_img = self.rasterize(svg_item)
+            self.composite(base_img, svg_img, svg_item.position)
         except Exception as e:
             logger.error(f"Error processing SVG: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
+
+    def rasterize(self, svg_item: SVGItem) -> Image.Image:
+        """Return the SVG rendered to an RGBA image, reusing earlier renders"""
+        key = (
+            hashlib.sha256(svg_item.svg_data.encode('utf-8')).hexdigest(),
+            svg_item.width,
+            svg_item.height
+        )
+        svg_img = self.raster_cache.get(key)
+        if svg_img is None:
+            svg_img = self._render_svg(svg_item)
+            self.raster_cache.put(key, svg_img, size=svg_img.width * svg_img.height * 4)
+        return svg_img
+
+    def _render_svg(self, svg_item: SVGItem) -> Image.Image:
+        for backend in self.rasterizers[:-1]:
+            try:
+                return backend.rasterize(svg_item.svg_data, svg_item.width, svg_item.height)
+            except UnsupportedSVG as e:
+                logger.debug(f"{backend.name} rasterizer skipped SVG: {str(e)}")
+        return self.rasterizers[-1].rasterize(svg_item.svg_data, svg_item.width, svg_item.height)
+
+    def composite(self, base_img: Image.Image, svg_img: Image.Image, position: tuple[int, int]) -> None:
+        """Overlay a rasterized SVG onto the base image at position"""
+        # Blend only the destination region; parts outside the base are clipped
+        base_img.alpha_composite(svg_img, dest=tuple(position))
+
+    def stats(self) -> dict:
+        return {
+            **self.raster_cache.stats(),
+            "rasterizers": [backend.name for backend in self.rasterizers]
+        }
@@ -0,0 +1,436 @@
+import importlib.util
+import io
+import logging
+import math
+import re
+import xml.etree.ElementTree as ET
+from abc import ABC, abstractmethod
+from typing import Any
+from PIL import Image, ImageColor, ImageDraw
+
+logger = logging.getLogger(__name__)
+
+class UnsupportedSVG(Exception):
+    """Raised when a backend cannot render a particular SVG"""
+
+class SVGRasterizer(ABC):
+    """
+    Turns SVG markup into an RGBA image.
+
+    Rasterizing is split into ``parse`` and ``render`` so the benchmark can
+    time both; ``rasterize`` runs them back to back. When width and height
+    are given they set the output size.
+    """
+
+    name: str = ""
+
+    @classmethod
+    def available(cls) -> bool:
+        """Whether the libraries this backend needs are installed"""
+        return True
+
+    @abstractmethod
+    def parse(self, svg_data: str) -> Any:
+        ...
+
+    @abstractmethod
+    def render(self, parsed: Any, width: int | None = None, height: int | None = None) -> Image.Image:
+        ...
+
+    def rasterize(self, svg_data: str, width: int | None = None, height: int | None = None) -> Image.Image:
+        image = self.render(self.parse(svg_data), width, height)
+        return image if image.mode == "RGBA" else image.convert("RGBA")
+
+class SvglibRasterizer(SVGRasterizer):
+    """svglib + reportlab renderPM; handles nearly everything, slowly"""
+
+    name = "svglib"
+
+    @classmethod
+    def available(cls) -> bool:
+        return (
+            importlib.util.find_spec("svglib") is not None
+            and importlib.util.find_spec("reportlab") is not None
+        )
+
+    def parse(self, svg_data: str):
+        # Imported lazily, reportlab is slow to import
+        from svglib.svglib import svg2rlg
+        drawing = svg2rlg(io.BytesIO(svg_data.encode("utf-8")))
+        if drawing is None:
+            raise ValueError("Invalid SVG data")
+        return drawing
+
+    def render(self, drawing, width: int | None = None, height: int | None = None) -> Image.Image:
+        from reportlab.graphics import renderPM
+        if width and height:
+            # Scale the artwork with the canvas, as the other backends do
+            drawing.scale(width / drawing.width, height / drawing.height)
+            drawing.width = width
+            drawing.height = height
+        png_data = io.BytesIO()
+        renderPM.drawToFile(drawing, png_data, fmt="PNG")
+        png_data.seek(0)
+        return Image.open(png_data)
+
+class CairoSVGRasterizer(SVGRasterizer):
+    """cairosvg, a native renderer used when it is installed"""
+
+    name = "cairosvg"
+
+    @classmethod
+    def available(cls) -> bool:
+        if importlib.util.find_spec("cairosvg") is None:
+            return False
+        try:
+            # Also fails when the cairo shared library is missing
+            import cairosvg  # noqa: F401
+        except (ImportError, OSError):
+            return False
+        return True
+
+    def parse(self, svg_data: str):
+        from cairosvg.parser import Tree
+        return Tree(bytestring=svg_data.encode("utf-8"))
+
+    def render(self, tree, width: int | None = None, height: int | None = None) -> Image.Image:
+        from cairosvg.surface import PNGSurface
+        png_data = io.BytesIO()
+        PNGSurface(tree, png_data, 96, output_width=width, output_height=height).finish()
+        png_data.seek(0)
+        return Image.open(png_data)
+
+SVG_NS = "{http://www.w3.org/2000/svg}"
+
+# Supersampling factor used to anti-alias shape edges
+SUPERSAMPLE = 4
+# Pixels of the supersampled canvas (64MB of RGBA); larger outputs are
+# supersampled less, down to not at all, to stay within it
+SUPERSAMPLE_MAX_PIXELS = 4096 * 4096
+
+_LENGTH = re.compile(r"^\s*(-?[\d.]+(?:e-?\d+)?)\s*(px)?\s*$")
+_POINTS = re.compile(r"[\s,]+")
+
+def supersample_factor(width: int, height: int) -> int:
+    """Largest factor up to SUPERSAMPLE whose canvas fits SUPERSAMPLE_MAX_PIXELS"""
+    fitting = math.isqrt(SUPERSAMPLE_MAX_PIXELS // max(1, width * height))
+    return max(1, min(SUPERSAMPLE, fitting))
+
+class SimpleShapesRasterizer(SVGRasterizer):
+    """
+    Pure-Python renderer for flat artwork built from basic shapes.
+
+    Supports rect, circle, ellipse, line, polygon and polyline with solid
+    fill, stroke and opacity, grouped with ``g`` and scaled by viewBox.
+    Strokes are centered on the outline as in SVG, with miter, round or
+    bevel joins and butt, round or square caps. Anything else (paths, text,
+    transforms, gradients) raises UnsupportedSVG so a fuller backend can
+    take over, as does any attribute this parser cannot read.
+    """
+
+    name = "simple"
+
+    STYLE_ATTRS = (
+        "fill", "stroke", "stroke-width", "opacity", "fill-opacity", "stroke-opacity",
+        "stroke-linejoin", "stroke-linecap", "stroke-miterlimit",
+    )
+    SHAPES = ("rect", "circle", "ellipse", "line", "polygon", "polyline")
+
+    def parse(self, svg_data: str) -> dict:
+        try:
+            return self._parse(svg_data)
+        except UnsupportedSVG:
+            raise
+        except (ValueError, TypeError, ZeroDivisionError) as e:
+            raise UnsupportedSVG(f"Unreadable SVG attribute: {e}")
+
+    def _parse(self, svg_data: str) -> dict:
+        try:
+            root = ET.fromstring(svg_data)
+        except ET.ParseError as e:
+            raise UnsupportedSVG(f"Unparseable SVG: {e}")
+        if _tag(root) != "svg":
+            raise UnsupportedSVG("Root element is not <svg>")
+
+        view_box = root.get("viewBox")
+        width = _length(root.get("width")) if root.get("width") else None
+        height = _length(root.get("height")) if root.get("height") else None
+        if view_box:
+            min_x, min_y, vb_width, vb_height = (float(v) for v in _POINTS.split(view_box.strip()))
+        elif width and height:
+            min_x, min_y, vb_width, vb_height = 0.0, 0.0, width, height
+        else:
+            raise UnsupportedSVG("SVG has no size")
+        if vb_width <= 0 or vb_height <= 0:
+            raise UnsupportedSVG("SVG has an empty viewBox")
+        # A single given dimension keeps the viewBox aspect ratio
+        if width and not height:
+            height = width * vb_height / vb_width
+        elif height and not width:
+            width = height * vb_width / vb_height
+
+        shapes = []
+        self._collect(root, {"fill": "black", "stroke": "none", **_style(root)}, shapes)
+        return {
+            "size": (width or vb_width, height or vb_height),
+            "view_box": (min_x, min_y, vb_width, vb_height),
+            "shapes": shapes,
+        }
+
+    def render(self, parsed: dict, width: int | None = None, height: int | None = None) -> Image.Image:
+        out_width, out_height = (width, height) if width and height else parsed["size"]
+        out_width, out_height = max(1, round(out_width)), max(1, round(out_height))
+        min_x, min_y, vb_width, vb_height = parsed["view_box"]
+        factor = supersample_factor(out_width, out_height)
+        scale_x = out_width * factor / vb_width
+        scale_y = out_height * factor / vb_height
+
+        def point(x: float, y: float) -> tuple[float, float]:
+            return (x - min_x) * scale_x, (y - min_y) * scale_y
+
+        def box(x0: float, y0: float, x1: float, y1: float) -> list[tuple[float, float]]:
+            # ImageDraw includes the last row and column of a box
+            (left, top), (right, bottom) = point(x0, y0), point(x1, y1)
+            return [(left, top), (right - 1, bottom - 1)]
+
+        canvas = Image.new("RGBA", (out_width * factor, out_height * factor), (0, 0, 0, 0))
+        canvas_draw = ImageDraw.Draw(canvas)
+
+        def paint(color: tuple, draw_shape):
+            # ImageDraw overwrites pixels, so translucent paint is drawn on
+            # its own layer and blended
+            if color[3] < 255:
+                layer = Image.new("RGBA", canvas.size, (0, 0, 0, 0))
+                draw_shape(ImageDraw.Draw(layer), color)
+                canvas.alpha_composite(layer)
+            else:
+                draw_shape(canvas_draw, color)
+
+        for tag, geometry, style in parsed["shapes"]:
+            fill, stroke = style["fill"], style["stroke"]
+            if fill is not None and tag != "line":
+                if tag == "rect":
+                    x, y, w, h = geometry
+                    paint(fill, lambda draw, color: draw.rectangle(box(x, y, x + w, y + h), fill=color))
+                elif tag in ("circle", "ellipse"):
+                    cx, cy, rx, ry = geometry
+                    paint(fill, lambda draw, color: draw.ellipse(box(cx - rx, cy - ry, cx + rx, cy + ry), fill=color))
+                else:
+                    points = [point(*p) for p in geometry]
+                    paint(fill, lambda draw, color: draw.polygon(points, fill=color))
+            if stroke is None:
+                continue
+
+            # The stroke straddles the outline. ImageDraw draws outlines inside
+            # the shape, so rectangles and ellipses are grown by half the width
+            half = style["stroke-width"] / 2
+            if tag == "rect" and style["stroke-linejoin"] == "miter":
+                x, y, w, h = geometry
+                outer = box(x - half, y - half, x + w + half, y + h + half)
+                width_px = max(1, round(style["stroke-width"] * (scale_x + scale_y) / 2))
+                paint(stroke, lambda draw, color: draw.rectangle(outer, outline=color, width=width_px))
+            elif tag in ("circle", "ellipse"):
+                cx, cy, rx, ry = geometry
+                outer = box(cx - rx - half, cy - ry - half, cx + rx + half, cy + ry + half)
+                width_px = max(1, round(style["stroke-width"] * (scale_x + scale_y) / 2))
+                paint(stroke, lambda draw, color: draw.ellipse(outer, outline=color, width=width_px))
+            else:
+                if tag == "rect":
+                    x, y, w, h = geometry
+                    geometry = ((x, y), (x + w, y), (x + w, y + h), (x, y + h))
+                polygons, discs = _stroke_outline(
+                    geometry, half, tag in ("rect", "polygon"),
+                    style["stroke-linejoin"], style["stroke-linecap"], style["stroke-miterlimit"]
+                )
+
+                def draw_stroke(draw, color):
+                    for polygon in polygons:
+                        draw.polygon([point(*p) for p in polygon], fill=color)
+                    for cx, cy in discs:
+                        draw.ellipse(box(cx - half, cy - half, cx + half, cy + half), fill=color)
+
+                paint(stroke, draw_stroke)
+
+        if factor == 1:
+            return canvas
+        return canvas.resize((out_width, out_height), Image.Resampling.BOX)
+
+    def _collect(self, element: ET.Element, inherited: dict, shapes: list):
+        for child in element:
+            tag = _tag(child)
+            if tag in ("title", "desc", "metadata"):
+                continue
+            if child.get("transform") or child.get("clip-path") or child.get("mask") or child.get("filter"):
+                raise UnsupportedSVG(f"Unsupported attribute on <{tag}>")
+            own = _style(child)
+            style = {**inherited, **own}
+            # Opacity multiplies down the tree rather than being replaced
+            for name in ("opacity", "fill-opacity", "stroke-opacity"):
+                if name in own and name in inherited:
+                    style[name] = str(_opacity(inherited[name]) * _opacity(own[name]))
+            if tag == "g":
+                self._collect(child, style, shapes)
+            elif tag in self.SHAPES:
+                geometry = _geometry(tag, child)
+                shapes.append((tag, geometry, _resolve_style(style)))
+            else:
+                raise UnsupportedSVG(f"Unsupported element <{tag}>")
+
+def _tag(element: ET.Element) -> str:
+    return element.tag[len(SVG_NS):] if element.tag.startswith(SVG_NS) else element.tag
+
+def _length(value: str) -> float:
+    match = _LENGTH.match(value)
+    if match is None:
+        raise UnsupportedSVG(f"Unsupported length: {value}")
+    return float(match.group(1))
+
+def _opacity(value: str) -> float:
+    """An opacity, as a number or a percentage, clamped to 0..1"""
+    value = value.strip()
+    number = float(value[:-1]) / 100 if value.endswith("%") else float(value)
+    return max(0.0, min(1.0, number))
+
+def _style(element: ET.Element) -> dict:
+    style = {name: element.get(name) for name in SimpleShapesRasterizer.STYLE_ATTRS if element.get(name)}
+    for declaration in (element.get("style") or "").split(";"):
+        if ":" in declaration:
+            name, value = (part.strip() for part in declaration.split(":", 1))
+            if name in SimpleShapesRasterizer.STYLE_ATTRS:
+                style[name] = value
+    return style
+
+def _resolve_style(style: dict) -> dict:
+    """Fill and stroke colors and the stroke geometry of a shape, or UnsupportedSVG"""
+    fill = _paint(style["fill"], style, "fill-opacity")
+    stroke = _paint(style["stroke"], style, "stroke-opacity")
+    stroke_width = _length(style.get("stroke-width", "1"))
+    join = style.get("stroke-linejoin", "miter")
+    cap = style.get("stroke-linecap", "butt")
+    if join not in ("miter", "round", "bevel"):
+        raise UnsupportedSVG(f"Unsupported stroke-linejoin: {join}")
+    if cap not in ("butt", "round", "square"):
+        raise UnsupportedSVG(f"Unsupported stroke-linecap: {cap}")
+    return {
+        "fill": fill,
+        "stroke": stroke if stroke_width > 0 else None,
+        "stroke-width": stroke_width,
+        "stroke-linejoin": join,
+        "stroke-linecap": cap,
+        "stroke-miterlimit": float(style.get("stroke-miterlimit", "4")),
+    }
+
+def _stroke_outline(
+    points: tuple,
+    half: float,
+    closed: bool,
+    join: str,
+    cap: str,
+    miter_limit: float
+) -> tuple[list, list]:
+    """
+    Cover the stroke of a polyline with polygons: one quad per segment, a
+    wedge per join and a square per square cap. Round joins and caps are
+    returned separately as disc centers.
+    """
+    points = [p for i, p in enumerate(points) if i == 0 or p != points[i - 1]]
+    if closed and len(points) > 1 and points[0] == points[-1]:
+        points.pop()
+    if len(points) < 2:
+        return [], []
+    segments = list(zip(points, points[1:] + points[:1])) if closed else list(zip(points, points[1:]))
+
+    normals = []
+    polygons = []
+    for (x0, y0), (x1, y1) in segments:
+        length = math.hypot(x1 - x0, y1 - y0)
+        nx, ny = -(y1 - y0) / length * half, (x1 - x0) / length * half
+        normals.append((nx, ny))
+        polygons.append([(x0 + nx, y0 + ny), (x1 + nx, y1 + ny), (x1 - nx, y1 - ny), (x0 - nx, y0 - ny)])
+
+    discs = []
+    joints = range(len(segments)) if closed else range(1, len(segments))
+    for index in joints:
+        (px, py), _ = segments[index]
+        (ax, ay), (bx, by) = normals[index - 1], normals[index]
+        # The outer side of the turn is the one facing away from the next segment
+        turn = ax * (segments[index][1][0] - px) + ay * (segments[index][1][1] - py)
+        if turn == 0:
+            continue
+        side = -1.0 if turn > 0 else 1.0
+        first, second = (px + side * ax, py + side * ay), (px + side * bx, py + side * by)
+        if join == "round":
+            discs.append((px, py))
+            continue
+        wedge = [(px, py), first, second]
+        # Offset edges meet at the miter tip; SVG bevels miters longer than miter_limit widths
+        sum_x, sum_y = ax + bx, ay + by
+        ratio = 2 * half / math.hypot(sum_x, sum_y) if (sum_x or sum_y) else math.inf
+        if join == "miter" and ratio <= miter_limit:
+            scale = 2 * half * half / (sum_x * sum_x + sum_y * sum_y)
+            wedge.insert(2, (px + side * sum_x * scale, py + side * sum_y * scale))
+        polygons.append(wedge)
+
+    if not closed and cap != "butt":
+        for (x, y), (ox, oy) in ((points[0], points[1]), (points[-1], points[-2])):
+            if cap == "round":
+                discs.append((x, y))
+                continue
+            # A square cap extends the stroke by half its width past the end
+            length = math.hypot(x - ox, y - oy)
+            dx, dy = (x - ox) / length * half, (y - oy) / length * half
+            polygons.append([(x - dy, y + dx), (x - dy + dx, y + dx + dy), (x + dy + dx, y - dx + dy), (x + dy, y - dx)])
+    return polygons, discs
+
+def _geometry(tag: str, element: ET.Element) -> tuple:
+    def number(name: str, default: str = "0") -> float:
+        return _length(element.get(name, default))
+
+    if tag == "rect":
+        if element.get("rx") or element.get("ry"):
+            raise UnsupportedSVG("Rounded rectangles are not supported")
+        return number("x"), number("y"), number("width"), number("height")
+    if tag == "circle":
+        r = number("r")
+        return number("cx"), number("cy"), r, r
+    if tag == "ellipse":
+        return number("cx"), number("cy"), number("rx"), number("ry")
+    if tag == "line":
+        return (number("x1"), number("y1")), (number("x2"), number("y2"))
+    values = [float(v) for v in _POINTS.split((element.get("points") or "").strip()) if v]
+    if len(values) % 2:
+        raise UnsupportedSVG(f"Odd number of coordinates in <{tag}>")
+    return tuple(zip(values[0::2], values[1::2]))
+
+def _paint(value: str, style: dict, opacity_attr: str) -> tuple | None:
+    if value is None or value == "none" or value == "transparent":
+        return None
+    if value.startswith("url("):
+        raise UnsupportedSVG("Gradients and patterns are not supported")
+    try:
+        rgba = ImageColor.getcolor(value, "RGBA")
+    except ValueError:
+        raise UnsupportedSVG(f"Unsupported color: {value}")
+    opacity = _opacity(style.get("opacity", "1")) * _opacity(style.get(opacity_attr, "1"))
+    return (*rgba[:3], round(rgba[3] * opacity))
+
+RASTERIZERS: dict[str, type[SVGRasterizer]] = {
+    backend.name: backend
+    for backend in (SimpleShapesRasterizer, CairoSVGRasterizer, SvglibRasterizer)
+}
+
+def build_rasterizers(name: str) -> list[SVGRasterizer]:
+    """
+    Return the backends to try, in order, for a SVG_RASTERIZER setting.
+
+    "auto" uses the pure-Python backend for the simple shapes it handles,
+    then cairosvg when installed, then svglib.
+    """
+    if name == "auto":
+        return [backend() for backend in RASTERIZERS.values() if backend.available()]
+    if name not in RASTERIZERS:
+        raise ValueError(f"Unknown SVG rasterizer: {name}")
+    backend = RASTERIZERS[name]
+    if not backend.available():
+        raise ValueError(f"SVG rasterizer {name} is not installed")
+    return [backend()]
@@ -0,0 +1,145 @@
+import logging
+import re
+import time
+import uuid
+from dataclasses import dataclass, field
+from PIL import Image
+from app.core.config import settings
+from app.models.request import GenerateRequest, TemplateRenderRequest
+from app.services.image_processor import ImageProcessor, RenderResult
+from app.services.lru_cache import LRUCache
+from app.services.render_cost import estimate_cost, source_size
+
+logger = logging.getLogger(__name__)
+
+# Placeholders in template text look like {name}
+PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+class TemplateNotFound(Exception):
+    """Raised when a template id is unknown or was evicted"""
+
+class TemplateValueError(ValueError):
+    """Raised when render values do not match the template placeholders"""
+
+@dataclass
+class RenderTemplate:
+    id: str
+    request: GenerateRequest
+    base: Image.Image
+    svg_sprites: list
+    fonts: list
+    font_generation: int
+    created_at: float = field(default_factory=time.time)
+
+    def describe(self) -> dict:
+        return {
+            "template_id": self.id,
+            "width": self.base.width,
+            "height": self.base.height,
+            "output_format": self.request.output_format,
+            "variables": sorted({
+                name for item in self.request.items for name in PLACEHOLDER.findall(item.text)
+            }),
+            "items": [item.model_dump() for item in self.request.items],
+            "created_at": self.created_at,
+        }
+
+def fill_placeholders(text: str, values: dict) -> str:
+    """Replace {name} placeholders with values; unknown names are an error"""
+    def replace(match):
+        name = match.group(1)
+        if name not in values:
+            raise TemplateValueError(f"Missing value for template variable '{name}'")
+        return str(values[name])
+    return PLACEHOLDER.sub(replace, text)
+
+class TemplateStore:
+    """
+    Pre-processed render templates.
+
+    Registering a template downloads and decodes the base image, applies
+    background removal, rasterizes the SVG overlays and resolves the fonts
+    once. Rendering then only draws the text, composites the prepared
+    overlays and encodes the result. Templates are held in memory within
+    a byte budget, least recently used first out.
+
+    Templates are prepared and drawn on render threads even when
+    RENDER_EXECUTOR is "process", so their decoded pixels stay in this
+    process instead of being pickled to a worker on every render.
+    """
+
+    def __init__(self, image_processor: ImageProcessor):
+        self.image_processor = image_processor
+        self._templates = LRUCache(
+            max_entries=settings.TEMPLATE_MAX_COUNT,
+            max_bytes=settings.TEMPLATE_CACHE_MAX_BYTES
+        )
+
+    async def create(self, request: GenerateRequest) -> RenderTemplate:
+        processor = self.image_processor
+        source = await processor.image_cache.fetch(str(request.image_url))
+        cost = estimate_cost(request, source_size(source))
+        base, svg_sprites = await processor.render_executor.run(
+            processor.prepare_template, source, request, cost=cost, threaded=True
+        )
+        template = RenderTemplate(
+            id=uuid.uuid4().hex,
+            request=request,
+            base=base,
+            svg_sprites=svg_sprites,
+            fonts=[],
+            font_generation=-1
+        )
+        await self._resolve_fonts(template)
+        size = base.width * base.height * 4 + sum(
+            sprite.width * sprite.height * 4 for sprite, _ in svg_sprites
+        )
+        self._templates.put(template.id, template, size=size)
+        return template
+
+    def get(self, template_id: str) -> RenderTemplate:
+        template = self._templates.get(template_id)
+        if template is None:
+            raise TemplateNotFound(f"Template {template_id} not found")
+        return template
+
+    def delete(self, template_id: str):
+        if self._templates.pop(template_id) is None:
+            raise TemplateNotFound(f"Template {template_id} not found")
+
+    async def render(self, template_id: str, render_request: TemplateRenderRequest) -> RenderResult:
+        template = self.get(template_id)
+        processor = self.image_processor
+
+        # Fonts were uploaded or deleted since the fonts were resolved
+        if template.font_generation != processor.font_manager.generation:
+            await self._resolve_fonts(template)
+
+        items = [
+            item.model_copy(update={"text": fill_placeholders(item.text, render_request.values)})
+            for item in template.request.items
+        ]
+        output_format = render_request.output_format or template.request.output_format
+        # Only text and encoding are left to do; the base is already composed
+        cost = estimate_cost(
+            template.request.model_copy(update={"output_format": output_format}),
+            template.base.size,
+            prepared=True
+        )
+        with processor.output_store.writing():
+            result = await processor.render_executor.run(
+                processor.draw_template, template.base, template.svg_sprites, template.request,
+                items, template.fonts, output_format, render_request.delivery,
+                cost=cost, threaded=True
+            )
+            if render_request.delivery == "url":
+                processor.output_store.add_result(result)
+        return result
+
+    def stats(self) -> dict:
+        return self._templates.stats()
+
+    async def _resolve_fonts(self, template: RenderTemplate):
+        processor = self.image_processor
+        template.font_generation = processor.font_manager.generation
+        template.fonts = await processor.resolve_fonts(template.request)
@@ -0,0 +1,226 @@
+import itertools
+import weakref
+from dataclasses import dataclass
+from PIL import Image, ImageColor, ImageDraw, ImageFont
+from app.core.config import settings
+from app.services.lru_cache import LRUCache
+
+# Distinct words measured per font before that font's table is reset
+WORD_CACHE_SIZE = 4096
+
+# Advance widths of words per font; entries go away with the font
+_advances: "weakref.WeakKeyDictionary[ImageFont.FreeTypeFont, dict[str, float]]" = weakref.WeakKeyDictionary()
+
+# Never-reused identities for fonts loaded from memory rather than a file
+_font_tokens: "weakref.WeakKeyDictionary[ImageFont.FreeTypeFont, int]" = weakref.WeakKeyDictionary()
+_next_token = itertools.count()
+
+def measure(font: ImageFont.FreeTypeFont, text: str) -> float:
+    """Advance width of text, cached per font"""
+    widths = _advances.get(font)
+    if widths is None:
+        widths = _advances[font] = {}
+    width = widths.get(text)
+    if width is None:
+        if len(widths) >= WORD_CACHE_SIZE:
+            widths.clear()
+        width = widths[text] = font.getlength(text)
+    return width
+
+def wrap_text(text: str, font: ImageFont.FreeTypeFont, max_width: float) -> list[str]:
+    """
+    Greedily break text into lines no wider than max_width.
+
+    Each distinct word and the space are measured once per font and line
+    widths are accumulated from them. Because kerning can make a joined line
+    differ slightly from the sum of its parts, the exact line is measured
+    only when the running total lands within a space's width of the limit.
+    Words wider than max_width are broken between characters.
+    """
+    space = measure(font, " ")
+    lines = []
+    current: list[str] = []
+    width = 0.0
+
+    for word in text.split():
+        word_width = measure(font, word)
+
+        if current:
+            candidate = width + space + word_width
+            if candidate <= max_width - space:
+                current.append(word)
+                width = candidate
+                continue
+            if candidate <= max_width + space:
+                exact = font.getlength(" ".join(current) + " " + word)
+                if exact <= max_width:
+                    current.append(word)
+                    width = exact
+                    continue
+            lines.append(" ".join(current))
+            current, width = [], 0.0
+
+        if word_width > max_width:
+            # The full chunks get their own lines; the tail starts the next line
+            chunks = _break_word(word, font, max_width)
+            lines.extend(chunks[:-1])
+            word = chunks[-1]
+            word_width = measure(font, word)
+
+        current, width = [word], word_width
+
+    if current:
+        lines.append(" ".join(current))
+
+    return lines
+
+def _break_word(word: str, font: ImageFont.FreeTypeFont, max_width: float) -> list[str]:
+    """Split a word into the longest prefixes that fit max_width"""
+    chunks = []
+    while word:
+        # Binary search the longest prefix that fits, always at least one char
+        low, high = 1, len(word)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if font.getlength(word[:mid]) <= max_width:
+                low = mid
+            else:
+                high = mid - 1
+        chunks.append(word[:low])
+        word = word[low:]
+    return chunks
+
+@dataclass(frozen=True)
+class TextLayout:
+    """Lines of a text item with their draw offsets from the item position"""
+    lines: tuple[tuple[str, tuple[int, int]], ...]
+
+def layout_text(font: ImageFont.FreeTypeFont, text: str, max_width: int | None) -> TextLayout:
+    """
+    Place text relative to its anchor position.
+
+    Wrapped text is centered horizontally on the anchor with the first line
+    starting at it; single-line text is centered on the anchor both ways.
+    """
+    if max_width:
+        bbox = font.getbbox("A")
+        line_height = bbox[3] - bbox[1]
+        lines = []
+        y_offset = 0
+        for line in wrap_text(text, font, max_width):
+            bbox = font.getbbox(line)
+            text_width = bbox[2] - bbox[0]
+            lines.append((line, (-(text_width // 2), y_offset)))
+            y_offset += line_height + 5
+        return TextLayout(tuple(lines))
+
+    bbox = font.getbbox(text)
+    text_width = bbox[2] - bbox[0]
+    text_height = bbox[3] - bbox[1]
+    return TextLayout(((text, (-(text_width // 2), -(text_height // 2))),))
+
+def font_key(font: ImageFont.FreeTypeFont) -> tuple:
+    """Identity of a font face and size, shared by fonts loaded from the same file"""
+    path = getattr(font, "path", None)
+    if isinstance(path, str):
+        return (path, font.index, font.size, font.layout_engine)
+    # In-memory fonts (such as Pillow's built-in default) get a token instead
+    token = _font_tokens.get(font)
+    if token is None:
+        token = _font_tokens.setdefault(font, next(_next_token))
+    return ("memory", token)
+
+class TextLayoutCache:
+    """
+    Bounded cache of text layouts keyed by font identity and text parameters.
+
+    A hit skips wrapping and every bbox measurement.
+    """
+
+    def __init__(self, max_entries: int | None = None):
+        self._cache = LRUCache(
+            max_entries=settings.TEXT_LAYOUT_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        )
+
+    def get(self, font: ImageFont.FreeTypeFont, text: str, max_width: int | None) -> TextLayout:
+        key = (font_key(font), text, max_width)
+        layout = self._cache.get(key)
+        if layout is None:
+            layout = layout_text(font, text, max_width)
+            self._cache.put(key, layout)
+        return layout
+
+    def clear(self):
+        """Drop every layout, e.g. after a font file was replaced"""
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+# Per-entry bookkeeping on top of the mask pixels
+SPRITE_OVERHEAD_BYTES = 256
+
+class TextSpriteCache:
+    """
+    Memory-bounded cache of rasterized text lines.
+
+    Stores the coverage mask FreeType renders for a line of text in a given
+    font; drawing a cached line only pastes the color through the mask, the
+    same final step ``ImageDraw.text`` performs. Masks carry no color, so a
+    label is shared by every color it is drawn in.
+    """
+
+    # Modes ImageDraw draws anti-aliased text in with plain color fills
+    SPRITE_MODES = ("L", "LA", "RGB", "RGBA")
+
+    def __init__(self, max_bytes: int | None = None):
+        self._cache = LRUCache(
+            max_bytes=settings.TEXT_SPRITE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        )
+
+    def draw_text(
+        self,
+        image: Image.Image,
+        xy: tuple[int, int],
+        text: str,
+        font: ImageFont.FreeTypeFont,
+        fill: str
+    ):
+        """Draw a line of text onto image like ImageDraw.text would"""
+        if (
+            "\n" in text or "\r" in text
+            or not isinstance(font, ImageFont.FreeTypeFont)
+            or image.mode not in self.SPRITE_MODES
+        ):
+            # Multiline text, bitmap fonts and other modes take ImageDraw's own path
+            ImageDraw.Draw(image).text(xy, text, font=font, fill=fill)
+            return
+
+        key = (font_key(font), text)
+        sprite = self._cache.get(key)
+        if sprite is None:
+            sprite = self._rasterize(text, font)
+            mask, _ = sprite
+            self._cache.put(key, sprite, size=mask.width * mask.height + SPRITE_OVERHEAD_BYTES)
+
+        mask, (left, top) = sprite
+        if mask.width and mask.height:
+            color = ImageColor.getcolor(fill, image.mode)
+            image.paste(color, (int(xy[0]) + left, int(xy[1]) + top), mask)
+
+    @staticmethod
+    def _rasterize(text: str, font: ImageFont.FreeTypeFont) -> tuple[Image.Image, tuple[int, int]]:
+        """Coverage mask of text cropped to its bounding box, and the box's offset"""
+        left, top, right, bottom = font.getbbox(text)
+        mask = Image.new("L", (max(right - left, 0), max(bottom - top, 0)))
+        if mask.width and mask.height:
+            # Full ink over black leaves exactly the coverage FreeType rendered
+            ImageDraw.Draw(mask).text((-left, -top), text, font=font, fill=255)
+        return mask, (left, top)
+
+    def clear(self):
+        """Drop every sprite, e.g. after a font file was replaced"""
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
@@ -0,0 +1,67 @@
+"""
+Admission middleware benchmark.
+
+Per-request overhead of AdmissionMiddleware (token bucket plus adaptive
+concurrency limit) around an ASGI app that answers immediately, compared
+with calling that app directly.
+
+    python -m benchmarks.bench_admission [--requests 200000] [--clients 1000]
+"""
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+from app.api.middleware import AdmissionMiddleware
+from app.core.config import settings
+from app.services.admission import RateLimiter, AdaptiveConcurrencyLimit
+
+async def endpoint(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+async def send(message):
+    pass
+
+async def timed(app, scopes: list[dict]) -> float:
+    start = time.perf_counter()
+    for scope in scopes:
+        await app(scope, receive, send)
+    return (time.perf_counter() - start) / len(scopes)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--clients", type=int, default=1000)
+    args = parser.parse_args()
+
+    services = SimpleNamespace(
+        rate_limiter=RateLimiter(per_minute=10**9),
+        concurrency_limit=AdaptiveConcurrencyLimit(initial=64)
+    )
+    app = SimpleNamespace(state=SimpleNamespace(services=services))
+    middleware = AdmissionMiddleware(endpoint)
+
+    print(f"{'path':>10} {'direct':>10} {'middleware':>12} {'overhead':>10}")
+    for name, path in (("api", "/fonts/list"), ("render", "/generate/")):
+        scopes = [
+            {
+                "type": "http",
+                "path": settings.API_V1_STR + path,
+                "method": "POST",
+                "client": (f"10.0.{i % args.clients // 256}.{i % 256}", 40000),
+                "app": app,
+            }
+            for i in range(args.requests)
+        ]
+        direct = asyncio.run(timed(endpoint, scopes))
+        limited = asyncio.run(timed(middleware, scopes))
+        print(
+            f"{name:>10} {direct * 1e6:8.2f}us {limited * 1e6:10.2f}us "
+            f"{(limited - direct) * 1e6:8.2f}us"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Output encoder benchmark.
+
+Encode time and output size for every encoder profile and output format on
+a photo-like image with text.
+
+    python -m benchmarks.bench_encoder [--size 1920x1080]
+"""
+import argparse
+import time
+from io import BytesIO
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+from app.models.request import EncoderOptions
+from app.services.encoder import ENCODER_PROFILES, encode
+
+FORMATS = ["png", "jpg", "webp"]
+
+def make_image(width: int, height: int) -> Image.Image:
+    """Smooth gradients with noise and a caption, like a typical render"""
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:height, 0:width]
+    pixels = np.stack([
+        (x * 255 // max(width - 1, 1)),
+        (y * 255 // max(height - 1, 1)),
+        ((x + y) * 255 // max(width + height - 2, 1)),
+    ], axis=-1).astype(np.int16)
+    pixels += rng.integers(-12, 13, size=pixels.shape, dtype=np.int16)
+    image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), "RGB").filter(ImageFilter.SMOOTH)
+    image = image.convert("RGBA")
+    ImageDraw.Draw(image).text((width // 10, height // 2), "Benchmark caption", fill="#FFFFFF")
+    return image
+
+def timed_encode(image: Image.Image, output_format: str, profile: str, repeat: int):
+    options = EncoderOptions(profile=profile)
+    best, size = float("inf"), 0
+    for _ in range(repeat):
+        buffer = BytesIO()
+        start = time.perf_counter()
+        encode(image, output_format, buffer, options)
+        best = min(best, time.perf_counter() - start)
+        size = buffer.tell()
+    return best, size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", default="1920x1080")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.split("x"))
+    image = make_image(width, height)
+
+    print(f"{'format':>6} {'profile':>9} {'time':>10} {'size':>10}")
+    for output_format in FORMATS:
+        for profile in ENCODER_PROFILES:
+            seconds, size = timed_encode(image, output_format, profile, args.repeat)
+            print(f"{output_format:>6} {profile:>9} {seconds * 1000:8.1f}ms {size / 1024:8.1f}KB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Render lane benchmark.
+
+Latency of small label renders while heavy renders (connected background
+removal on a large source) keep arriving, with the heavy lane enabled and
+with every render sharing one lane.
+
+    python -m benchmarks.bench_lanes [--light 200] [--heavy 16] [--workers 4]
+"""
+import argparse
+import asyncio
+import hashlib
+import time
+from io import BytesIO
+from PIL import Image
+from app.models.request import RenderSpec
+from app.services.image_cache import SourceImage
+from app.services.image_processor import ImageProcessor
+from app.services.render_executor import RenderExecutor
+
+def make_source(size: tuple[int, int]) -> SourceImage:
+    buffer = BytesIO()
+    Image.new("RGB", size, (255, 255, 255)).save(buffer, format="JPEG")
+    data = buffer.getvalue()
+    return SourceImage(data, hashlib.sha256(data).hexdigest())
+
+def make_spec(text: str, **overrides) -> RenderSpec:
+    data = {
+        "output_format": "png",
+        "items": [{"text": text, "position": [40, 20], "font_family": "Arial", "font_size": 14}],
+        "font_family": "Arial",
+        "delivery": "inline",
+    }
+    data.update(overrides)
+    return RenderSpec(**data)
+
+async def run(args, heavy_cost: float) -> list[float]:
+    executor = RenderExecutor(
+        kind="thread",
+        workers=args.workers,
+        queue_size=args.light + args.heavy,
+        heavy_workers=max(1, args.workers // 2),
+        heavy_queue_size=args.heavy,
+        heavy_cost=heavy_cost
+    )
+    processor = ImageProcessor(render_executor=executor)
+    small, large = make_source((400, 200)), make_source((3000, 2000))
+
+    async def light(index: int) -> float:
+        # Spread the labels over the time the heavy renders take
+        await asyncio.sleep(index * args.interval)
+        start = time.perf_counter()
+        await processor.process_image(make_spec(f"Label {index}"), source=small)
+        return time.perf_counter() - start
+
+    async def heavy(index: int):
+        spec = make_spec(f"Heavy {index}", remove_background=True, background_mode="connected")
+        await processor.process_image(spec, source=large)
+
+    try:
+        results = await asyncio.gather(
+            *(heavy(i) for i in range(args.heavy)),
+            *(light(i) for i in range(args.light))
+        )
+    finally:
+        executor.shutdown()
+        processor.shutdown()
+    return sorted(results[args.heavy:])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--light", type=int, default=200)
+    parser.add_argument("--heavy", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--interval", type=float, default=0.01, help="seconds between label renders")
+    args = parser.parse_args()
+
+    print(f"{'mode':>10} {'p50':>10} {'p99':>10} {'max':>10}")
+    for mode, heavy_cost in (("one lane", float("inf")), ("two lanes", None)):
+        latencies = asyncio.run(run(args, heavy_cost))
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[int(len(latencies) * 0.99)]
+        print(f"{mode:>10} {p50 * 1000:8.1f}ms {p99 * 1000:8.1f}ms {latencies[-1] * 1000:8.1f}ms")
+
+if __name__ == "__main__":
+    main()
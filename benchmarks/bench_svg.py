@@ -0,0 +1,72 @@
+"""
+SVG rasterizer benchmark.
+
+Times parse and raster separately for every installed backend over a corpus
+of typical overlays (icons, badges, logos). Backends that cannot render a
+file report why instead of a time.
+
+    python -m benchmarks.bench_svg [--corpus benchmarks/svg_corpus] [--repeat 5]
+"""
+import argparse
+import time
+from pathlib import Path
+from app.services.svg_rasterizers import RASTERIZERS, UnsupportedSVG
+
+CORPUS_DIR = Path(__file__).parent / "svg_corpus"
+
+def timed(fn, *args, repeat: int = 5):
+    """Best time over repeat runs and the last result"""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus", type=Path, default=CORPUS_DIR, help="Directory of .svg files")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = sorted(args.corpus.glob("*.svg"))
+    backends = []
+    for name, backend in RASTERIZERS.items():
+        if backend.available():
+            backends.append(backend())
+        else:
+            print(f"{name}: not installed, skipped")
+
+    print(f"{'file':<20} {'backend':<10} {'parse':>10} {'raster':>10} {'total':>10}")
+    totals = {backend.name: 0.0 for backend in backends}
+    supported = {backend.name: 0 for backend in backends}
+    for path in corpus:
+        svg_data = path.read_text()
+        for backend in backends:
+            try:
+                parse_time, _ = timed(backend.parse, svg_data, repeat=args.repeat)
+                # Some backends mutate what they parse, so render a fresh parse each run
+                raster_time = min(
+                    timed(backend.render, backend.parse(svg_data), repeat=1)[0]
+                    for _ in range(args.repeat)
+                )
+            except Exception as e:
+                status = "unsupported" if isinstance(e, UnsupportedSVG) else "failed"
+                print(f"{path.name:<20} {backend.name:<10} {status}: {str(e).splitlines()[0][:60]}")
+                continue
+            totals[backend.name] += parse_time + raster_time
+            supported[backend.name] += 1
+            print(
+                f"{path.name:<20} {backend.name:<10} {parse_time * 1000:8.2f}ms "
+                f"{raster_time * 1000:8.2f}ms {(parse_time + raster_time) * 1000:8.2f}ms"
+            )
+
+    print()
+    for backend in backends:
+        print(
+            f"{backend.name:<10} rendered {supported[backend.name]}/{len(corpus)} files "
+            f"in {totals[backend.name] * 1000:.2f}ms"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,7 @@ setup(
         "python-dotenv==1.0.1",
         "svglib==1.5.1",
         "reportlab==4.0.9",
+        "numpy==1.26.4",
     ],
     extras_require={
         "test": [
@@ -24,6 +25,10 @@ setup(
             "pytest-asyncio==0.23.5",
             "httpx==0.26.0",
         ],
+        # Faster native SVG rasterizer, used automatically when installed
+        "cairosvg": [
+            "cairosvg==2.7.1",
+        ],
     },
     python_requires=">=3.10",
 ) 
\ No newline at end of file
@@ -1,3 +1,11 @@
+import os
+import tempfile
+# Databases and logs written by the suite go to a scratch directory, not the
+# source tree; set before app.core.config is imported so Settings picks it up
+_scratch_dir = tempfile.mkdtemp(prefix="textsnap-tests-")
+os.environ["DATA_DIR"] = os.path.join(_scratch_dir, "data")
+os.environ["LOGS_DIR"] = os.path.join(_scratch_dir, "logs")
+
 import pytest
 from fastapi.testclient import TestClient
 from pathlib import Path
@@ -8,7 +16,9 @@ import sys
 import warnings
 from app.core.config import settings
 from app.main import app
-import os
+import hashlib
+from io import BytesIO
+from app.services.image_cache import SourceImage
 
 # Suppress asyncio-related warnings
 warnings.filterwarnings("ignore", message="Exception ignored.*ProactorBasePipeTransport.*")
@@ -17,9 +27,15 @@ warnings.filterwarnings("ignore", message="Exception ignored.*_ProactorBasePipeT
 if sys.platform.startswith('win'):
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_scratch_dir, ignore_errors=True)
+
 @pytest.fixture(scope="session")
 def test_client():
     """Create a test client for the FastAPI application."""
+    # The whole suite shares one client address; rate limiting has its own tests.
+    # The limiter is built from settings when the lifespan starts
+    settings.RATE_LIMIT_PER_MINUTE = 0
     with TestClient(app) as client:
         yield client
 
@@ -76,4 +92,29 @@ def sample_image(test_directories):
     
     # Cleanup
     if os.path.exists(image_path):
-        os.unlink(image_path) 
\ No newline at end of file
+        os.unlink(image_path) 
+
+def make_source(color=(255, 0, 0), size=(8, 8)) -> SourceImage:
+    """A PNG source image of a single color"""
+    buffer = BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="PNG")
+    data = buffer.getvalue()
+    return SourceImage(data, hashlib.sha256(data).hexdigest())
+
+class StaticImageCache:
+    """Serves a fixed in-memory source image instead of downloading one"""
+
+    def __init__(self, source: SourceImage):
+        self.source = source
+        self.urls = []
+
+    async def fetch(self, url: str) -> SourceImage:
+        self.urls.append(url)
+        return self.source
+
+@pytest.fixture
+def static_source(test_client, monkeypatch):
+    """Make the application render on a generated image instead of fetching image_url."""
+    cache = StaticImageCache(make_source(color=(255, 255, 255), size=(64, 48)))
+    monkeypatch.setattr(test_client.app.state.services.image_processor, "image_cache", cache)
+    return cache
@@ -1,5 +1,6 @@
 import os
 import pytest
+import shutil
 from fastapi.testclient import TestClient
 
 def test_get_status(test_client: TestClient, test_directories):
@@ -74,4 +75,33 @@ def test_reset_system(test_client: TestClient, test_directories):
     # Verify directories still exist but are empty
     for dir_path in test_directories.values():
         assert os.path.exists(dir_path)
-        assert len(os.listdir(dir_path)) == 0 
\ No newline at end of file
+        assert len(os.listdir(dir_path)) == 0 
+
+@pytest.mark.parametrize("endpoint", ["cleanup", "reset"])
+def test_cleanup_keeps_fonts(test_client: TestClient, test_directories, endpoint):
+    fonts_dir = test_directories["fonts"]
+    font_manager = test_client.app.state.services.font_manager
+    os.makedirs(os.path.join(fonts_dir, "family"), exist_ok=True)
+    fonts = [
+        os.path.join(fonts_dir, "kept_font.otf"),
+        os.path.join(fonts_dir, "kept_collection.TTC"),
+        os.path.join(fonts_dir, "family", "kept_regular.ttf"),
+    ]
+    for path in fonts:
+        with open(path, "wb") as f:
+            f.write(b"test font content")
+    generation = font_manager.generation
+
+    try:
+        response = test_client.post(f"/api/v1/admin/{endpoint}")
+        assert response.status_code == 200
+        assert all(os.path.exists(path) for path in fonts)
+        # Loaded fonts are dropped and the catalog still lists every file
+        assert font_manager.generation > generation
+        listed = {entry.path for entry in font_manager.catalog.list_fonts()}
+        assert {str(path) for path in fonts} <= listed
+    finally:
+        shutil.rmtree(os.path.join(fonts_dir, "family"), ignore_errors=True)
+        for path in fonts[:2]:
+            if os.path.exists(path):
+                os.unlink(path)
@@ -0,0 +1,176 @@
+import heapq
+import itertools
+import random
+import time
+from fastapi.testclient import TestClient
+from app.services.admission import RateLimiter, AdaptiveConcurrencyLimit
+
+def test_rate_limiter_bursts_then_refills(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    limiter = RateLimiter(per_minute=3)
+
+    assert [limiter.acquire("a")[1] for _ in range(3)] == [0.0, 0.0, 0.0]
+    remaining, retry_after = limiter.acquire("a")
+    assert remaining == 0.0
+    assert retry_after == 20.0
+    # Other clients have their own bucket
+    assert limiter.acquire("b")[1] == 0.0
+
+    now[0] += 20.0
+    assert limiter.acquire("a")[1] == 0.0
+    assert limiter.stats()["rejected"] == 1
+
+def test_rate_limiter_prunes_idle_clients(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    limiter = RateLimiter(per_minute=60, max_clients=2)
+    limiter.acquire("a")
+    limiter.acquire("b")
+    now[0] += 61.0
+    limiter.acquire("c")
+    assert limiter.stats()["clients"] == 1
+
+def test_concurrency_limit_sheds_above_limit():
+    limit = AdaptiveConcurrencyLimit(initial=2, min_limit=1, max_limit=10)
+    first, second = limit.try_acquire(), limit.try_acquire()
+    assert first is not None and second is not None
+    assert limit.try_acquire() is None
+    limit.release(first)
+    assert limit.try_acquire() is not None
+    assert limit.stats()["rejected"] == 1
+
+def _closed_loop(limit: AdaptiveConcurrencyLimit, now: list, clients: int, requests: int, latency) -> int:
+    """
+    Drive limit with clients that send their next request as soon as the last
+    one finished, or 10ms after it was shed; latency(in_flight) gives the
+    duration of an admitted request and whether it is a latency sample.
+    Returns how many requests were shed.
+    """
+    sequence = itertools.count()
+    events = [(now[0], next(sequence), None) for _ in range(clients)]
+    shed = finished = 0
+    while events:
+        now[0], _, request = heapq.heappop(events)
+        if request is not None:
+            limit.release(*request)
+            finished += 1
+        if finished >= requests:
+            # Let the requests in flight finish
+            continue
+        started = limit.try_acquire()
+        if started is None:
+            shed += 1
+            heapq.heappush(events, (now[0] + 0.01, next(sequence), None))
+            continue
+        duration, sample = latency(limit.in_flight)
+        heapq.heappush(events, (now[0] + duration, next(sequence), (started, False, sample)))
+    return shed
+
+def test_concurrency_limit_holds_under_mixed_latency(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    rng = random.Random(1)
+
+    def mixed(in_flight):
+        # 30% render cache hits, 70% renders; nothing is overloaded
+        if rng.random() < 0.3:
+            return 0.002, True
+        return rng.uniform(0.06, 0.1), True
+
+    limit = AdaptiveConcurrencyLimit(initial=32, min_limit=4, max_limit=512, tolerance=2.0)
+    # Fast hits are counted here too, which is stricter than the middleware
+    assert _closed_loop(limit, now, clients=16, requests=20_000, latency=mixed) == 0
+    assert limit.limit >= 32
+    assert limit.stats()["decreases"] == 0
+
+def test_concurrency_limit_shrinks_when_requests_queue(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    workers = [64]
+
+    def queued(in_flight):
+        # Requests beyond the busy workers wait their turn
+        return 0.05 * max(1.0, in_flight / workers[0]), True
+
+    limit = AdaptiveConcurrencyLimit(initial=32, min_limit=4, max_limit=512, tolerance=2.0)
+    _closed_loop(limit, now, clients=48, requests=2_000, latency=queued)
+    # Fast requests while the limit is in use grow it
+    grown = limit.limit
+    assert grown > 48
+
+    # Capacity drops to 8 workers: latency grows with concurrency
+    workers[0] = 8
+    _closed_loop(limit, now, clients=48, requests=2_000, latency=queued)
+    assert limit.limit < 24
+    assert limit.stats()["decreases"] > 0
+
+def test_concurrency_limit_backs_off_once_per_overload_burst(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    limit = AdaptiveConcurrencyLimit(initial=20, min_limit=1, max_limit=100)
+
+    started = [limit.try_acquire() for _ in range(5)]
+    now[0] += 0.01
+    for start in started:
+        limit.release(start, overloaded=True)
+    assert limit.limit == 20 * 0.9
+    assert limit.stats()["decreases"] == 1
+    # Shed requests are not latency samples
+    assert limit.stats()["samples"] == 0
+
+def test_middleware_rate_limits(test_client: TestClient, monkeypatch):
+    services = test_client.app.state.services
+    monkeypatch.setattr(services, "rate_limiter", RateLimiter(per_minute=2))
+
+    response = test_client.get("/api/v1/fonts/list")
+    assert response.headers["x-ratelimit-limit"] == "2"
+    assert response.headers["x-ratelimit-remaining"] == "1"
+    test_client.get("/api/v1/fonts/list")
+    response = test_client.get("/api/v1/fonts/list")
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+    # Generated files are not API requests
+    assert test_client.get("/files/missing.png").status_code == 404
+    # Neither are health checks
+    assert test_client.get("/api/v1/admin/status").status_code == 200
+
+def test_middleware_sheds_renders_over_the_limit(test_client: TestClient, static_source, monkeypatch):
+    services = test_client.app.state.services
+    monkeypatch.setattr(services, "concurrency_limit", AdaptiveConcurrencyLimit(initial=0, min_limit=0))
+    request = {
+        "image_url": "https://example.com/base.png",
+        "output_format": "png",
+        "items": [],
+        "font_family": "Arial"
+    }
+    response = test_client.post("/api/v1/generate/", json=request)
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    # Only render endpoints are limited
+    assert test_client.get("/api/v1/fonts/list").status_code == 200
+    assert services.concurrency_limit.stats()["rejected"] == 1
+
+def test_middleware_samples_only_rendered_successes(test_client: TestClient, static_source, monkeypatch):
+    services = test_client.app.state.services
+    monkeypatch.setattr(services, "concurrency_limit", AdaptiveConcurrencyLimit())
+    request = {
+        "image_url": "https://example.com/base.png",
+        "output_format": "png",
+        "items": [{"text": "Sampled", "position": [1, 1], "font_family": "Arial", "font_size": 9}],
+        "font_family": "Arial"
+    }
+    first = test_client.post("/api/v1/generate/", json=request)
+    again = test_client.post("/api/v1/generate/", json=request)
+    assert first.headers["x-render-cache"] == "miss"
+    assert again.headers["x-render-cache"] == "hit"
+    # Client errors are not latency samples either
+    assert test_client.post("/api/v1/generate/", json={}).status_code == 422
+
+    stats = services.concurrency_limit.stats()
+    assert stats["samples"] == 1
+    assert stats["in_flight"] == 0
+
+    # Reads under the render prefixes are not limited at all
+    monkeypatch.setattr(services, "concurrency_limit", AdaptiveConcurrencyLimit(initial=0, min_limit=0))
+    assert test_client.get("/api/v1/templates/missing").status_code == 404
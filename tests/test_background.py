@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+from PIL import Image
+from app.services.background import remove_background, border_connected
+
+def legacy_remove_background(image: Image.Image) -> Image.Image:
+    new_data = []
+    for item in image.getdata():
+        if item[0] > 200 and item[1] > 200 and item[2] > 200:
+            new_data.append((255, 255, 255, 0))
+        else:
+            new_data.append(item)
+    result = image.copy()
+    result.putdata(new_data)
+    return result
+
+def test_global_mode_matches_legacy_loop():
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(150, 256, size=(40, 30, 4), dtype=np.uint8)
+    image = Image.fromarray(pixels, "RGBA")
+
+    expected = legacy_remove_background(image)
+    result = remove_background(image)
+
+    assert result.tobytes() == expected.tobytes()
+
+def test_key_color_and_tolerance():
+    image = Image.new("RGBA", (4, 1), (0, 200, 0, 255))
+    image.putpixel((0, 0), (10, 190, 10, 255))
+    image.putpixel((1, 0), (40, 150, 40, 255))
+
+    result = remove_background(image, key_color=(0, 200, 0), tolerance=10)
+
+    assert result.getpixel((0, 0))[3] == 0
+    assert result.getpixel((1, 0))[3] == 255
+    assert result.getpixel((2, 0))[3] == 0
+
+def test_connected_mode_keeps_enclosed_regions():
+    # White frame, black ring, white hole in the middle
+    image = Image.new("RGBA", (9, 9), (255, 255, 255, 255))
+    for x in range(2, 7):
+        for y in range(2, 7):
+            image.putpixel((x, y), (0, 0, 0, 255))
+    image.putpixel((4, 4), (255, 255, 255, 255))
+
+    result = remove_background(image, mode="connected")
+
+    assert result.getpixel((0, 0))[3] == 0
+    assert result.getpixel((2, 2))[3] == 255
+    assert result.getpixel((4, 4))[3] == 255
+
+def test_border_connected_follows_winding_paths():
+    # A serpentine corridor that is only reachable from the top-left corner
+    mask = np.zeros((7, 7), dtype=bool)
+    mask[0, 0] = True
+    mask[1, 0:6] = True
+    mask[1:4, 5] = True
+    mask[3, 1:6] = True
+    mask[3:6, 1] = True
+    mask[5, 1:4] = True
+    # An island that does not touch the border
+    island = np.zeros_like(mask)
+    island[5, 5] = True
+
+    reached = border_connected(mask | island)
+
+    assert reached[5, 3]
+    assert not reached[5, 5]
+
+def flood_fill_from_border(mask: np.ndarray) -> np.ndarray:
+    height, width = mask.shape
+    reached = np.zeros_like(mask)
+    stack = [(y, x) for y in range(height) for x in range(width) if y in (0, height - 1) or x in (0, width - 1)]
+    while stack:
+        y, x = stack.pop()
+        if 0 <= y < height and 0 <= x < width and mask[y, x] and not reached[y, x]:
+            reached[y, x] = True
+            stack.extend([(y - 1, x), (y + 1, x), (y, x - 1), (y, x + 1)])
+    return reached
+
+@pytest.mark.parametrize("shape", [(1, 9), (9, 1), (60, 80)])
+def test_border_connected_matches_flood_fill_on_noise(shape):
+    # Near the percolation threshold the background winds through the whole image
+    mask = np.random.default_rng(0).random(shape) < 0.62
+    assert np.array_equal(border_connected(mask), flood_fill_from_border(mask))
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        remove_background(Image.new("RGBA", (2, 2)), mode="magic")
@@ -0,0 +1,85 @@
+import gc
+import weakref
+from app.models.request import GenerateRequest
+from app.services.batch_processor import BatchProcessor
+from app.services.image_cache import SourceImage
+from app.services.image_processor import ImageProcessor
+from conftest import StaticImageCache, make_source
+
+class TrackingImageCache(StaticImageCache):
+    """Hands out a new source object per fetch and remembers which are still alive"""
+
+    def __init__(self, source: SourceImage):
+        super().__init__(source)
+        self.fetched = {}
+
+    async def fetch(self, url: str) -> SourceImage:
+        await super().fetch(url)
+        source = SourceImage(self.source.data, self.source.content_hash)
+        self.fetched[url] = weakref.ref(source)
+        return source
+
+    def alive(self) -> list[str]:
+        return [url for url, ref in self.fetched.items() if ref() is not None]
+
+def make_request(url: str, text: str, **overrides) -> GenerateRequest:
+    data = {
+        "image_url": url,
+        "output_format": "png",
+        "items": [{"text": text, "position": [4, 4], "font_family": "Arial", "font_size": 10}],
+        "font_family": "Arial",
+        "delivery": "inline",
+    }
+    data.update(overrides)
+    return GenerateRequest(**data)
+
+async def test_sources_are_fetched_per_group_and_released():
+    cache = TrackingImageCache(make_source(size=(24, 16)))
+    processor = ImageProcessor(image_cache=cache)
+    events = []
+    process_image = processor.process_image
+
+    async def record(request, source=None):
+        events.append(("render", str(request.image_url), list(cache.urls)))
+        return await process_image(request, source=source)
+
+    processor.process_image = record
+    requests = [
+        make_request("https://example.com/a.png", "one"),
+        make_request("https://example.com/b.png", "two"),
+        make_request("https://example.com/a.png", "three"),
+    ]
+    try:
+        results = await BatchProcessor(processor).run(requests, concurrency=1)
+    finally:
+        processor.render_executor.shutdown()
+
+    assert [item.index for item in results] == [0, 1, 2]
+    assert all(item.error is None for item in results)
+    # Both renders of a.png ran before b.png was downloaded
+    a, b = "https://example.com/a.png", "https://example.com/b.png"
+    assert events == [("render", a, [a]), ("render", a, [a]), ("render", b, [a, b])]
+    # Nothing holds on to the sources once the batch is done
+    gc.collect()
+    assert cache.alive() == []
+
+async def test_failed_download_fails_its_group_only():
+    class FailingCache(StaticImageCache):
+        async def fetch(self, url: str) -> SourceImage:
+            if url.endswith("missing.png"):
+                raise ValueError("not found")
+            return await super().fetch(url)
+
+    processor = ImageProcessor(image_cache=FailingCache(make_source()))
+    requests = [
+        make_request("https://example.com/missing.png", "one"),
+        make_request("https://example.com/a.png", "two"),
+        make_request("https://example.com/missing.png", "three"),
+    ]
+    try:
+        results = [item async for item in BatchProcessor(processor).stream(requests, concurrency=2)]
+    finally:
+        processor.render_executor.shutdown()
+
+    errors = {item.index: item.error for item in results}
+    assert errors == {0: "not found", 1: None, 2: "not found"}
@@ -0,0 +1,38 @@
+from io import BytesIO
+from PIL import Image
+from app.models.request import EncoderOptions
+from app.services.encoder import encode, encoder_params
+
+def test_balanced_profile_is_pillow_default():
+    image = Image.new("RGBA", (64, 64), (10, 200, 30, 255))
+    for fmt in ("png", "jpg", "webp"):
+        default, balanced = BytesIO(), BytesIO()
+        save_image = image.convert("RGB") if fmt == "jpg" else image
+        save_image.save(default, format="JPEG" if fmt == "jpg" else fmt.upper())
+        encode(image, fmt, balanced, EncoderOptions(profile="balanced"))
+        assert default.getvalue() == balanced.getvalue()
+
+def test_explicit_options_override_profile():
+    params = encoder_params("jpg", EncoderOptions(profile="smallest", quality=90))
+    assert params == {"quality": 90, "optimize": True, "progressive": True}
+    assert encoder_params("webp", EncoderOptions(profile="fast", webp_method=3, lossless=True)) == {
+        "quality": 80, "method": 3, "lossless": True
+    }
+    # Options that do not apply to the format are ignored
+    assert encoder_params("png", EncoderOptions(quality=50)) == {"compress_level": 6}
+    assert encoder_params("png", EncoderOptions(profile="smallest", compress_level=3)) == {"compress_level": 3}
+
+def test_default_profile_from_settings(monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "DEFAULT_ENCODER_PROFILE", "fast")
+    assert encoder_params("png") == {"compress_level": 1}
+
+def test_profiles_produce_valid_images():
+    image = Image.effect_noise((96, 96), 64).convert("RGBA")
+    for fmt in ("png", "jpeg", "webp", "pdf"):
+        for profile in ("fast", "balanced", "smallest"):
+            buffer = BytesIO()
+            encode(image, fmt, buffer, EncoderOptions(profile=profile))
+            assert buffer.tell() > 0
+            if fmt != "pdf":
+                assert Image.open(BytesIO(buffer.getvalue())).size == (96, 96)
@@ -0,0 +1,95 @@
+import shutil
+import sqlite3
+import pytest
+from pathlib import Path
+from app.services.font_catalog import FontCatalog, normalize_weight
+
+SYSTEM_FONTS = Path("/usr/share/fonts/truetype/dejavu")
+
+@pytest.fixture
+def font_dir(tmp_path):
+    fonts = tmp_path / "fonts"
+    fonts.mkdir()
+    regular = SYSTEM_FONTS / "DejaVuSans.ttf"
+    bold = SYSTEM_FONTS / "DejaVuSans-Bold.ttf"
+    if not (regular.exists() and bold.exists()):
+        pytest.skip("DejaVu fonts are not installed")
+    shutil.copy(regular, fonts / "DejaVuSans.ttf")
+    shutil.copy(bold, fonts / "DejaVuSans-Bold.ttf")
+    return fonts
+
+def test_normalize_weight():
+    assert normalize_weight("bold") == "bold"
+    assert normalize_weight("700") == "bold"
+    assert normalize_weight("Semi Bold Italic") == "semibold"
+    assert normalize_weight("Regular") == "normal"
+
+def test_lookup_by_family_weight_and_stem(font_dir, tmp_path):
+    catalog = FontCatalog(font_dir, [], db_path=tmp_path / "fonts.db")
+    catalog.build()
+
+    assert catalog.lookup("dejavu sans").stem == "DejaVuSans"
+    assert catalog.lookup("DejaVu Sans", "bold").stem == "DejaVuSans-Bold"
+    assert catalog.lookup("dejavusans-bold").weight == "bold"
+    assert catalog.lookup("missing family") is None
+
+def test_refresh_picks_up_new_files(font_dir, tmp_path):
+    catalog = FontCatalog(font_dir, [], db_path=None)
+    catalog.build()
+    assert catalog.refresh() is False
+
+    (font_dir / "broken.otf").write_bytes(b"not a font")
+    assert catalog.refresh() is True
+    assert "broken" in {entry.stem for entry in catalog.list_fonts()}
+
+def test_warm_restart_skips_font_parsing(font_dir, tmp_path, monkeypatch):
+    db_path = tmp_path / "fonts.db"
+    FontCatalog(font_dir, [], db_path=db_path).build()
+
+    catalog = FontCatalog(font_dir, [], db_path=db_path)
+    monkeypatch.setattr(catalog, "_read_font", lambda path: pytest.fail("font was re-read"))
+    catalog.build()
+
+    assert catalog.lookup("DejaVu Sans", "bold").stem == "DejaVuSans-Bold"
+
+def test_user_font_counters_follow_uploads_and_deletes(font_dir, tmp_path):
+    catalog = FontCatalog(font_dir, [SYSTEM_FONTS], db_path=None)
+    catalog.build()
+    sizes = sum(path.stat().st_size for path in font_dir.iterdir())
+    # System fonts are not in FONTS_DIR and are not counted
+    assert (catalog.user_files, catalog.user_bytes) == (2, sizes)
+
+    (font_dir / "DejaVuSans-Bold.ttf").unlink()
+    catalog.remove_file(font_dir / "DejaVuSans-Bold.ttf")
+    assert catalog.user_files == 1
+    assert catalog.user_bytes == (font_dir / "DejaVuSans.ttf").stat().st_size
+
+def test_refresh_persists_only_changed_directories(font_dir, tmp_path):
+    db_path = tmp_path / "fonts.db"
+    other_dir = tmp_path / "other"
+    other_dir.mkdir()
+    shutil.copy(font_dir / "DejaVuSans.ttf", other_dir / "Other.ttf")
+    catalog = FontCatalog(font_dir, [other_dir], db_path=db_path)
+    catalog.build()
+
+    # Rows of directories that did not change are left as they are
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE font_faces SET style_name = 'untouched' WHERE dir = ?", (str(other_dir),))
+    conn.close()
+    (font_dir / "broken.otf").write_bytes(b"not a font")
+    subdir = font_dir / "family"
+    subdir.mkdir()
+    assert catalog.refresh() is True
+    subdir.rmdir()
+    assert catalog.refresh() is True
+
+    with sqlite3.connect(db_path) as conn:
+        untouched = conn.execute("SELECT style_name FROM font_faces WHERE dir = ?", (str(other_dir),)).fetchall()
+        dirs = {path for path, in conn.execute("SELECT path FROM font_dirs")}
+    conn.close()
+    assert untouched == [("untouched",)]
+    assert dirs == {str(font_dir), str(other_dir)}
+
+    warm = FontCatalog(font_dir, [other_dir], db_path=db_path)
+    warm.build()
+    assert "broken" in {entry.stem for entry in warm.list_fonts()}
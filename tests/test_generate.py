@@ -3,6 +3,10 @@ from fastapi.testclient import TestClient
 import os
 from pathlib import Path
 from app.core.config import settings
+from io import BytesIO
+import zipfile
+import json
+from PIL import Image
 
 def test_generate_image(test_client: TestClient, sample_image):
     # Test data with Lorem Picsum image
@@ -89,4 +93,207 @@ def test_generate_image_invalid_url(test_client: TestClient):
     # Assertions
     assert response.status_code == 422  # FastAPI validation error
     assert "detail" in response.json()
-    assert any("Input should be a valid URL" in error.get("msg", "") for error in response.json()["detail"]) 
\ No newline at end of file
+    assert any("Input should be a valid URL" in error.get("msg", "") for error in response.json()["detail"]) 
+
+def test_generate_image_inline(test_client: TestClient, static_source):
+    test_data = {
+        "image_url": "https://example.com/background.png",
+        "output_format": "jpg",
+        "items": [
+            {
+                "text": "Inline",
+                "position": [32, 24],
+                "font_family": "Arial",
+                "font_size": 12
+            }
+        ],
+        "font_family": "Arial",
+        "delivery": "inline"
+    }
+
+    response = test_client.post("/api/v1/generate/", json=test_data)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/jpeg"
+    assert response.content[:2] == b"\xff\xd8"
+
+def test_generate_image_download_url_is_served(test_client: TestClient, static_source):
+    test_data = {
+        "image_url": "https://example.com/background.png",
+        "output_format": "png",
+        "items": [],
+        "font_family": "Arial"
+    }
+
+    response = test_client.post("/api/v1/generate/", json=test_data)
+
+    assert response.status_code == 200
+    download = test_client.get(response.json()["download_url"])
+    assert download.status_code == 200
+    assert download.headers["content-type"] == "image/png"
+
+def test_identical_requests_reuse_render(test_client: TestClient, static_source, sample_font):
+    render_cache = test_client.app.state.services.render_cache
+    test_data = {
+        "image_url": "https://example.com/cached.png",
+        "output_format": "png",
+        "items": [
+            {
+                "text": "Cached",
+                "position": [32, 24],
+                "font_family": "Arial",
+                "font_size": 12
+            }
+        ],
+        "font_family": "Arial"
+    }
+
+    first = test_client.post("/api/v1/generate/", json=test_data)
+    hits = render_cache.stats()["hits"]
+    second = test_client.post("/api/v1/generate/", json=test_data)
+
+    assert second.json()["download_url"] == first.json()["download_url"]
+    assert render_cache.stats()["hits"] == hits + 1
+
+    # Deleting a font invalidates cached renders
+    test_client.delete("/api/v1/fonts/test_font")
+    assert render_cache.stats()["entries"] == 0
+
+def test_generate_batch(test_client: TestClient, static_source):
+    def make_request(url, text):
+        return {
+            "image_url": url,
+            "output_format": "png",
+            "items": [{"text": text, "position": [32, 24], "font_family": "Arial", "font_size": 12}],
+            "font_family": "Arial"
+        }
+
+    batch = {
+        "requests": [
+            make_request("https://example.com/a.png", "one"),
+            make_request("https://example.com/a.png", "two"),
+            make_request("https://example.com/b.png", "three"),
+        ],
+        "concurrency": 2
+    }
+
+    response = test_client.post("/api/v1/generate/batch", json=batch)
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert all(r["status"] == "success" for r in results)
+    # Each distinct image URL was fetched once
+    assert sorted(static_source.urls) == ["https://example.com/a.png", "https://example.com/b.png"]
+
+def test_generate_batch_zip(test_client: TestClient, static_source):
+    request = {
+        "image_url": "https://example.com/a.png",
+        "output_format": "webp",
+        "items": [],
+        "font_family": "Arial"
+    }
+
+    response = test_client.post(
+        "/api/v1/generate/batch",
+        json={"requests": [request, request], "response_format": "zip"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    with zipfile.ZipFile(BytesIO(response.content)) as archive:
+        # Entries are written as renders finish
+        assert sorted(archive.namelist()) == ["00000.webp", "00001.webp"]
+
+def _multi_output_data(delivery: str) -> dict:
+    return {
+        "image_url": "https://example.com/base.png",
+        "output_format": "png",
+        "items": [
+            {
+                "text": "Many outputs",
+                "position": [32, 24],
+                "font_family": "Arial",
+                "font_size": 10
+            }
+        ],
+        "font_family": "Arial",
+        "delivery": delivery,
+        "outputs": [
+            {"format": "png"},
+            {"format": "webp", "encoder": {"profile": "fast"}},
+            {"format": "jpg", "max_width": 32}
+        ]
+    }
+
+def test_generate_multiple_outputs(test_client: TestClient, static_source):
+    response = test_client.post("/api/v1/generate/", json=_multi_output_data("url"))
+    assert response.status_code == 200
+    outputs = response.json()["outputs"]
+    assert [output["media_type"] for output in outputs] == ["image/png", "image/webp", "image/jpeg"]
+    assert [(output["width"], output["height"]) for output in outputs] == [(64, 48), (64, 48), (32, 24)]
+    assert response.json()["download_url"] == outputs[0]["download_url"]
+    for output in outputs:
+        filename = output["download_url"].split("/")[-1]
+        assert (settings.OUTPUT_DIR / filename).exists()
+
+def test_generate_multiple_outputs_inline_multipart(test_client: TestClient, static_source):
+    response = test_client.post("/api/v1/generate/", json=_multi_output_data("inline"))
+    assert response.status_code == 200
+    content_type = response.headers["content-type"]
+    assert content_type.startswith("multipart/mixed; boundary=")
+    boundary = content_type.split("boundary=")[1].encode()
+    parts = [part for part in response.content.split(b"--" + boundary) if part.strip() not in (b"", b"--")]
+    assert len(parts) == 3
+    headers, body = parts[2].split(b"\r\n\r\n", 1)
+    assert b"Content-Type: image/jpeg" in headers
+    assert Image.open(BytesIO(body.rstrip(b"\r\n"))).size == (32, 24)
+
+def test_generate_too_many_outputs(test_client: TestClient, static_source):
+    data = _multi_output_data("url")
+    data["outputs"] = [{"format": "png"}] * (settings.MAX_OUTPUTS_PER_REQUEST + 1)
+    response = test_client.post("/api/v1/generate/", json=data)
+    assert response.status_code == 400
+
+def _png_bytes(size=(40, 30)) -> bytes:
+    buffer = BytesIO()
+    Image.new("RGB", size, (255, 255, 255)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+def _upload_spec(**overrides) -> str:
+    spec = {
+        "output_format": "png",
+        "items": [{"text": "Uploaded", "position": [20, 15], "font_family": "Arial", "font_size": 10}],
+        "font_family": "Arial",
+        "delivery": "inline"
+    }
+    spec.update(overrides)
+    return json.dumps(spec)
+
+def test_generate_from_upload(test_client: TestClient, static_source):
+    response = test_client.post(
+        "/api/v1/generate/upload",
+        files={"image": ("base.png", _png_bytes(), "image/png")},
+        data={"spec": _upload_spec()}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+    assert Image.open(BytesIO(response.content)).size == (40, 30)
+    # Nothing was fetched
+    assert static_source.urls == []
+
+def test_generate_from_upload_rejects_bad_input(test_client: TestClient, monkeypatch):
+    image = ("base.png", _png_bytes(), "image/png")
+    response = test_client.post("/api/v1/generate/upload", files={"image": image}, data={"spec": "{}"})
+    assert response.status_code == 422
+
+    response = test_client.post(
+        "/api/v1/generate/upload",
+        files={"image": ("base.png", b"not an image", "image/png")},
+        data={"spec": _upload_spec()}
+    )
+    assert response.status_code == 400
+
+    monkeypatch.setattr(settings, "MAX_IMAGE_SIZE", 10)
+    response = test_client.post("/api/v1/generate/upload", files={"image": image}, data={"spec": _upload_spec()})
+    assert response.status_code == 413
@@ -0,0 +1,27 @@
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from app.services.http_client import HTTPClient
+
+async def test_http_client_reuses_connections():
+    async def handler(request):
+        return web.Response(body=b"image-bytes", content_type="image/png")
+
+    app = web.Application()
+    app.router.add_get("/image.png", handler)
+
+    client = HTTPClient()
+    async with TestServer(app) as server:
+        url = str(server.make_url("/image.png"))
+        try:
+            for _ in range(3):
+                async with client.get(url) as response:
+                    assert response.status == 200
+                    assert await response.read() == b"image-bytes"
+        finally:
+            await client.close()
+
+    stats = client.stats()
+    assert stats["requests"] == 3
+    assert stats["connections_created"] == 1
+    assert stats["connections_reused"] == 2
+    assert stats["open"] is False
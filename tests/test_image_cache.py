@@ -0,0 +1,135 @@
+import asyncio
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from app.services.http_client import HTTPClient
+from app.services.image_cache import SourceImageCache, ImageTooLarge, parse_cache_control
+
+def make_app(calls, cache_control="max-age=60"):
+    async def handler(request):
+        calls.append(dict(request.headers))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304, headers={"ETag": '"v1"', "Cache-Control": cache_control})
+        body = request.match_info["name"].encode() * 10
+        return web.Response(body=body, headers={"ETag": '"v1"', "Cache-Control": cache_control})
+
+    app = web.Application()
+    app.router.add_get("/{name}", handler)
+    return app
+
+@pytest.fixture
+async def http_client():
+    client = HTTPClient()
+    yield client
+    await client.close()
+
+def test_parse_cache_control():
+    assert parse_cache_control('max-age=60, no-cache, private') == {
+        "max-age": "60", "no-cache": True, "private": True
+    }
+
+async def test_fresh_entries_skip_network(tmp_path, http_client):
+    calls = []
+    cache = SourceImageCache(http_client, cache_dir=tmp_path, max_bytes=10_000)
+    async with TestServer(make_app(calls)) as server:
+        url = str(server.make_url("/a"))
+        first = await cache.fetch(url)
+        second = await cache.fetch(url)
+
+    assert first.data == second.data == b"a" * 10
+    assert first.content_hash == second.content_hash
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+
+async def test_stale_entries_are_revalidated(tmp_path, http_client):
+    calls = []
+    cache = SourceImageCache(http_client, cache_dir=tmp_path, max_bytes=10_000)
+    async with TestServer(make_app(calls, cache_control="no-cache")) as server:
+        url = str(server.make_url("/a"))
+        await cache.fetch(url)
+        result = await cache.fetch(url)
+
+    assert result.data == b"a" * 10
+    assert calls[1]["If-None-Match"] == '"v1"'
+    assert cache.stats()["revalidations"] == 1
+
+async def test_quota_evicts_least_recently_used(tmp_path, http_client):
+    calls = []
+    cache = SourceImageCache(http_client, cache_dir=tmp_path, max_bytes=25)
+    async with TestServer(make_app(calls)) as server:
+        await cache.fetch(str(server.make_url("/a")))
+        await cache.fetch(str(server.make_url("/b")))
+        await cache.fetch(str(server.make_url("/c")))
+
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["bytes"] == 20
+    assert stats["evictions"] == 1
+    # The evicted entry's files are deleted too
+    assert len(list(cache.blobs_dir.iterdir())) == 2
+    assert len(list(cache.index_dir.iterdir())) == 2
+
+async def test_index_survives_restart(tmp_path, http_client):
+    calls = []
+    cache = SourceImageCache(http_client, cache_dir=tmp_path, max_bytes=10_000)
+    async with TestServer(make_app(calls)) as server:
+        url = str(server.make_url("/a"))
+        await cache.fetch(url)
+
+        restarted = SourceImageCache(http_client, cache_dir=tmp_path, max_bytes=10_000)
+        restarted.load()
+        result = await restarted.fetch(url)
+
+    assert result.data == b"a" * 10
+    assert len(calls) == 1
+
+async def test_concurrent_fetches_share_one_download(tmp_path, http_client):
+    calls = []
+    cache = SourceImageCache(http_client, cache_dir=tmp_path, max_bytes=10_000)
+    async with TestServer(make_app(calls, cache_control="no-store")) as server:
+        url = str(server.make_url("/a"))
+        results = await asyncio.gather(*(cache.fetch(url) for _ in range(5)))
+
+    assert {result.data for result in results} == {b"a" * 10}
+    assert len(calls) == 1
+
+async def test_oversized_downloads_are_rejected(tmp_path, http_client):
+    async def declared(request):
+        return web.Response(body=b"x" * 100)
+
+    async def streamed(request):
+        # Chunked transfer without Content-Length
+        response = web.StreamResponse()
+        await response.prepare(request)
+        for _ in range(10):
+            await response.write(b"x" * 10)
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_get("/declared", declared)
+    app.router.add_get("/streamed", streamed)
+    cache = SourceImageCache(http_client, cache_dir=tmp_path, max_bytes=10_000, max_image_size=50)
+    async with TestServer(app) as server:
+        for path in ("/declared", "/streamed"):
+            with pytest.raises(ImageTooLarge):
+                await cache.fetch(str(server.make_url(path)))
+
+    assert cache.stats()["entries"] == 0
+
+async def test_revalidation_refetches_missing_blob(tmp_path, http_client):
+    calls = []
+    cache = SourceImageCache(http_client, cache_dir=tmp_path, max_bytes=10_000)
+    async with TestServer(make_app(calls, cache_control="no-cache")) as server:
+        url = str(server.make_url("/a"))
+        first = await cache.fetch(url)
+        (cache.blobs_dir / first.content_hash).unlink()
+        result = await cache.fetch(url)
+
+    # The 304 cannot be served without the blob, so the image is fetched again
+    assert result.data == b"a" * 10
+    assert len(calls) == 3
+    assert calls[1]["If-None-Match"] == '"v1"'
+    assert "If-None-Match" not in calls[2]
+    assert (cache.blobs_dir / result.content_hash).exists()
+    assert cache.stats()["entries"] == 1
@@ -0,0 +1,153 @@
+import asyncio
+import shutil
+import threading
+import pytest
+from io import BytesIO
+from pathlib import Path
+from PIL import Image
+from app.core.config import settings
+from app.models.request import GenerateRequest
+from app.services.image_cache import SourceImage
+from app.services.image_processor import (
+    ImageProcessor,
+    _get_worker_processor,
+    _load_worker_font,
+    _render_in_worker,
+)
+from app.services.render_executor import RenderExecutor, RenderQueueFull
+from conftest import StaticImageCache, make_source
+
+def test_decoded_images_are_cached_and_copied():
+    processor = ImageProcessor()
+    source = make_source()
+
+    first = processor._load_base_image(source)
+    first.putpixel((0, 0), (0, 0, 255, 255))
+    second = processor._load_base_image(source)
+
+    assert second.mode == "RGBA"
+    assert second.getpixel((0, 0)) == (255, 0, 0, 255)
+    stats = processor.decoded_cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["bytes"] == 8 * 8 * 4
+
+def make_request(**overrides) -> GenerateRequest:
+    data = {
+        "image_url": "https://example.com/image.png",
+        "output_format": "png",
+        "items": [{"text": "Hello", "position": [20, 20], "font_family": "Arial", "font_size": 12}],
+        "font_family": "Arial",
+    }
+    data.update(overrides)
+    return GenerateRequest(**data)
+
+@pytest.mark.parametrize("kind", ["thread", "process"])
+async def test_render_runs_on_executor(kind, test_directories):
+    executor = RenderExecutor(kind=kind, workers=1, queue_size=0)
+    processor = ImageProcessor(
+        image_cache=StaticImageCache(make_source(color=(255, 255, 255), size=(40, 40))),
+        render_executor=executor
+    )
+    try:
+        result = await processor.process_image(make_request())
+    finally:
+        executor.shutdown()
+
+    with Image.open(settings.OUTPUT_DIR / result.filename) as result:
+        assert result.size == (40, 40)
+        # Some text pixels were drawn
+        assert result.convert("L").getextrema()[0] < 255
+    assert executor.stats()["completed"] == 1
+
+async def test_render_queue_rejects_when_full():
+    executor = RenderExecutor(kind="thread", workers=1, queue_size=0)
+    release = threading.Event()
+    try:
+        first = asyncio.ensure_future(executor.run(release.wait, 5))
+        await asyncio.sleep(0)
+        with pytest.raises(RenderQueueFull):
+            await executor.run(lambda: None)
+        release.set()
+        assert await first is True
+    finally:
+        executor.shutdown()
+    assert executor.stats()["rejected"] == 1
+
+async def test_inline_delivery_skips_disk():
+    processor = ImageProcessor(image_cache=StaticImageCache(make_source(size=(16, 16))))
+    try:
+        result = await processor.process_image(make_request(output_format="webp", delivery="inline"))
+    finally:
+        processor.render_executor.shutdown()
+
+    assert result.filename is None
+    assert result.media_type == "image/webp"
+    with Image.open(BytesIO(result.content)) as image:
+        assert image.format == "WEBP"
+        assert image.size == (16, 16)
+
+@pytest.mark.parametrize("kind", ["thread", "process"])
+async def test_multiple_outputs_share_one_render(kind):
+    executor = RenderExecutor(kind=kind, workers=1, queue_size=0)
+    processor = ImageProcessor(
+        image_cache=StaticImageCache(make_source(size=(40, 20))),
+        render_executor=executor
+    )
+    outputs = [{"format": "png"}, {"format": "webp", "max_width": 10}, {"format": "jpg", "max_height": 5}]
+    try:
+        result = await processor.process_image(make_request(outputs=outputs, delivery="inline"))
+    finally:
+        executor.shutdown()
+        processor.shutdown()
+
+    assert executor.stats()["completed"] == 1
+    assert [variant.media_type for variant in result.variants] == ["image/png", "image/webp", "image/jpeg"]
+    assert [variant.size for variant in result.variants] == [(40, 20), (10, 5), (10, 5)]
+    for variant in result.variants:
+        with Image.open(BytesIO(variant.content)) as image:
+            assert image.size == variant.size
+    assert result.content == result.variants[0].content
+
+def test_target_size_decodes_reduced():
+    buffer = BytesIO()
+    Image.new("RGB", (1600, 1200), (0, 128, 255)).save(buffer, format="JPEG")
+    source = SourceImage(buffer.getvalue(), "camera")
+    processor = ImageProcessor()
+
+    image = processor._load_base_image(source, (400, 400))
+    assert image.mode == "RGBA"
+    assert image.size == (400, 300)
+    # Full-size and reduced decodes are cached separately
+    assert processor._load_base_image(source).size == (1600, 1200)
+    assert processor.decoded_cache.stats()["entries"] == 2
+    assert processor.decoded_cache.stats()["bytes"] == (400 * 300 + 1600 * 1200) * 4
+
+def test_worker_fonts_follow_replaced_files(tmp_path):
+    dejavu = Path("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf")
+    if not dejavu.exists():
+        pytest.skip("DejaVu fonts are not installed")
+    path = tmp_path / "Replaced.ttf"
+
+    # A font that cannot be loaded falls back without being cached
+    missing = _load_worker_font((str(path), 0, 12, 1))
+    assert getattr(missing, "path", None) != str(path)
+    shutil.copy(dejavu, path)
+    first = _load_worker_font((str(path), 0, 12, 1))
+    assert first.path == str(path)
+    assert _load_worker_font((str(path), 0, 12, 1)) is first
+    # A new mtime is a new font
+    assert _load_worker_font((str(path), 0, 12, 2)) is not first
+
+def test_worker_drops_text_caches_when_fonts_change():
+    request = make_request(delivery="inline")
+    source = make_source(color=(255, 255, 255), size=(40, 40))
+    layouts = _get_worker_processor().layout_cache
+    _render_in_worker(source, request, [None], 1)
+
+    misses = layouts.stats()["misses"]
+    _render_in_worker(source, request, [None], 1)
+    assert layouts.stats()["misses"] == misses
+    # Fonts were uploaded or deleted since: the layout is computed again
+    _render_in_worker(source, request, [None], 2)
+    assert layouts.stats()["misses"] > misses
@@ -0,0 +1,165 @@
+import asyncio
+import time
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from fastapi.testclient import TestClient
+from app.models.request import JobCreateRequest
+from app.services.http_client import HTTPClient
+from app.services.image_processor import RenderResult
+from app.services.job_queue import (
+    JobQueue, JobStore, JobQueueFull, JobNotFound, Job, QUEUED, RUNNING, SUCCEEDED, FAILED, EXPIRED
+)
+from app.services.output_store import OutputStore
+
+def _job_data(**overrides):
+    data = {
+        "image_url": "https://example.com/base.png",
+        "output_format": "png",
+        "items": [
+            {
+                "text": "Queued",
+                "position": [32, 24],
+                "font_family": "Arial",
+                "font_size": 12,
+                "color": "#FF0000"
+            }
+        ],
+        "font_family": "Arial",
+        "delivery": "inline"
+    }
+    data.update(overrides)
+    return data
+
+def _wait_for(test_client: TestClient, job_id: str) -> dict:
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        job = test_client.get(f"/api/v1/jobs/{job_id}").json()
+        if job["status"] not in (QUEUED, RUNNING):
+            return job
+        time.sleep(0.05)
+    pytest.fail(f"Job {job_id} did not finish")
+
+def test_job_lifecycle(test_client: TestClient, static_source):
+    response = test_client.post("/api/v1/jobs/", json=_job_data())
+    assert response.status_code == 202
+    body = response.json()
+    assert body["status"] == QUEUED
+    assert body["status_url"].endswith(body["job_id"])
+
+    job = _wait_for(test_client, body["job_id"])
+    assert job["status"] == SUCCEEDED
+    # Inline delivery is replaced by a download URL
+    download = test_client.get(job["result"]["download_url"])
+    assert download.status_code == 200
+    assert download.headers["content-type"] == "image/png"
+
+def test_get_unknown_job(test_client: TestClient):
+    assert test_client.get("/api/v1/jobs/does-not-exist").status_code == 404
+
+def test_job_queue_full(test_client: TestClient, static_source, monkeypatch):
+    monkeypatch.setattr(test_client.app.state.services.job_queue, "max_depth", 0)
+    response = test_client.post("/api/v1/jobs/", json=_job_data())
+    assert response.status_code == 429
+    assert "retry-after" in response.headers
+
+class FakeProcessor:
+    def __init__(self):
+        self.requests = []
+
+    async def process_image(self, request):
+        self.requests.append(request)
+        return RenderResult(media_type="image/png", content=b"", filename="out.png", size=(1, 1))
+
+def test_jobs_survive_restart(tmp_path):
+    store = JobStore(tmp_path / "jobs.db")
+    request = JobCreateRequest(**_job_data())
+
+    async def scenario():
+        # Queued but never started: the process stopped before any worker ran
+        first = JobQueue(FakeProcessor(), http_client=None, store=store, workers=1, max_depth=1)
+        job = await first.submit(request)
+        with pytest.raises(JobQueueFull):
+            await first.submit(request)
+        # A job that was mid-render when the process stopped
+        interrupted = Job(id="interrupted", status=RUNNING, request=job.request, created_at=job.created_at + 1)
+        store.save(interrupted)
+
+        processor = FakeProcessor()
+        second = JobQueue(processor, http_client=None, store=store, workers=1)
+        await second.start()
+        assert second.depth == 2
+        await second._queue.join()
+        await second.stop()
+        return job, processor
+
+    job, processor = asyncio.run(scenario())
+    assert len(processor.requests) == 2
+    assert all(request.delivery == "url" for request in processor.requests)
+    for job_id in (job.id, "interrupted"):
+        finished = store.get(job_id)
+        assert finished.status == SUCCEEDED
+        assert finished.result == {"download_url": "/files/out.png"}
+
+async def test_webhook_receives_finished_job(tmp_path):
+    received = []
+
+    async def hook(request):
+        received.append(await request.json())
+        return web.Response(status=204)
+
+    async def broken(request):
+        return web.Response(status=500)
+
+    app = web.Application()
+    app.router.add_post("/hook", hook)
+    app.router.add_post("/broken", broken)
+
+    http_client = HTTPClient()
+    queue = JobQueue(FakeProcessor(), http_client, store=JobStore(tmp_path / "jobs.db"), workers=1)
+    async with TestServer(app) as server:
+        try:
+            await queue.start()
+            for path in ("/hook", "/broken"):
+                request = JobCreateRequest(**_job_data(webhook_url=str(server.make_url(path))))
+                job = await queue.submit(request)
+            await queue._queue.join()
+        finally:
+            await queue.stop()
+            await http_client.close()
+
+    assert len(received) == 1
+    assert received[0]["status"] == SUCCEEDED
+    assert received[0]["result"] == {"download_url": "/files/out.png"}
+    assert queue.stats()["webhook_failures"] == 1
+    # A failed webhook does not fail the job
+    assert (await queue.get(job.id)).status == SUCCEEDED
+
+async def test_finished_jobs_expire(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    store = JobStore(tmp_path / "jobs.db")
+    output_store = OutputStore(output_dir=tmp_path, ttl=60, max_bytes=10**6)
+    queue = JobQueue(
+        FakeProcessor(), http_client=None, store=store, output_store=output_store, retention=120
+    )
+    output_store.add("out.png", 1)
+    result = {"download_url": "/files/out.png"}
+    store.save(Job("done", SUCCEEDED, "{}", result=result, created_at=now[0], finished_at=now[0]))
+    store.save(Job("broken", FAILED, "{}", error="boom", created_at=now[0], finished_at=now[0]))
+    store.save(Job("waiting", QUEUED, "{}", created_at=now[0]))
+    assert (await queue.get("done")).result == result
+
+    # The output store deleted the file, the job row is still retained
+    now[0] += 61
+    await output_store.collect()
+    job = await queue.get("done")
+    assert job.status == EXPIRED
+    assert job.result is None and job.error
+
+    now[0] += 60
+    assert await queue.prune() == 2
+    for job_id in ("done", "broken"):
+        with pytest.raises(JobNotFound):
+            await queue.get(job_id)
+    assert (await queue.get("waiting")).status == QUEUED
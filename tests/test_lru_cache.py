@@ -0,0 +1,45 @@
+from app.services.lru_cache import LRUCache
+
+def test_lru_evicts_by_entry_count():
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    # Touch "a" so that "b" becomes least recently used
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert cache.evictions == 1
+
+def test_lru_evicts_by_memory():
+    cache = LRUCache(max_bytes=100)
+    cache.put("a", "x", size=60)
+    cache.put("b", "y", size=60)
+
+    assert "a" not in cache
+    assert cache.current_bytes == 60
+    # Values larger than the whole budget are never cached
+    assert cache.put("big", "z", size=101) is False
+    assert "b" in cache
+
+def test_lru_stats():
+    cache = LRUCache(max_entries=10)
+    cache.put("a", 1)
+    cache.get("a")
+    cache.get("missing")
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+def test_services_are_application_scoped(test_client):
+    services = test_client.app.state.services
+
+    test_client.get("/api/v1/admin/status")
+
+    assert test_client.app.state.services is services
+    assert services.image_processor.font_manager is services.font_manager
@@ -0,0 +1,90 @@
+import asyncio
+import os
+import time
+from fastapi.testclient import TestClient
+from app.services.image_processor import RenderResult
+from app.services.output_store import OutputStore
+
+def write(store: OutputStore, filename: str, size: int) -> str:
+    (store.output_dir / filename).write_bytes(b"x" * size)
+    store.add(filename, size)
+    return filename
+
+def test_quota_evicts_least_recently_handed_out(tmp_path):
+    store = OutputStore(output_dir=tmp_path, ttl=3600, max_bytes=25, batch_size=1)
+    write(store, "a.png", 10)
+    write(store, "b.png", 10)
+    # Handing "a" out again makes "b" the oldest
+    assert store.touch("a.png")
+    write(store, "c.png", 10)
+
+    assert not store.touch("b.png")
+    assert store.stats()["bytes"] == 20
+    assert store.stats()["evictions"] == 1
+    # Removed from the index at once, from disk by the next collection
+    assert (tmp_path / "b.png").exists()
+    assert asyncio.run(store.collect()) == 1
+    assert sorted(os.listdir(tmp_path)) == ["a.png", "c.png"]
+
+def test_expired_files_are_deleted(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    store = OutputStore(output_dir=tmp_path, ttl=60, max_bytes=10**6, batch_size=2)
+    for name in ("a", "b", "c"):
+        write(store, f"{name}.png", 1)
+    now[0] += 30
+    store.touch("c.png")
+    now[0] += 31
+
+    assert asyncio.run(store.collect()) == 2
+    assert os.listdir(tmp_path) == ["c.png"]
+    assert store.stats()["expired"] == 2
+
+def test_load_indexes_existing_files(tmp_path):
+    (tmp_path / "old.png").write_bytes(b"x" * 5)
+    (tmp_path / "new.png").write_bytes(b"x" * 7)
+    stale = time.time() - 7200
+    os.utime(tmp_path / "old.png", (stale, stale))
+
+    store = OutputStore(output_dir=tmp_path, ttl=3600, max_bytes=10**6)
+    store.load()
+    assert store.touch("new.png")
+    assert not store.touch("old.png")
+    assert store.stats()["bytes"] == 7
+    assert asyncio.run(store.collect()) == 1
+
+def test_remove_orphans_spares_files_being_written(tmp_path):
+    store = OutputStore(output_dir=tmp_path, ttl=3600, max_bytes=10**6)
+    write(store, "kept.png", 1)
+    (tmp_path / "stray.png").write_bytes(b"x")
+
+    async def scenario():
+        with store.writing():
+            # Written by a render that has not recorded it yet
+            (tmp_path / "rendering.png").write_bytes(b"x")
+            deleted = await store.remove_orphans()
+            store.add_result(RenderResult(media_type="image/png", content=b"x", filename="rendering.png"))
+        return deleted
+
+    # The stray file predates the running render by less than the slack
+    assert asyncio.run(scenario()) == 0
+    assert asyncio.run(store.remove_orphans()) == 1
+    assert sorted(os.listdir(tmp_path)) == ["kept.png", "rendering.png"]
+
+def test_renders_are_recorded(test_client: TestClient, static_source):
+    output_store = test_client.app.state.services.output_store
+    request = {
+        "image_url": "https://example.com/base.png",
+        "output_format": "png",
+        "items": [{"text": "Stored", "position": [10, 10], "font_family": "Arial", "font_size": 10}],
+        "font_family": "Arial"
+    }
+    response = test_client.post("/api/v1/generate/", json=request)
+    filename = response.json()["download_url"].rsplit("/", 1)[-1]
+    assert output_store.touch(filename)
+
+    # A render cache hit hands out the same file and restarts its expiry
+    files = output_store.stats()["files"]
+    again = test_client.post("/api/v1/generate/", json=request)
+    assert again.json()["download_url"] == response.json()["download_url"]
+    assert output_store.stats()["files"] == files
@@ -0,0 +1,77 @@
+import asyncio
+import hashlib
+import threading
+from io import BytesIO
+import pytest
+from PIL import Image
+from app.models.request import RenderSpec
+from app.services.image_cache import SourceImage
+from app.services.render_cost import estimate_cost, fit_within, source_size
+from app.services.render_executor import RenderExecutor, RenderQueueFull
+
+def make_spec(**overrides) -> RenderSpec:
+    data = {
+        "output_format": "png",
+        "items": [{"text": "Hello", "position": [20, 20], "font_family": "Arial", "font_size": 12}],
+        "font_family": "Arial",
+    }
+    data.update(overrides)
+    return RenderSpec(**data)
+
+def test_source_size_reads_header():
+    buffer = BytesIO()
+    Image.new("RGB", (120, 80)).save(buffer, format="JPEG")
+    data = buffer.getvalue()
+    assert source_size(SourceImage(data, hashlib.sha256(data).hexdigest())) == (120, 80)
+
+def test_fit_within():
+    assert fit_within((400, 200), 100, None) == (100, 50)
+    assert fit_within((400, 200), 100, 20) == (40, 20)
+    # Never upscales
+    assert fit_within((40, 20), 100, 100) == (40, 20)
+
+def test_cost_grows_with_work():
+    label = estimate_cost(make_spec(), (1200, 630))
+    assert estimate_cost(make_spec(), (5472, 3648)) > label
+    assert estimate_cost(make_spec(remove_background=True), (1200, 630)) > label
+    assert estimate_cost(make_spec(output_format="jpg"), (1200, 630)) < label
+    # Shrinking while decoding makes drawing and encoding cheaper
+    assert estimate_cost(make_spec(target_size=(600, 315)), (5472, 3648)) < estimate_cost(make_spec(), (5472, 3648))
+    # A composed template only pays for text and encoding
+    spec = make_spec(remove_background=True, background_mode="connected")
+    assert estimate_cost(spec, (1200, 630), prepared=True) < estimate_cost(spec, (1200, 630))
+
+def test_cost_separates_labels_from_heavy_renders():
+    executor = RenderExecutor(kind="thread", workers=1)
+    heavy = make_spec(remove_background=True, background_mode="connected", output_format="pdf")
+    assert executor.lane_for(estimate_cost(make_spec(), (1200, 630))) is executor.light
+    assert executor.lane_for(estimate_cost(heavy, (5472, 3648))) is executor.heavy
+
+async def test_heavy_lane_does_not_block_light_lane():
+    executor = RenderExecutor(kind="thread", workers=1, queue_size=0, heavy_workers=1, heavy_queue_size=1, heavy_cost=100)
+    release = threading.Event()
+    try:
+        running = asyncio.ensure_future(executor.run(release.wait, 5, cost=1000))
+        waiting = asyncio.ensure_future(executor.run(lambda: "queued", cost=1000))
+        await asyncio.sleep(0.05)
+        with pytest.raises(RenderQueueFull):
+            await executor.run(lambda: None, cost=1000)
+
+        # Light renders still get a worker while the heavy lane is saturated
+        assert await executor.run(lambda: "light") == "light"
+        heavy_stats = executor.stats()["lanes"]["heavy"]
+        assert heavy_stats["running"] == 1
+        assert heavy_stats["queue_depth"] == 1
+        assert heavy_stats["rejected"] == 1
+
+        release.set()
+        assert await running is True
+        assert await waiting == "queued"
+    finally:
+        release.set()
+        executor.shutdown()
+
+    stats = executor.stats()
+    assert stats["completed"] == 3
+    assert stats["lanes"]["light"]["completed"] == 1
+    assert stats["lanes"]["heavy"]["wait_ms_max"] > 0
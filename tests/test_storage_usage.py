@@ -0,0 +1,40 @@
+from fastapi.testclient import TestClient
+from app.services.storage_usage import directory_usage
+
+def test_directory_usage(tmp_path):
+    (tmp_path / "a.png").write_bytes(b"x" * 3)
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "b.png").write_bytes(b"x" * 4)
+    assert directory_usage(tmp_path) == {"size": 7, "files": 2}
+    assert directory_usage(tmp_path / "missing") == {"size": 0, "files": 0}
+
+def test_status_reads_counters(test_client: TestClient, static_source):
+    before = test_client.get("/api/v1/admin/status").json()
+    assert before["reconciliation"] is None
+    assert set(before["hit_ratios"]) == set(before["caches"])
+    assert before["in_flight"]["renders"] == 0
+    assert set(before["in_flight"]["render_lanes"]) == {"light", "heavy"}
+
+    request = {
+        "image_url": "https://example.com/base.png",
+        "output_format": "png",
+        "items": [{"text": "Counted", "position": [10, 10], "font_family": "Arial", "font_size": 10}],
+        "font_family": "Arial"
+    }
+    test_client.post("/api/v1/generate/", json=request)
+    after = test_client.get("/api/v1/admin/status").json()
+    assert after["directories"]["output"]["files"] == before["directories"]["output"]["files"] + 1
+    assert after["directories"]["output"]["size"] > before["directories"]["output"]["size"]
+
+def test_reconciliation_reports_untracked_files(test_client: TestClient):
+    storage_usage = test_client.app.state.services.storage_usage
+    stray = storage_usage.directories["output"] / "stray-reconcile.txt"
+    stray.write_bytes(b"x" * 5)
+    try:
+        test_client.portal.call(storage_usage.reconcile)
+        output = test_client.get("/api/v1/admin/status").json()["reconciliation"]["directories"]["output"]
+        assert output["untracked_files"] >= 1
+        assert output["untracked_size"] >= 5
+    finally:
+        stray.unlink()
+        storage_usage.on_disk = None
@@ -0,0 +1,51 @@
+from PIL import Image
+from app.models.request import SVGItem
+from app.services.svg_processor import SVGProcessor
+
+SVG = '<svg xmlns="http://www.w3.org/2000/svg" width="4" height="4"><rect width="4" height="4" fill="red"/></svg>'
+
+def _counting_processor(monkeypatch):
+    processor = SVGProcessor()
+    calls = []
+
+    def render_svg(svg_item):
+        calls.append(svg_item)
+        return Image.new("RGBA", (4, 4), (255, 0, 0, 255))
+
+    monkeypatch.setattr(processor, "_render_svg", render_svg)
+    return processor, calls
+
+def test_rasterize_reuses_cached_render(monkeypatch):
+    processor, calls = _counting_processor(monkeypatch)
+
+    first = processor.rasterize(SVGItem(svg_data=SVG, position=(0, 0)))
+    second = processor.rasterize(SVGItem(svg_data=SVG, position=(10, 10)))
+    assert first is second
+    assert len(calls) == 1
+
+    # A different output size is a different raster
+    processor.rasterize(SVGItem(svg_data=SVG, position=(0, 0), width=8, height=8))
+    assert len(calls) == 2
+    assert processor.stats()["hits"] == 1
+
+def test_composite_touches_only_destination_region():
+    processor = SVGProcessor()
+    base = Image.new("RGBA", (10, 10), (0, 0, 255, 255))
+    icon = Image.new("RGBA", (4, 4), (255, 0, 0, 128))
+
+    processor.composite(base, icon, (2, 3))
+    assert base.getpixel((2, 3))[0] > 0
+    assert base.getpixel((5, 6))[0] > 0
+    assert base.getpixel((6, 7)) == (0, 0, 255, 255)
+    assert base.getpixel((1, 3)) == (0, 0, 255, 255)
+
+def test_composite_clips_at_edges():
+    processor = SVGProcessor()
+    base = Image.new("RGBA", (10, 10), (0, 0, 0, 0))
+    icon = Image.new("RGBA", (4, 4), (255, 0, 0, 255))
+
+    processor.composite(base, icon, (-2, -2))
+    processor.composite(base, icon, (8, 8))
+    assert base.getpixel((0, 0)) == (255, 0, 0, 255)
+    assert base.getpixel((2, 2)) == (0, 0, 0, 0)
+    assert base.getpixel((9, 9)) == (255, 0, 0, 255)
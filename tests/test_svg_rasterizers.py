@@ -0,0 +1,184 @@
+import pytest
+from PIL import Image
+from app.models.request import SVGItem
+from app.services.svg_processor import SVGProcessor
+from pydantic import ValidationError
+from app.services.svg_rasterizers import (
+    RASTERIZERS,
+    SimpleShapesRasterizer,
+    UnsupportedSVG,
+    build_rasterizers,
+    supersample_factor,
+)
+
+ICON = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="20" height="20" viewBox="0 0 10 10">'
+    '<rect x="0" y="0" width="5" height="10" fill="#FF0000"/>'
+    '<g fill="#0000FF" opacity="0.5"><circle cx="7.5" cy="5" r="2"/></g>'
+    '</svg>'
+)
+
+def test_simple_rasterizer_draws_shapes():
+    image = SimpleShapesRasterizer().rasterize(ICON)
+    assert image.mode == "RGBA"
+    assert image.size == (20, 20)
+    assert image.getpixel((2, 10)) == (255, 0, 0, 255)
+    # Translucent group over a transparent background
+    r, g, b, a = image.getpixel((15, 10))
+    assert (r, g, b) == (0, 0, 255) and 120 <= a <= 135
+    assert image.getpixel((19, 0))[3] == 0
+
+def test_simple_rasterizer_scales_to_requested_size():
+    image = SimpleShapesRasterizer().rasterize(ICON, 40, 40)
+    assert image.size == (40, 40)
+    assert image.getpixel((5, 20)) == (255, 0, 0, 255)
+
+def test_large_outputs_are_supersampled_less():
+    assert supersample_factor(20, 20) == 4
+    assert supersample_factor(2048, 2048) == 2
+    assert supersample_factor(4096, 4096) == 1
+    image = SimpleShapesRasterizer().rasterize(ICON, 4096, 4096)
+    assert image.size == (4096, 4096)
+    assert image.getpixel((100, 2048)) == (255, 0, 0, 255)
+
+def test_svg_item_size_is_bounded():
+    with pytest.raises(ValidationError):
+        SVGItem(svg_data=ICON, position=(0, 0), width=5000, height=10)
+
+def _reference(size: int, *rings: tuple[int, int]) -> list[list[bool]]:
+    """Pixels covered by square rings (outer edge, inner edge) centered in a size x size image"""
+    center = size / 2
+    def covered(x, y):
+        distance = max(abs(x + 0.5 - center), abs(y + 0.5 - center))
+        return any(inner < distance < outer for outer, inner in rings)
+    return [[covered(x, y) for x in range(size)] for y in range(size)]
+
+def test_simple_rasterizer_centers_strokes():
+    # The stroke straddles the outline: x and y 2..6 and 14..18, as in SVG
+    svg = (
+        '<svg xmlns="http://www.w3.org/2000/svg" width="20" height="20">'
+        '<rect x="4" y="4" width="12" height="12" fill="none" stroke="#000000" stroke-width="4"/>'
+        '</svg>'
+    )
+    image = SimpleShapesRasterizer().rasterize(svg)
+    expected = _reference(20, (8, 4))
+    actual = [[image.getpixel((x, y))[3] == 255 for x in range(20)] for y in range(20)]
+    assert actual == expected
+    assert all(image.getpixel((x, y))[3] in (0, 255) for x in range(20) for y in range(20))
+
+def _union(size: int, *rects: tuple[int, int, int, int]) -> list[list[bool]]:
+    """Pixels whose center lies in any of the (x0, y0, x1, y1) rectangles"""
+    return [
+        [any(x0 < x + 0.5 < x1 and y0 < y + 0.5 < y1 for x0, y0, x1, y1 in rects) for x in range(size)]
+        for y in range(size)
+    ]
+
+@pytest.mark.parametrize("join, corner", [("miter", 255), ("bevel", 0), ("round", 0)])
+def test_simple_rasterizer_joins_strokes(join, corner):
+    # Right, then up: the outer corner of the turn is at (12, 12)
+    svg = (
+        '<svg xmlns="http://www.w3.org/2000/svg" width="16" height="16">'
+        f'<polyline points="4,10 10,10 10,4" fill="none" stroke="#000000" stroke-width="4" stroke-linejoin="{join}"/>'
+        '</svg>'
+    )
+    image = SimpleShapesRasterizer().rasterize(svg)
+    # The segments, plus the pixel of the join they all cover
+    expected = _union(16, (4, 8, 10, 12), (8, 4, 12, 10), (10, 10, 11, 11))
+    joins = {(11, 10), (10, 11), (11, 11)}
+    for y in range(16):
+        for x in range(16):
+            if (x, y) not in joins:
+                # Polygon edges may bleed a quarter pixel to the right and below
+                assert abs(image.getpixel((x, y))[3] - 255 * expected[y][x]) <= 64, (x, y)
+    # The outermost pixel of the corner tells the joins apart
+    assert abs(image.getpixel((11, 11))[3] - corner) <= 64
+
+def test_simple_rasterizer_caps_lines():
+    svg = (
+        '<svg xmlns="http://www.w3.org/2000/svg" width="16" height="8">'
+        '<line x1="4" y1="4" x2="12" y2="4" stroke="#000000" stroke-width="2" stroke-linecap="square"/>'
+        '</svg>'
+    )
+    image = SimpleShapesRasterizer().rasterize(svg)
+    row = [image.getpixel((x, 3))[3] for x in range(16)]
+    assert row[2] == 0 and row[3] == 255 and row[12] == 255 and row[14] == 0
+
+def test_simple_rasterizer_strokes_over_fill():
+    svg = (
+        '<svg xmlns="http://www.w3.org/2000/svg" width="24" height="24">'
+        '<circle cx="12" cy="12" r="6" fill="#FF0000" stroke="#0000FF" stroke-width="4" stroke-opacity="0.5"/>'
+        '</svg>'
+    )
+    image = SimpleShapesRasterizer().rasterize(svg)
+    row = [image.getpixel((x, 12)) for x in range(24)]
+    # Outer half of the stroke over nothing, inner half blended over the fill
+    assert row[3][3] == 0 and row[20][3] == 0
+    r, g, b, a = row[5]
+    assert (r, g, b) == (0, 0, 255) and 120 <= a <= 135
+    r, g, b, a = row[7]
+    assert a == 255 and 120 <= r <= 135 and 120 <= b <= 135
+    assert row[12] == (255, 0, 0, 255)
+
+def test_simple_rasterizer_reads_percentage_opacity():
+    svg = '<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10"><rect width="10" height="10" opacity="50%"/></svg>'
+    assert SimpleShapesRasterizer().rasterize(svg).getpixel((5, 5)) == (0, 0, 0, 128)
+
+@pytest.mark.parametrize("svg", [
+    '<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10"><path d="M0 0 L10 10"/></svg>',
+    '<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10"><rect width="5" height="5" transform="rotate(45)"/></svg>',
+    '<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10"><rect width="5" height="5" fill="url(#g)"/></svg>',
+    # Valid SVG the simple parser cannot read
+    '<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10" viewBox="0,0,10"><rect width="5" height="5"/></svg>',
+    '<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10"><rect width="5" height="5" opacity="half"/></svg>',
+    # SVG 2 joins
+    '<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10"><polygon points="0,0 9,0 9,9" stroke="red" stroke-linejoin="arcs"/></svg>',
+])
+def test_simple_rasterizer_rejects_unsupported_svg(svg):
+    with pytest.raises(UnsupportedSVG):
+        SimpleShapesRasterizer().rasterize(svg)
+
+@pytest.mark.parametrize("name", ["simple", "cairosvg", "svglib"])
+def test_backends_scale_artwork_to_requested_size(name):
+    backend = RASTERIZERS[name]
+    if not backend.available():
+        pytest.skip(f"{name} is not installed")
+    # Left half red; at 40x20 it must be stretched to x < 20, not cropped
+    svg = (
+        '<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10" viewBox="0 0 10 10">'
+        '<rect x="0" y="0" width="5" height="10" fill="#FF0000"/>'
+        '</svg>'
+    )
+    try:
+        image = backend().rasterize(svg, 40, 20)
+    except Exception as e:
+        # renderPM needs a native drawing backend that may be missing
+        if name != "svglib":
+            raise
+        pytest.skip(f"svglib cannot render here: {e}")
+    assert image.size == (40, 20)
+    assert image.getpixel((15, 10)) == (255, 0, 0, 255)
+    assert image.getpixel((25, 10))[:3] != (255, 0, 0)
+
+def test_build_rasterizers():
+    assert [backend.name for backend in build_rasterizers("simple")] == ["simple"]
+    auto = [backend.name for backend in build_rasterizers("auto")]
+    assert auto[0] == "simple" and auto[-1] == "svglib"
+    with pytest.raises(ValueError):
+        build_rasterizers("unknown")
+
+def test_processor_falls_back_to_next_backend(monkeypatch):
+    processor = SVGProcessor(rasterizer="auto")
+    fallback = processor.rasterizers[-1]
+    calls = []
+
+    def rasterize(svg_data, width=None, height=None):
+        calls.append(svg_data)
+        return Image.new("RGBA", (10, 10))
+
+    monkeypatch.setattr(fallback, "rasterize", rasterize)
+    path_svg = '<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10"><path d="M0 0 L10 10"/></svg>'
+    odd_view_box = '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0,0,10"><rect width="5" height="5"/></svg>'
+    processor.rasterize(SVGItem(svg_data=path_svg, position=(0, 0)))
+    processor.rasterize(SVGItem(svg_data=ICON, position=(0, 0)))
+    processor.rasterize(SVGItem(svg_data=odd_view_box, position=(0, 0)))
+    assert calls == [path_svg, odd_view_box]
@@ -0,0 +1,102 @@
+import pytest
+from fastapi.testclient import TestClient
+from io import BytesIO
+from PIL import Image
+from app.models.request import GenerateRequest, TemplateRenderRequest
+from app.services.image_processor import ImageProcessor
+from app.services.render_executor import RenderExecutor
+from app.services.template_store import TemplateStore, fill_placeholders, TemplateValueError
+from app.core.config import settings
+from conftest import StaticImageCache, make_source
+
+def _template_data():
+    return {
+        "image_url": "https://example.com/base.png",
+        "output_format": "png",
+        "items": [
+            {
+                "text": "Hello {name}",
+                "position": [32, 24],
+                "font_family": "Arial",
+                "font_size": 12,
+                "color": "#FF0000"
+            }
+        ],
+        "font_family": "Arial"
+    }
+
+def test_fill_placeholders():
+    assert fill_placeholders("Hello {name}, {n}!", {"name": "Ada", "n": "3"}) == "Hello Ada, 3!"
+    assert fill_placeholders("No variables", {}) == "No variables"
+    with pytest.raises(TemplateValueError):
+        fill_placeholders("Hello {name}", {})
+
+def test_template_lifecycle(test_client: TestClient, static_source):
+    response = test_client.post("/api/v1/templates/", json=_template_data())
+    assert response.status_code == 200
+    template = response.json()
+    assert template["variables"] == ["name"]
+    assert (template["width"], template["height"]) == (64, 48)
+    template_id = template["template_id"]
+
+    # The base image is fetched once, at registration
+    for name in ("Ada", "Grace"):
+        response = test_client.post(
+            f"/api/v1/templates/{template_id}/render",
+            json={"values": {"name": name}, "delivery": "inline"}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/png"
+        image = Image.open(BytesIO(response.content))
+        assert image.size == (64, 48)
+    assert len(static_source.urls) == 1
+
+    response = test_client.post(
+        f"/api/v1/templates/{template_id}/render",
+        json={"values": {"name": "Ada"}, "output_format": "jpg"}
+    )
+    assert response.status_code == 200
+    assert response.json()["download_url"].endswith(".jpg")
+
+    assert test_client.get(f"/api/v1/templates/{template_id}").status_code == 200
+    assert test_client.delete(f"/api/v1/templates/{template_id}").status_code == 200
+    assert test_client.get(f"/api/v1/templates/{template_id}").status_code == 404
+
+def test_template_render_missing_value(test_client: TestClient, static_source):
+    template_id = test_client.post("/api/v1/templates/", json=_template_data()).json()["template_id"]
+    response = test_client.post(f"/api/v1/templates/{template_id}/render", json={"values": {}})
+    assert response.status_code == 400
+    assert "name" in response.json()["detail"]
+
+def test_template_too_many_outputs(test_client: TestClient, static_source):
+    data = _template_data()
+    data["outputs"] = [{"format": "png"}] * (settings.MAX_OUTPUTS_PER_REQUEST + 1)
+    response = test_client.post("/api/v1/templates/", json=data)
+    assert response.status_code == 400
+    assert static_source.urls == []
+
+def test_template_not_found(test_client: TestClient):
+    response = test_client.post("/api/v1/templates/missing/render", json={"values": {}})
+    assert response.status_code == 404
+
+async def test_templates_stay_in_process_with_process_executor(test_directories):
+    # The prepared base would otherwise be pickled to a worker on every render
+    executor = RenderExecutor(kind="process", workers=1, queue_size=0)
+    processor = ImageProcessor(
+        image_cache=StaticImageCache(make_source(color=(255, 255, 255), size=(64, 48))),
+        render_executor=executor
+    )
+    store = TemplateStore(processor)
+    try:
+        template = await store.create(GenerateRequest(**_template_data()))
+        result = await store.render(
+            template.id, TemplateRenderRequest(values={"name": "Ada"}, delivery="inline")
+        )
+        assert all(lane._executor is None for lane in executor.lanes)
+    finally:
+        executor.shutdown()
+
+    with Image.open(BytesIO(result.content)) as image:
+        assert image.size == (64, 48)
+        assert image.convert("L").getextrema()[0] < 255
+    assert executor.stats()["completed"] == 2
@@ -0,0 +1,101 @@
+import pytest
+from pathlib import Path
+from PIL import Image, ImageDraw, ImageFont
+from app.services.text_layout import TextLayoutCache, TextSpriteCache, font_key, layout_text, wrap_text
+
+DEJAVU = Path("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf")
+
+@pytest.fixture
+def font():
+    if not DEJAVU.exists():
+        pytest.skip("DejaVu fonts are not installed")
+    return ImageFont.truetype(str(DEJAVU), 24)
+
+def reference_wrap(text, font, max_width):
+    """Greedy wrapping that measures every candidate line exactly"""
+    lines, current = [], []
+    for word in text.split():
+        if current and font.getlength(" ".join(current + [word])) > max_width:
+            lines.append(" ".join(current))
+            current = []
+        current.append(word)
+    if current:
+        lines.append(" ".join(current))
+    return lines
+
+@pytest.mark.parametrize("max_width", [120, 200, 333, 600])
+def test_wrap_matches_exact_measurement(font, max_width):
+    text = "The quick brown fox jumps over the lazy dog. AVAWAY Tokyo LTA office " * 6
+    assert wrap_text(text, font, max_width) == reference_wrap(text, font, max_width)
+
+def test_lines_fit_max_width(font):
+    lines = wrap_text("Wrapping keeps every line inside the box " * 10, font, 250)
+    assert all(font.getlength(line) <= 250 for line in lines)
+
+def test_long_words_break_between_characters(font):
+    word = "Supercalifragilisticexpialidocious"
+    lines = wrap_text(f"a {word} b", font, 100)
+    # The tail of the broken word shares its line with the next word
+    assert lines[0] == "a"
+    assert lines[-1].endswith(" b")
+    assert "".join(lines[1:])[:-len(" b")] == word
+    assert all(font.getlength(line) <= 100 for line in lines)
+
+def test_empty_text(font):
+    assert wrap_text("   ", font, 100) == []
+
+def test_layout_cache_reuses_layouts(font):
+    cache = TextLayoutCache(max_entries=2)
+    first = cache.get(font, "Hello world", 80)
+    # A separately loaded font of the same file and size shares layouts
+    same_face = ImageFont.truetype(str(DEJAVU), 24)
+    assert cache.get(same_face, "Hello world", 80) is first
+    assert cache.get(font, "Hello world", None) is not first
+    assert cache.stats()["hits"] == 1
+
+    cache.clear()
+    assert cache.get(font, "Hello world", 80) is not first
+
+def test_layout_offsets(font):
+    layout = layout_text(font, "one two three", 60)
+    assert [line for line, _ in layout.lines] == wrap_text("one two three", font, 60)
+    assert layout.lines[0][1][1] == 0
+    assert all(dx <= 0 for _, (dx, _) in layout.lines)
+
+def test_in_memory_fonts_get_distinct_keys():
+    first, second = ImageFont.load_default(), ImageFont.load_default()
+    assert font_key(first) == font_key(first)
+    assert font_key(first) != font_key(second)
+
+@pytest.mark.parametrize("mode", ["RGBA", "RGB", "L"])
+@pytest.mark.parametrize("color", ["#FF0000", "#00FF0080"])
+@pytest.mark.parametrize("text", ["SALE 9.99", "jaguar Ťý"])
+def test_sprite_cache_matches_draw_text(font, mode, color, text):
+    cache = TextSpriteCache()
+    expected = Image.new(mode, (200, 60), "white")
+    ImageDraw.Draw(expected).text((10, 12), text, font=font, fill=color)
+
+    for _ in range(2):
+        actual = Image.new(mode, (200, 60), "white")
+        cache.draw_text(actual, (10, 12), text, font, color)
+        assert actual.tobytes() == expected.tobytes()
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["entries"] == 1
+
+def test_sprite_cache_clips_at_image_edges(font):
+    cache = TextSpriteCache()
+    for xy in [(-15, -10), (150, 40)]:
+        expected = Image.new("RGBA", (160, 50), "white")
+        ImageDraw.Draw(expected).text(xy, "Edge", font=font, fill="#123456")
+        actual = Image.new("RGBA", (160, 50), "white")
+        cache.draw_text(actual, xy, "Edge", font, "#123456")
+        assert actual.tobytes() == expected.tobytes()
+
+def test_sprite_cache_shares_masks_across_colors(font):
+    cache = TextSpriteCache()
+    image = Image.new("RGBA", (200, 60))
+    cache.draw_text(image, (0, 0), "SALE", font, "#FF0000")
+    cache.draw_text(image, (0, 30), "SALE", font, "#0000FF")
+    assert cache.stats()["entries"] == 1
+    cache.clear()
+    assert cache.stats()["entries"] == 0